@@ -2,13 +2,35 @@ import streamlit as st
 import pandas as pd
 import google.generativeai as genai
 from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
 import urllib.parse
 from datetime import datetime
 import re
 import json
 import time
+import threading
+import os
 import streamlit.components.v1 as components
+from search import Catalogue, PlanCache, PriceListCache, PriceRules, SearchIndex
+from search.compact import compact_frame
+from search.batch import codes_from_frame, parse_codes, quote_table
+from services import HttpPool, build_service
+from sync import META_KEYS, SYNC_FULL_SECONDS, new_sync_state, refresh_data
+from perf import span, traced
+from search.merge import MergedCatalogue
+from search.plan_cache import fingerprint, normalize_query
+from search.fuzzy import DEFAULT_CONFIDENCE
+from teach import (AdaptiveBatcher, ExtractCache, MemoryWriter, TokenBucket, delete_row_requests, rows_to_delete,
+                   run_pipeline, teach_items)
+
+# ตารางสินค้าเป็นของกลางที่ทุก session อ่านร่วมกัน: เปิด Copy-on-Write (pandas 3 เปิดอยู่แล้ว)
+# ตารางที่ตัด/กรองออกมาจะแชร์หน่วยความจำกับตารางกลาง และจะ copy ก็ต่อเมื่อมีคนแก้เท่านั้น
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+try:
+    import pyarrow.feather as feather  # มากับ streamlit อยู่แล้ว (ใช้ทำ snapshot บนดิสก์)
+except ImportError:
+    feather = None
 
 # ---------------------------------------------------------
 # 1. ตั้งค่าหน้าเว็บ (บรรทัดแรกสุด ห้ามย้าย)
@@ -141,8 +163,11 @@ def init_services():
                   'https://www.googleapis.com/auth/drive.metadata.readonly']
         creds = Credentials.from_service_account_info(service_account_info, scopes=scopes)
         
-        sheets_service = build('sheets', 'v4', credentials=creds)
-        drive_service = build('drive', 'v3', credentials=creds)
+        # Connection pool ใช้ร่วมกันทุก thread + discovery document จากเครื่อง (ไม่ยิงเน็ตตอนสร้าง client)
+        pool = HttpPool(creds)
+        discovery_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "discovery")
+        sheets_service = build_service('sheets', 'v4', pool, discovery_dir)
+        drive_service = build_service('drive', 'v3', pool, discovery_dir)
         
         # Config Gemini
         genai.configure(api_key=gemini_key)
@@ -169,235 +194,299 @@ except:
     st.error("ไม่พบ sheet_url ใน Secrets")
     st.stop()
 
+# ความมั่นใจขั้นต่ำของ Fuzzy Match (Tab 1) ถ้าต่ำกว่านี้ค่อยส่งให้ Gemini ช่วยเลือก
+FUZZY_CONFIDENCE = float(st.secrets.get("fuzzy_confidence", DEFAULT_CONFIDENCE))
+
+# งานสอน AI: จำนวนคำขอ Gemini ที่ยิงพร้อมกัน / เพดานคำขอต่อนาที / บันทึกลงชีตทีละกี่แถว / Batch ใหญ่สุด
+TEACH_WORKERS = int(st.secrets.get("teach_workers", 4))
+TEACH_RPM = float(st.secrets.get("teach_rpm", 30))
+TEACH_WRITE_ROWS = int(st.secrets.get("teach_write_rows", 500))
+TEACH_MAX_BATCH = int(st.secrets.get("teach_max_batch", 50))
+# จำนวนผลแกะข้อมูลสูงสุดที่เก็บในแคชบนดิสก์
+EXTRACT_CACHE_SIZE = int(st.secrets.get("extract_cache_size", 100000))
+
+# แคชผลแปลงคำค้น "ค้นหา AI" -> Filter JSON (จำนวนคำค้น / อายุเป็นวินาที)
+PLAN_CACHE_SIZE = int(st.secrets.get("plan_cache_size", 256))
+PLAN_CACHE_TTL = float(st.secrets.get("plan_cache_ttl", 3600))
+
+# เช็คราคาหลายรายการ: จำนวนคำค้นสูงสุดต่อครั้ง / จำนวนตัวที่หาไม่เจอที่ยอมส่ง Gemini ช่วยเลือก
+BATCH_MAX_ITEMS = int(st.secrets.get("batch_max_items", 500))
+BATCH_AI_ITEMS = int(st.secrets.get("batch_ai_items", 50))
+
+# กฎตั้งราคาขาย (secrets ส่วน [pricing]: default_margin / margins / rounding / [pricing.brand] / [pricing.type])
+# แต่ละ session แก้กฎของตัวเองได้ในแท็บ "ราคาขายทั้งร้าน" (เก็บใน session_state["price_rules"])
+# rounding = [[1000, 10], [10000, 50], ["", 100]] (ช่วงสุดท้ายไม่จำกัดใช้ "" -- TOML ไม่มี null / 0 ไม่รับ)
+DEFAULT_PRICE_RULES = PriceRules.from_config(st.secrets.get("pricing", {}))
+
 # ---------------------------------------------------------
 # 5. ฟังก์ชันโหลด/บันทึกข้อมูล
 # ---------------------------------------------------------
-@st.cache_data(ttl=600)
-def load_data_master():
+SYNC_CHECK_SECONDS = 30   # thread เบื้องหลังเช็ค modifiedTime กับ Drive ทุกๆ กี่วินาที (โหลดเต็มทุก SYNC_FULL_SECONDS)
+# โฟลเดอร์เก็บแคชบนเครื่อง (ไม่ขึ้น git)
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+# Snapshot บนดิสก์ (Arrow/Feather แบบไม่บีบอัด เปิดด้วย memory map ได้) ไว้เปิดแอปใหม่แล้วค้นหาได้ทันที
+SNAPSHOT_DIR = os.path.join(CACHE_DIR, "snapshots")
+
+@st.cache_resource
+def get_sync_state():
+    # สถานะกลางของการซิงก์ (ใช้ร่วมกันทุก session) ค่าหลักดู sync.new_sync_state
+    # ตารางใน "data" ห้ามแก้ (อ่านอย่างเดียว) ทุก session ได้ตัวเดียวกัน ไม่มีการ copy
+    state = new_sync_state()
+    state.update({
+        "lock": threading.Lock(), "wake": threading.Event(), "error": None, "catalogue": None,
+        "price_lists": PriceListCache(),
+        "snapshot": None, "snapshot_lock": threading.Lock(), "snapshot_wake": threading.Event(), "snapshot_main": None,
+    })
+    return state
+
+def mark_data_dirty(full=False, mem_appended=False, state=None):
+    # ปลุก thread เบื้องหลังให้เช็ค Drive ทันที (แทน st.cache_data.clear() ที่ล้างทุกอย่าง)
+    # full=True         : โหลดใหม่ทั้งหมด (เช่น หลังล้างขยะ ซึ่งแถวใน AI_Memory ถูกเขียนใหม่)
+    # mem_appended=True : แอปเพิ่งต่อท้าย AI_Memory เอง -> ดึงแค่แถวใหม่ ไม่ต้องโหลดตารางหลัก
+    # state             : ส่งมาเองเมื่อเรียกจาก thread เบื้องหลัง (นอก script ของ Streamlit)
+    state = state if state is not None else get_sync_state()
+    state["force"] = True
+    if full: state["force_full"] = True
+    if mem_appended: state["mem_appended"] = True
+    state["wake"].set()
+
+def _snapshot_meta_path():
+    return os.path.join(SNAPSHOT_DIR, f"{SPREADSHEET_ID}.json")
+
+def _queue_snapshot(state, data, meta):
+    # ส่งข้อมูลชุดล่าสุดให้ thread เขียน snapshot (ตัวเดียวต่อ process) ถ้ายังเขียนไม่ทันจะเขียนแค่ชุดล่าสุด
+    with state["snapshot_lock"]:
+        state["snapshot"] = (data, meta)
+    state["snapshot_wake"].set()
+
+def _snapshot_loop(state):
+    # thread เขียน snapshot ตัวเดียว (ระหว่างสอน AI รีเฟรชถี่มาก ไม่ให้หลายตัวเขียน/ลบไฟล์ทับกัน)
+    while True:
+        state["snapshot_wake"].wait()
+        state["snapshot_wake"].clear()
+        with state["snapshot_lock"]:
+            job, state["snapshot"] = state["snapshot"], None
+        if job is not None: _write_snapshot(state, *job)
+
+def _write_snapshot(state, data, meta):
+    # เขียนไฟล์ใหม่ก่อน แล้วค่อยสลับ meta ทีหลัง (ถ้าพังกลางทาง snapshot เดิมยังใช้ได้)
+    # ตารางหลักตัวเดิม (เปลี่ยนแค่ความจำ AI) ไม่เขียนซ้ำ ใช้ไฟล์เดิม
+    if feather is None: return
     try:
-        # Metadata
-        file_meta = drive_svc.files().get(fileId=SPREADSHEET_ID, fields="name, modifiedTime").execute()
-        file_name = file_meta.get('name')
-        dt = datetime.strptime(file_meta.get('modifiedTime'), "%Y-%m-%dT%H:%M:%S.%fZ")
-        last_update = dt.strftime("%d/%m/%Y %H:%M น.")
-
-        # Main Data
-        res_main = sheets_svc.spreadsheets().values().get(spreadsheetId=SPREADSHEET_ID, range="A:H").execute()
-        vals_main = res_main.get('values', [])
-        
-        if vals_main:
-            df_main = pd.DataFrame(vals_main[1:], columns=vals_main[0])
-            for col in ['ราคาทุนต่อหน่วย', 'จำนวนสต้อก']:
-                if col in df_main.columns:
-                    df_main[col] = pd.to_numeric(df_main[col].astype(str).str.replace(',', ''), errors='coerce').fillna(0)
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        stamp = time.time_ns()
+        last = state["snapshot_main"]
+        if last is not None and last[0] is data[0] and os.path.exists(os.path.join(SNAPSHOT_DIR, last[1])):
+            main_file, files = last[1], [(data[1], f"{SPREADSHEET_ID}_{stamp}_mem.arrow")]
         else:
-            df_main = pd.DataFrame()
+            main_file = f"{SPREADSHEET_ID}_{stamp}_main.arrow"
+            files = [(data[0], main_file), (data[1], f"{SPREADSHEET_ID}_{stamp}_mem.arrow")]
+        meta = dict(meta, main_file=main_file, mem_file=files[-1][1])
+        for df, name in files:
+            tmp = os.path.join(SNAPSHOT_DIR, name + ".tmp")
+            feather.write_feather(df.reset_index(drop=True), tmp, compression='uncompressed')
+            os.replace(tmp, os.path.join(SNAPSHOT_DIR, name))
+        tmp = _snapshot_meta_path() + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, _snapshot_meta_path())
+        state["snapshot_main"] = (data[0], main_file)
+
+        # ลบ snapshot รุ่นเก่าของชีตนี้ (มีคนเขียนคนเดียว ไม่ชนไฟล์ที่กำลังเขียน)
+        for name in os.listdir(SNAPSHOT_DIR):
+            if name.startswith(f"{SPREADSHEET_ID}_") and name not in (meta["main_file"], meta["mem_file"]):
+                os.remove(os.path.join(SNAPSHOT_DIR, name))
+    except Exception as e:
+        print(f"Snapshot Write Error: {e}")
 
-        # AI Memory Data
-        try:
-            # 🔥 แก้ไขจุดที่ 1: ดึงข้อมูลถึงคอลัมน์ F (เพื่อให้ได้ AI_Kind)
-            res_mem = sheets_svc.spreadsheets().values().get(spreadsheetId=SPREADSHEET_ID, range="AI_Memory!A:F").execute()
-            vals_mem = res_mem.get('values', [])
-            
-            # 🔥 แก้ไขจุดที่ 2: เพิ่ม AI_Kind ในหัวข้อคอลัมน์
-            cols_mem = ['SKU', 'AI_Brand', 'AI_Type', 'AI_Spec', 'AI_Tags', 'AI_Kind']
-
-            if vals_mem and len(vals_mem) > 1:
-                headers = vals_mem[0]
-                rows = vals_mem[1:]
-                # เติมค่าว่างให้ครบทุกคอลัมน์ถ้ามันแหว่ง
-                fixed_rows = [r + [None]*(len(headers)-len(r)) for r in rows]
-                df_mem = pd.DataFrame(fixed_rows, columns=headers)
-                
-                # ถ้าโหลดมาแล้วไม่มีคอลัมน์ AI_Kind ให้เติมเข้าไป
-                if 'AI_Kind' not in df_mem.columns:
-                    df_mem['AI_Kind'] = ''
-            else:
-                # สร้างตารางเปล่าแบบมี AI_Kind รอไว้
-                df_mem = pd.DataFrame(columns=cols_mem)
-        except Exception as e:
-            # กรณี Error ก็สร้างตารางเปล่าที่มี AI_Kind ไว้ก่อน
-            print(f"Load Mem Error: {e}")
-            df_mem = pd.DataFrame(columns=['SKU', 'AI_Brand', 'AI_Type', 'AI_Spec', 'AI_Tags', 'AI_Kind'])
+def _restore_snapshot(state):
+    # เปิดแอปใหม่ (Cold Start): โหลด snapshot ล่าสุดจากดิสก์ ถ้ามี
+    if feather is None: return False
+    try:
+        with open(_snapshot_meta_path(), encoding="utf-8") as f:
+            meta = json.load(f)
+        # to_pandas คัดลอกจากไฟล์ (memory map) เข้าคอลัมน์ pandas 1 รอบ (ไม่ใช่ zero-copy)
+        # dtype (category / Arrow string / int32 / float32 / float64) กลับมาเองจาก pandas metadata ในไฟล์
+        # แปลงซ้ำเฉพาะคอลัมน์ที่ยังเป็น object (snapshot รุ่นเก่า)
+        df_main = feather.read_table(os.path.join(SNAPSHOT_DIR, meta["main_file"]), memory_map=True).to_pandas()
+        df_main = compact_frame(df_main, [c for c in df_main.columns if df_main[c].dtype == object])
+        df_mem = feather.read_table(os.path.join(SNAPSHOT_DIR, meta["mem_file"]), memory_map=True).to_pandas()
+    except FileNotFoundError:
+        return False
+    except Exception as e:
+        print(f"Snapshot Read Error: {e}")
+        return False
+    state.update({
+        # snapshot รุ่นเก่าอาจยังไม่มีบางคีย์ (เช่น main_hash) -> ใช้ค่าเริ่มต้นใน state
+        **{k: meta.get(k, state[k]) for k in META_KEYS},
+        "data": (df_main, df_mem, meta["file_name"], meta["last_update"]), "version": state["version"] + 1,
+        "snapshot_main": (df_main, meta["main_file"]),
+    })
+    return True
+
+def _refresh_data(state, warm=None):
+    # ดึงข้อมูลจาก Google (ต้องถือ lock อยู่) ด้วย sync.refresh_data แล้วส่งชุดใหม่ให้ thread เขียน snapshot
+    old = state["data"]
+    data = refresh_data(state, sheets_svc, drive_svc, SPREADSHEET_ID, warm=warm, full_seconds=SYNC_FULL_SECONDS)
+    # เขียน snapshot นอกเส้นทางของผู้ใช้ (thread เขียน snapshot ตัวเดียว)
+    if data is not old: _queue_snapshot(state, data, {k: state[k] for k in META_KEYS})
+    return data
+
+def _warm_indexes(state, df_main, df_mem):
+    # สร้างตารางรวม + Index ค้นหาของข้อมูลชุดใหม่ (ใน thread เบื้องหลัง ก่อนสลับให้ผู้ใช้เห็น)
+    try:
+        if df_main.empty or 'รหัสสินค้า' not in df_main.columns: return
+        merged, _ = state["catalogue"].sync(df_main, df_mem)
+        get_search_index(df_main, state)
+        state["price_lists"].get(merged, DEFAULT_PRICE_RULES)
+    except Exception as e:
+        print(f"Warm Index Error: {e}")
 
-        return df_main, df_mem, file_name, last_update
+def _refresh_loop(state):
+    # ---------------------------------------------------------
+    # Thread เบื้องหลัง (1 ตัวต่อ process): เช็ค modifiedTime ทุก SYNC_CHECK_SECONDS
+    # หรือทันทีที่มีคนเรียก mark_data_dirty แล้วโหลด + สร้าง Index ใหม่นอกเส้นทางของผู้ใช้
+    # ผู้ใช้อ่าน state["data"] ชุดล่าสุดเสมอ ไม่ต้องรอ Google API
+    # ---------------------------------------------------------
+    while True:
+        with state["lock"]:
+            try:
+                data = _refresh_data(state, warm=lambda data: _warm_indexes(state, data[0], data[1]))
+                state["error"] = None
+                # ข้อมูลไม่เปลี่ยน (เช่น เพิ่งเปิดจาก snapshot) ก็ยังต้องมี Index พร้อมใช้
+                _warm_indexes(state, data[0], data[1])
+            except Exception as e:
+                print(f"Background Refresh Error: {e}")
+                state["error"] = str(e)
+        state["wake"].wait(SYNC_CHECK_SECONDS)
+        state["wake"].clear()
 
-    except Exception as e:
-        # 👇 โค้ดส่วนนี้จะดึง Error ของ Google API มาโชว์ให้คุณเห็นชัดๆ บนหน้าเว็บ
-        st.error(f"🛑 ข้อมูลจาก Google API ขัดข้อง:")
-        st.code(str(e)) 
-        
-        return pd.DataFrame(), pd.DataFrame(), "Error", "-"
+@st.cache_resource
+def start_background_refresh():
+    # เริ่ม thread ครั้งเดียวต่อ process (เก็บใน resource cache เหมือน init_services)
+    state = get_sync_state()
+    state["catalogue"] = get_merged_catalogue()
+    threading.Thread(target=_snapshot_loop, args=(state,), name="snapshot-writer", daemon=True).start()
+    thread = threading.Thread(target=_refresh_loop, args=(state,), name="sheet-refresh", daemon=True)
+    thread.start()
+    return thread
+
+@traced("load_data_master")
+def load_data_master():
+    # คืนข้อมูลชุดล่าสุดที่ thread เบื้องหลังโหลดไว้ (ไม่ยิง Google API ในคำขอของผู้ใช้)
+    # ยกเว้นครั้งแรกสุดที่ยังไม่มีทั้งข้อมูลในแรมและ snapshot บนดิสก์ ต้องรอโหลดจริง
+    state = get_sync_state()
+    if state["data"] is None:
+        with state["lock"]:
+            if state["data"] is None and not _restore_snapshot(state):
+                try:
+                    _refresh_data(state)
+                except Exception as e:
+                    # 👇 โค้ดส่วนนี้จะดึง Error ของ Google API มาโชว์ให้คุณเห็นชัดๆ บนหน้าเว็บ
+                    st.error(f"🛑 ข้อมูลจาก Google API ขัดข้อง:")
+                    st.code(str(e))
+                    return pd.DataFrame(), pd.DataFrame(), "Error", "-"
+    start_background_refresh()
+    return state["data"]
+
+def data_age_seconds():
+    # อายุข้อมูล = เวลานับจากที่เช็คกับ Drive สำเร็จครั้งล่าสุด
+    checked_at = get_sync_state()["checked_at"]
+    return time.time() - checked_at if checked_at else None
 
 def append_to_sheet(data_values):
+    # ต่อท้าย AI_Memory (raise ถ้าไม่สำเร็จ ให้ MemoryWriter ตัดสินใจลองใหม่) เรียกจาก thread ของ writer
     body = {'values': data_values}
-    try:
-        sheets_svc.spreadsheets().values().append(
-            spreadsheetId=SPREADSHEET_ID, range="AI_Memory!A:A", 
-            valueInputOption="USER_ENTERED", body=body
-        ).execute()
-        return True
-    except Exception as e: 
-        st.error(f"Save Error: {e}")
-        return False
+    sheets_svc.spreadsheets().values().append(
+        spreadsheetId=SPREADSHEET_ID, range="AI_Memory!A:A",
+        valueInputOption="USER_ENTERED", body=body
+    ).execute()
 
-def overwrite_memory_sheet(df_new_mem):
+@st.cache_resource
+def get_memory_writer():
+    # บัฟเฟอร์เขียน AI_Memory ตัวเดียวต่อ process (journal แยกตามชีต อยู่ใน .cache)
+    # แถวที่ค้างจากรอบก่อน (แอปล่ม/เน็ตหลุด) จะถูกส่งต่อทันทีที่สร้าง
+    state = get_sync_state()
+    return MemoryWriter(
+        append_to_sheet, os.path.join(CACHE_DIR, f"memory_journal_{SPREADSHEET_ID}.jsonl"),
+        batch_rows=TEACH_WRITE_ROWS, on_flush=lambda n: mark_data_dirty(mem_appended=True, state=state),
+    )
+
+def plan_memory_cleanup(valid_skus):
+    # ---------------------------------------------------------
+    # หาแถวขยะ/ตัวซ้ำใน AI_Memory จากคอลัมน์ SKU ล่าสุดบนชีต (ไม่ใช้ df_mem ที่อาจยังไม่อัปเดต)
+    # คืน (sheetId ของแท็บ AI_Memory, ตำแหน่งแถวข้อมูลที่ต้องลบ)
+    # ---------------------------------------------------------
+    meta = sheets_svc.spreadsheets().get(
+        spreadsheetId=SPREADSHEET_ID, fields="sheets.properties(sheetId,title)"
+    ).execute()
+    sheet_id = next(s['properties']['sheetId'] for s in meta.get('sheets', [])
+                    if s['properties'].get('title') == 'AI_Memory')
+    res = sheets_svc.spreadsheets().values().get(spreadsheetId=SPREADSHEET_ID, range="AI_Memory!A2:A").execute()
+    skus = [r[0] if r else '' for r in res.get('values', [])]
+    return sheet_id, rows_to_delete(skus, valid_skus)
+
+def delete_memory_rows(sheet_id, rows):
+    # ลบเฉพาะแถวที่ต้องลบด้วย batchUpdate ครั้งเดียว (Google ทำทั้งชุดหรือไม่ทำเลย)
+    # แถวที่เหลือไม่ถูกแตะ คนค้นหาระหว่างนี้ไม่เห็นความจำ AI ว่างเปล่า / แถวที่ต่อท้ายมาใหม่ไม่กระทบตำแหน่ง
     try:
-        # 1. แปลง DataFrame เป็น List เพื่อเตรียมบันทึก
-        # ต้องจัดการ NaN ให้เป็น empty string ไม่งั้น Error
-        df_new_mem = df_new_mem.fillna('') 
-        values = [df_new_mem.columns.tolist()] + df_new_mem.values.tolist()
-        
-        # 2. ล้างข้อมูลเก่าทั้งหมดใน AI_Memory
-        sheets_svc.spreadsheets().values().clear(
-            spreadsheetId=SPREADSHEET_ID, range="AI_Memory!A:E"
-        ).execute()
-
-        # 3. บันทึกข้อมูลใหม่ลงไป
-        body = {'values': values}
-        sheets_svc.spreadsheets().values().update(
-            spreadsheetId=SPREADSHEET_ID, range="AI_Memory!A1",
-            valueInputOption="USER_ENTERED", body=body
+        sheets_svc.spreadsheets().batchUpdate(
+            spreadsheetId=SPREADSHEET_ID, body={'requests': delete_row_requests(sheet_id, rows)}
         ).execute()
         return True
     except Exception as e:
         st.error(f"Cleanup Error: {e}")
         return False
 
-@st.cache_data(ttl=600)
+@st.cache_resource
+def get_merged_catalogue():
+    # ตารางรวม (หลัก + ความจำ AI) ตัวเดียวใช้ร่วมกันทุก session อัปเดตแบบเติมเฉพาะแถวใหม่ได้
+    return MergedCatalogue()
+
+@traced("merge_data")
 def merge_data(df_main, df_mem):
-    # ถ้าไม่มีข้อมูล AI ให้คืนค่าเดิมไปก่อน
-    if df_mem.empty: return df_main.copy()
-    
-    # Copy เพื่อไม่ให้กระทบตารางหลัก
-    df_main_c = df_main.copy()
-    df_mem_c = df_mem.copy()
-    
-    # 🔥 จุดสำคัญ 1: แปลงเป็นตัวหนังสือ + ตัวพิมพ์ใหญ่ + ตัดช่องว่าง (Normalize)
-    # เพื่อแก้ปัญหา "sku01" ไม่เท่ากับ "SKU01" หรือ " SKU01 "
-    df_main_c['join_key'] = df_main_c['รหัสสินค้า'].astype(str).str.strip().str.upper()
-    df_mem_c['join_key'] = df_mem_c['SKU'].astype(str).str.strip().str.upper()
-    
-    # 2. จับคู่ (Merge) ด้วยคอลัมน์พิเศษที่สร้างขึ้น (join_key)
-    merged = pd.merge(df_main_c, df_mem_c, on='join_key', how='left')
-    
-    # 3. ถมช่องว่าง (สำคัญมาก: ถ้า AI ยังไม่รู้จัก ให้ใส่ค่าว่าง อย่าให้เป็น NaN)
-    cols_to_fix = ['AI_Brand', 'AI_Type', 'AI_Spec', 'AI_Tags', 'AI_Kind'] 
-    for col in cols_to_fix:
-        if col in merged.columns:
-            # fillna('') จะทำให้ค่าว่างเป็น string ว่างๆ ไม่ error เวลาค้นหา
-            merged[col] = merged[col].fillna('').astype(str)
-    
-    # ลบคอลัมน์ช่วย (join_key) ทิ้ง
-    if 'join_key' in merged.columns:
-        del merged['join_key']
-            
-    return merged
+    # คืน (ตารางรวม, ของที่เตรียมไว้สำหรับค้นหา AI) คำนวณครั้งเดียวต่อข้อมูลชุดนี้:
+    # - context : Database Context สำหรับ prompt
+    # - numbers : ตัวเลขที่ดึงไว้แล้วของคอลัมน์สเปค/ราคา (ค้นช่วงตัวเลขไม่ต้องรัน regex ซ้ำ)
+    # - texts   : คอลัมน์ข้อความที่ normalize แล้ว + inverted index (ค้นยี่ห้อ/ประเภทไม่ต้องสแกนคอลัมน์)
+    # หลังสอน AI (ความจำแค่ต่อท้าย) จะเติมเฉพาะแถวใหม่ ไม่ merge + copy ใหม่ทั้งตาราง
+    return get_merged_catalogue().sync(df_main, df_mem)
 # ---------------------------------------------------------
 # ฟังก์ชันแกะข้อมูลสินค้า (สำหรับปุ่ม "สอน AI")
 # ---------------------------------------------------------
 # ---------------------------------------------------------
-# ฟังก์ชันแกะข้อมูลสินค้า (ฉบับเสถียร: Retry 3 ครั้ง + พักนานขึ้น)
+# ตัวแกะข้อมูล + retry/salvage อยู่ใน teach.extract_names / teach.teach_items (import/ทดสอบได้ ไม่ต้องมี Streamlit)
 # ---------------------------------------------------------
-def ask_gemini_extract(names):
-    # ค่า Default กรณีพังจริงๆ
-    default_list = []
-    for _ in names:
-        default_list.append({
-            "AI_Brand": "Unknown", "AI_Type": "Other", 
-            "AI_Kind": "", "AI_Spec": "-", "AI_Tags": ""
-        })
-
-    if not names: return []
-
-    prompt = f"""
-    Extract product info from this list:
-    {json.dumps(names, ensure_ascii=False)}
+@st.cache_resource
+def get_extract_cache():
+    # แคชผลแกะข้อมูลของ Gemini (ล้างขยะ/เปลี่ยนรหัสสินค้าแล้วสอนใหม่ ไม่ต้องเรียก API ซ้ำ)
+    return ExtractCache(os.path.join(CACHE_DIR, "extract_cache.sqlite3"), max_entries=EXTRACT_CACHE_SIZE)
 
-    Return JSON Array with these keys:
-    - AI_Brand (Use Uppercase e.g. SAMSUNG)
-    - AI_Type (Category in Thai e.g. เครื่องซักผ้า, ทีวี)
-    - AI_Kind (Sub-type in Thai e.g. ฝาบน, 2 ถัง. If unknown use "")
-    - AI_Spec (Capacity/Size e.g. 10 kg, 55 นิ้ว)
-    - AI_Tags (Features e.g. inverter, smart tv)
+# generation_config ของงานแกะข้อมูล (บังคับตอบเป็น JSON)
+EXTRACT_CONFIG = genai.types.GenerationConfig(response_mime_type="application/json")
 
-    Response Format: JSON Array ONLY. No Markdown.
-    """
-    
-    # 🔥 ระบบตื้อ 3 รอบ (Retry Logic) 🔥
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            # เรียก AI
-            response = ai_model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    response_mime_type="application/json"
-                )
-            )
-            
-            txt = response.text.strip()
-            # ล้าง Markdown
-            txt_clean = re.sub(r"```json|```", "", txt).strip()
-            
-            data = json.loads(txt_clean)
-
-            # เช็คความถูกต้องของข้อมูล
-            normalized_data = []
-            for item in data:
-                new_item = {
-                    "AI_Brand": item.get("AI_Brand") or "Unknown",
-                    "AI_Type": item.get("AI_Type") or "Other",
-                    "AI_Kind": item.get("AI_Kind") or "", 
-                    "AI_Spec": item.get("AI_Spec") or "-",
-                    "AI_Tags": item.get("AI_Tags") or ""
-                }
-                if isinstance(new_item["AI_Tags"], list):
-                    new_item["AI_Tags"] = ", ".join(new_item["AI_Tags"])
-                normalized_data.append(new_item)
-            
-            # ถ้าจำนวนข้อมูลไม่ครบ (เช่นส่งไป 10 กลับมา 5) ให้ถือว่า Error แล้วลองใหม่
-            if len(normalized_data) != len(names):
-                print(f"⚠️ จำนวนไม่ครบ ({len(normalized_data)}/{len(names)}) ลองใหม่...")
-                raise ValueError("Data mismatch")
-                
-            return normalized_data # สำเร็จ! ส่งค่ากลับเลย
-
-        except Exception as e:
-            # สูตรคำนวณเวลารอ: รอบ 1=5วิ, รอบ 2=10วิ, รอบ 3=15วิ
-            wait_time = (attempt + 1) * 5 
-            print(f"⚠️ AI Error (รอบ {attempt+1}): {e} ... รอ {wait_time} วินาที")
-            time.sleep(wait_time)
-    
-    # ถ้าครบ 3 รอบแล้วยังไม่ได้จริงๆ ค่อยยอมแพ้
-    return default_list
 # ---------------------------------------------------------
 # 🔥 ฟังก์ชัน AI (โหมด DEBUG: แสดง Error ให้เห็นจะๆ)
 # ---------------------------------------------------------
-def ask_gemini_filter(query, columns, df_lookup=None):
+@st.cache_resource
+def get_plan_cache():
+    # แคช Filter JSON ของ "ค้นหา AI" (ใช้ร่วมกันทุก session พนักงานค้นคำเดิมซ้ำทั้งวัน)
+    return PlanCache(max_entries=PLAN_CACHE_SIZE, ttl=PLAN_CACHE_TTL)
+
+@traced("ask_gemini_filter")
+def ask_gemini_filter(query, columns, context_str=""):
     # ---------------------------------------------------------
-    # PART 1: เตรียม Context (ส่งโพย Top 50 ให้ AI รู้จักสินค้าในร้าน)
+    # PART 1: Context (โพย Top ยี่ห้อ/ประเภท/ชนิด) คำนวณไว้แล้วตอน merge_data ส่งมาเป็นข้อความสำเร็จรูป
     # ---------------------------------------------------------
-    context_str = ""
-    if df_lookup is not None:
-        try:
-            # เรียงตามความนิยม (Most Popular)
-            brands = df_lookup['AI_Brand'].value_counts().index.tolist()
-            types = df_lookup['AI_Type'].value_counts().index.tolist()
-            kinds = df_lookup['AI_Kind'].value_counts().index.tolist()
-            
-            # Limit Token: ส่งไปแค่ตัวท็อปๆ
-            brand_list = json.dumps(brands[:60], ensure_ascii=False)
-            type_list = json.dumps(types[:40], ensure_ascii=False)
-            kind_list = json.dumps(kinds[:60], ensure_ascii=False)
-            
-            context_str = f"""
-            [Database Context - Use these exact values for mapping]
-            - Known Brands: {brand_list}
-            - Known Types: {type_list}
-            - Known Kinds: {kind_list}
-            """
-        except: pass
+
+    # คำค้นเดิม + context เดิม -> ใช้ Filter เดิมจากแคชได้เลย ไม่ต้องรอ AI
+    plan_cache = get_plan_cache()
+    plan_key = (normalize_query(query), fingerprint(columns, context_str))
+    with span("plan_cache.get") as sp:
+        cached_plan = plan_cache.get(plan_key)
+        sp["cache"] = "hit" if cached_plan is not None else "miss"
+    if cached_plan is not None:
+        return cached_plan
 
     # ---------------------------------------------------------
     # PART 2: Prompt สั่งงาน (ผสานกฎเรื่องทศนิยมและช่วงตัวเลข)
@@ -442,10 +531,12 @@ def ask_gemini_filter(query, columns, df_lookup=None):
     
     try:
         # สั่งให้ AI ตอบกลับมา
-        res = ai_model.generate_content(
-            prompt, 
-            generation_config=genai.types.GenerationConfig(response_mime_type="application/json")
-        )
+        with span("gemini.filter", bytes_out=len(prompt)) as sp:
+            res = ai_model.generate_content(
+                prompt,
+                generation_config=genai.types.GenerationConfig(response_mime_type="application/json")
+            )
+            sp["bytes_in"] = len(res.text)
         
         # 🧹 ดักจับปัญหา AI ชอบพิมพ์ Markdown (```json) ติดมาด้วย
         import re
@@ -453,7 +544,9 @@ def ask_gemini_filter(query, columns, df_lookup=None):
         txt_clean = re.sub(r"```json|```", "", txt_clean).strip()
         
         import json
-        return json.loads(txt_clean)
+        result = json.loads(txt_clean)
+        plan_cache.put(plan_key, result)
+        return result
         
     except Exception as e:
         # 🚨 โค้ดแฉ AI: ถ้ามันพัง มันจะฟ้องหน้าเว็บเลยว่าเพราะอะไร!
@@ -464,10 +557,43 @@ def ask_gemini_filter(query, columns, df_lookup=None):
         except:
             pass
         return None
-def clean_text(text):
-    # 👇 ต้องมีการเว้นวรรค (Indentation) ตรงนี้
-    if not text: return ""
-    return re.sub(r'[^a-zA-Z0-9]', '', str(text)).lower()
+def ask_gemini_pick(query, search_pool):
+    # ให้ Gemini เลือกสินค้าที่ตรงกับคำค้นจากตัวเลือก คืน index ของ df_main (-1 = ไม่มี/AI ตอบไม่ได้)
+    # ไม่เรียก st.* ในนี้ (เช็คราคาหลายรายการเรียกจาก worker thread)
+    prod_str = search_pool[['รหัสสินค้า', 'รายละเอียดสินค้า']].to_string(index=True)
+    try:
+        with span("gemini.pick", bytes_out=len(prod_str)):
+            res = ai_model.generate_content(f"หา index สินค้าที่ตรงกับ '{query}' จาก:\n{prod_str}\nตอบแค่ตัวเลข index. ถ้าไม่มี -1")
+        return int(res.text.strip())
+    except: return -1
+def get_search_index(df_main, state=None):
+    # Index ของ Tab 1 สร้างครั้งเดียวต่อตารางหลักชุดนี้ (ไม่ต้อง clean_text ทั้งตารางทุกครั้งที่พิมพ์)
+    # เก็บไว้ใน state กลางคู่กับตารางที่ใช้สร้าง ปกติ thread เบื้องหลังสร้างไว้ให้ก่อนแล้ว
+    state = state if state is not None else get_sync_state()
+    built = state.get("search_index")
+    if built is None or built[0] is not df_main:
+        built = (df_main, SearchIndex.from_frame(df_main))
+        state["search_index"] = built
+    return built[1]
+def get_catalogue(df_main, df_mem=None):
+    # ตัวค้นหาของทั้ง 2 Tab (search.catalogue) ประกอบจาก index/ตารางรวมที่เตรียมไว้แล้ว
+    # Tab 1 ใช้แค่ index ของตารางหลัก (ไม่ส่ง df_mem = ไม่ต้อง merge)
+    if df_mem is None:
+        return Catalogue(df_main, get_search_index(df_main), confidence=FUZZY_CONFIDENCE)
+    df_search, prebuilt = merge_data(df_main, df_mem)
+    # กันเหนียว: ถ้าไม่มีคอลัมน์ AI_Kind ให้สร้างไว้ (assign = ตารางใหม่ ห้ามแก้ตารางกลางที่ทุก session ใช้ร่วมกัน)
+    if 'AI_Kind' not in df_search.columns:
+        df_search = df_search.assign(AI_Kind='')
+    return Catalogue(df_main, get_search_index(df_main), df_search, prebuilt, confidence=FUZZY_CONFIDENCE)
+def current_price_rules():
+    # กฎตั้งราคาของ session นี้ (ยังไม่แก้ = ค่าจาก secrets)
+    return st.session_state.get("price_rules", DEFAULT_PRICE_RULES)
+
+def get_price_list(df_main, df_mem, rules=None):
+    # ตารางราคาขายทั้งร้าน (แถวตรงกับ df_main) คำนวณครั้งเดียวต่อ (ข้อมูลชุดนี้, รุ่นของกฎ)
+    # ใช้ตารางรวมความจำ AI เพราะกฎตามประเภทสินค้าอ่านจาก AI_Type
+    df_search, _ = merge_data(df_main, df_mem)
+    return get_sync_state()["price_lists"].get(df_search, rules or current_price_rules())
 # ---------------------------------------------------------
 # 6. MAIN APP UI (TABS)
 # ---------------------------------------------------------
@@ -488,16 +614,22 @@ if df_main.empty or 'รหัสสินค้า' not in df_main.columns:
     # 👆👆👆 โค้ดนักสืบ จบตรงนี้ 👆👆👆
     
     if st.button("🔄 ล้างความจำและโหลดใหม่", type="primary"):
-        st.cache_data.clear() 
+        mark_data_dirty(full=True)
         st.rerun() 
         
     st.stop()
 
 st.title("💰 ระบบเช็คราคาสินค้า & AI")
-st.caption(f"📂 ฐานข้อมูล: {file_name} | 🕒 อัปเดตล่าสุด: {last_update}")
+data_age = data_age_seconds()
+if data_age is None: age_text = "กำลังตรวจสอบกับ Google..."
+elif data_age < 60: age_text = f"{data_age:.0f} วินาทีที่แล้ว"
+else: age_text = f"{data_age / 60:.0f} นาทีที่แล้ว"
+st.caption(f"📂 ฐานข้อมูล: {file_name} | 🕒 อัปเดตล่าสุด: {last_update} | 🔄 ซิงก์ล่าสุด: {age_text}")
+if get_sync_state()["error"]:
+    st.warning(f"⚠️ ซิงก์ข้อมูลล่าสุดไม่สำเร็จ กำลังใช้ข้อมูลชุดเดิม: {get_sync_state()['error']}")
 
 # สร้าง TAB เมนู
-tab1, tab2 = st.tabs(["🏠 เช็คราคารายตัว (Code/Name)", "🤖 ค้นหาอัจฉริยะ (AI Search)"])
+tab1, tab2, tab3, tab4 = st.tabs(["🏠 เช็คราคารายตัว (Code/Name)", "🤖 ค้นหาอัจฉริยะ (AI Search)", "📋 เช็คราคาหลายรายการ", "💲 ราคาขายทั้งร้าน"])
 
 # =========================================================
 # TAB 1: เช็คราคารายตัว
@@ -511,35 +643,25 @@ with tab1:
         match_index = -1
         found_by = ""
         
-        query_clean = clean_text(query1)
-        sku_clean_series = df_main['รหัสสินค้า'].astype(str).apply(clean_text)
-        desc_clean_series = df_main['รายละเอียดสินค้า'].astype(str).apply(clean_text)
-        
-        sku_matches = df_main[sku_clean_series.str.contains(query_clean, na=False)]
-        if not sku_matches.empty:
-            match_index = sku_matches.index[0]
+        hit = get_catalogue(df_main).lookup(query1)
+
+        if hit.kind == 'sku':
+            match_index = df_main.index[hit.pos]
             found_by = "⚡ เจอรหัสสินค้า"
+        elif hit.kind == 'desc':
+            match_index = df_main.index[hit.pos]
+            found_by = "🔎 เจอในรายละเอียด"
+        elif hit.kind == 'fuzzy':
+            # Fuzzy Match ในเครื่อง (พิมพ์ผิด/ตกหล่น) มั่นใจพอแล้วไม่ต้องเสียเวลาถาม AI
+            match_index = df_main.index[hit.pos]
+            found_by = f"🎯 ใกล้เคียงที่สุด ({hit.score:.0%})"
         else:
-            desc_matches = df_main[desc_clean_series.str.contains(query_clean, na=False)]
-            if not desc_matches.empty:
-                match_index = desc_matches.index[0]
-                found_by = "🔎 เจอในรายละเอียด"
-            else:
-                keywords = list(filter(None, re.split(r'[^a-zA-Z0-9]', query1)))
-                if not keywords: keywords = [query1]
-                # แก้เป็นบรรทัดนี้ครับ
-                candidates = df_main[df_main.astype(str).apply(lambda x: any(k.lower() in ' '.join(x).lower() for k in keywords), axis=1)]
-                
-                if candidates.empty: search_pool = df_main.sample(min(len(df_main), 15))
-                else: search_pool = candidates.head(30)
-                
-                prod_str = search_pool[['รหัสสินค้า', 'รายละเอียดสินค้า']].to_string(index=True)
-                with st.spinner('🤖 AI กำลังช่วยแกะลายแทง...'):
-                    try:
-                        res = ai_model.generate_content(f"หา index สินค้าที่ตรงกับ '{query1}' จาก:\n{prod_str}\nตอบแค่ตัวเลข index. ถ้าไม่มี -1")
-                        match_index = int(res.text.strip())
-                        found_by = "🤖 AI ค้นพบ"
-                    except: match_index = -1
+            if hit.pool: search_pool = df_main.iloc[hit.pool]
+            else: search_pool = df_main.sample(min(len(df_main), 15))
+
+            with st.spinner('🤖 AI กำลังช่วยแกะลายแทง...'):
+                match_index = ask_gemini_pick(query1, search_pool)
+                if match_index != -1: found_by = "🤖 AI ค้นพบ"
 
         if match_index != -1 and match_index in df_main.index:
             item = df_main.loc[match_index]
@@ -551,9 +673,16 @@ with tab1:
 
             st.success(f"{found_by}: {name}")
             
-            target_margin = 12
-            sell_price = cost * (1 + (target_margin/100))
+            # ราคาขายตามกฎของยี่ห้อ/ประเภท (คำนวณไว้แล้วทั้งร้าน ดึงแค่แถวนี้)
+            price_list = get_price_list(df_main, df_mem)
+            item_pos = df_main.index.get_loc(match_index)
+            target_margin = price_list.table['กำไร %'].iat[item_pos]
+            sell_price = price_list.table['ราคาขาย'].iat[item_pos]
             profit = sell_price - cost
+            # ถ้าตั้งกฎปัดราคาไว้ ราคาขายจะไม่ตรง % พอดี: โชว์ % ที่บวกจริงด้วย
+            markup_text = f"+{target_margin:g}%"
+            if price_list.rules.rounding and cost > 0:
+                markup_text += f" ปัดแล้ว +{(sell_price / cost - 1) * 100:.1f}%"
 
             # -------------------------------------------------------
             # ✨ [แก้ไขใหม่] แบ่งเป็น 3 คอลัมน์เท่ากัน (ทุน | ขาย | สต้อก)
@@ -571,7 +700,7 @@ with tab1:
             with c2:
                 st.markdown(f"""
                 <div class="selling-box">
-                    <div style="color:#555;font-weight:bold;">🟢 ราคาขาย (+{target_margin}%)</div>
+                    <div style="color:#555;font-weight:bold;">🟢 ราคาขาย ({markup_text})</div>
                     <div class="price-value-sell">{sell_price:,.0f}</div>
                     <div style="font-size:12px; color:#2e7d32;">(กำไร {profit:,.0f} บ.)</div>
                 </div>
@@ -614,10 +743,17 @@ with tab1:
             # ... (หลังจากนี้เป็นเส้นกั้น st.divider() และตาราง Margin เหมือนเดิม) ...
 
             st.divider()
-            with st.expander("ดูตาราง Margin (3% - 30%)", expanded=True):
-                margins = [3, 5, 8, 10, 12, 15, 18, 25, 30]
-                p_data = [{"กำไร %": f"{m}%", "ราคาขาย": f"{cost*(1+m/100):,.0f}", "กำไร (บาท)": f"{(cost*(1+m/100))-cost:,.0f}"} for m in margins]
-                st.dataframe(pd.DataFrame(p_data), hide_index=True, use_container_width=True)
+            margins = price_list.rules.margins
+            with st.expander(f"ดูตาราง Margin ({min(margins):g}% - {max(margins):g}%)", expanded=True):
+                st.dataframe(
+                    price_list.margin_table(item_pos),
+                    column_config={
+                        "กำไร %": st.column_config.NumberColumn(format="%g%%"),
+                        "ราคาขาย": st.column_config.NumberColumn(format="%.0f"),
+                        "กำไร (บาท)": st.column_config.NumberColumn(format="%.0f"),
+                    },
+                    hide_index=True, use_container_width=True
+                )
 
             st.divider()
             st.subheader("🛒 เช็คราคาคู่แข่ง (Hot Search)")
@@ -711,6 +847,9 @@ with tab2:
     
     # คำนวณสินค้าใหม่
     processed_skus = df_mem['SKU'].astype(str).str.strip().tolist() if not df_mem.empty else []
+    # แถวที่สอนแล้วแต่ยังรอเขียนลงชีต (อยู่ในบัฟเฟอร์/journal) ไม่ต้องสอนซ้ำ
+    memory_writer = get_memory_writer()
+    processed_skus += memory_writer.pending_skus()
     new_items_df = df_main[~df_main['รหัสสินค้า'].astype(str).str.strip().isin(processed_skus)]
     new_count = len(new_items_df)
     
@@ -718,6 +857,16 @@ with tab2:
     with st.expander(f"⚙️ จัดการสมอง AI ({len(df_mem)} รายการเรียนรู้แล้ว)"):
         c_a1, c_a2 = st.columns([3, 1])
         c_a1.write(f"สินค้าใหม่ที่ AI ยังไม่รู้จัก: **{new_count}** รายการ")
+
+        # แถวที่บันทึกลงชีตไม่ได้ด้วย error ถาวร (ย้ายไป dead-letter แล้ว ไม่ขวางแถวอื่น)
+        dead_rows = memory_writer.dead_rows()
+        if dead_rows:
+            st.error(f"❌ บันทึกลง AI_Memory ไม่ได้ {len(dead_rows)} รายการ: {memory_writer.dead_error or memory_writer.last_error or 'ดูไฟล์ ' + memory_writer.dead_path}")
+            c_d1, c_d2 = st.columns([3, 1])
+            c_d1.caption(f"ตัวอย่าง SKU: {', '.join(str(r[0]) for r in dead_rows[:10] if r)} (แก้ต้นเหตุ เช่น ชีต AI_Memory หาย แล้วกดส่งใหม่)")
+            if c_d2.button("🔁 ส่งใหม่", key="retry_dead"):
+                memory_writer.retry_dead()
+                st.rerun()
         
         # ปุ่มสอน AI
         # ปุ่มสอน AI
@@ -733,49 +882,29 @@ with tab2:
                         columns={'รหัสสินค้า':'SKU', 'รายละเอียดสินค้า':'Name', 'ชนิด':'Original_Kind'}
                     ).to_dict('records')
 
-                    # ✅ สูตรเสถียร: Batch 10
-                    BATCH = 10
-                    total_batches = (len(to_proc) // BATCH) + 1
-                    
-                    # 2. เริ่มวนลูป
-                    for i in range(0, len(to_proc), BATCH):
-                        chunk = to_proc[i:i+BATCH]
-                        status.write(f"⏳ กำลังประมวลผล Batch {(i//BATCH)+1}/{total_batches} ({len(chunk)} รายการ)...")
-                        
-                        # รวมชื่อส่ง AI
-                        names_for_ai = [f"{x['Name']} {x['Original_Kind']}" for x in chunk]
-                        
-                        # เรียก AI (ตัว Retry 3 รอบ)
-                        ai_res = ask_gemini_extract(names_for_ai)
-                        
-                        # เตรียมข้อมูล (บังคับ String)
-                        res_save = []
-                        for idx, item in enumerate(chunk):
-                            ar = ai_res[idx] if idx < len(ai_res) else {}
-                            res_save.append([
-                                str(item['SKU']).strip(),
-                                str(ar.get('AI_Brand','Unknown')),
-                                str(ar.get('AI_Type','Other')),
-                                str(ar.get('AI_Spec','-')),
-                                str(ar.get('AI_Tags','')),
-                                str(ar.get('AI_Kind',''))
-                            ])
-                        
-                        # 3. บันทึกและล้าง Cache ทันที
-                        if res_save:
-                            try:
-                                result = append_to_sheet(res_save)
-                                if result:
-                                    status.write(f"✅ บันทึก Batch {(i//BATCH)+1} สำเร็จ!")
-                                    st.cache_data.clear() # ล้างความจำทันทีที่บันทึกได้
-                                else:
-                                    status.error("❌ บันทึกไม่สำเร็จ (Google Sheet Error)")
-                                    time.sleep(5) # พักยาวหน่อยถ้า Error
-                            except Exception as e:
-                                status.error(f"❌ Error: {e}")
-                        
-                        # ✅ พัก 3 วินาที (สูตรเสถียร)
-                        time.sleep(3)
+                    # ✅ เริ่มที่ Batch 10 แล้วปรับขนาดเองตามผล ยิงพร้อมกันหลาย Batch (คุมอัตราด้วย Token Bucket แทนการพัก 3 วิ)
+                    batcher = AdaptiveBatcher(size=10, max_size=TEACH_MAX_BATCH)
+                    total_items = len(to_proc)
+                    limiter = TokenBucket(rate=TEACH_RPM / 60, capacity=TEACH_WORKERS)
+                    started = time.time()
+
+                    def show_progress(done_items):
+                        # เรียกใน thread ของ script (ผลลัพธ์มาตามลำดับที่ AI ตอบเสร็จ)
+                        speed = done_items / max(time.time() - started, 1e-6)
+                        status.update(label=f"🤖 AI กำลังทำงาน... {done_items}/{total_items} รายการ ({speed:.2f} รายการ/วิ, Batch {batcher.size}, รอบันทึก {memory_writer.pending})")
+
+                    # 2. แกะข้อมูล (worker หลายตัว) แล้วส่งเข้าบัฟเฟอร์ (จดลงดิสก์ก่อน แล้ว writer รวมเป็นก้อนใหญ่ไปบันทึกเบื้องหลัง)
+                    # แคชดึงใน thread ของ script ครั้งเดียว แล้วส่งต่อให้ worker (worker ไม่มี ScriptRunContext)
+                    teach_items(to_proc, ai_model, memory_writer, batcher, workers=TEACH_WORKERS, limiter=limiter,
+                                cache=get_extract_cache(), generation_config=EXTRACT_CONFIG, progress=show_progress)
+
+                    status.write("💾 กำลังบันทึกรายการที่เหลือลงชีต...")
+                    if memory_writer.drain(timeout=120):
+                        status.write(f"✅ บันทึกลงชีตแล้ว (รวม {memory_writer.written} รายการตั้งแต่เปิดแอป)")
+                    else:
+                        status.warning(f"⚠️ ยังมี {memory_writer.pending} รายการรอบันทึก (เก็บไว้ในเครื่องแล้ว ระบบจะบันทึกต่อให้เอง): {memory_writer.last_error}")
+                    if memory_writer.dead_error is not None:
+                        status.warning(f"⚠️ บางรายการบันทึกไม่ได้ (error ถาวร): {memory_writer.dead_error}")
 
                     # 4. จบการทำงาน (อยู่นอกลูป)
                     status.update(label="🎉 เสร็จสิ้นภารกิจ!", state="complete")
@@ -783,7 +912,7 @@ with tab2:
                     time.sleep(2)
                     st.rerun()
         else:
-            c_a2.button("🔄 รีโหลด", on_click=lambda: st.cache_data.clear())
+            c_a2.button("🔄 รีโหลด", on_click=lambda: mark_data_dirty(full=True))
 
         st.divider()
         st.write("🔧 **เครื่องมือดูแลรักษาฐานข้อมูล**")
@@ -791,24 +920,23 @@ with tab2:
         # ปุ่มล้างขยะ (ใส่ key กันซ้ำ และจัดย่อหน้าให้ตรง)
         if st.button("🧹 ล้างข้อมูลขยะ (ลบ AI ที่ไม่มีสินค้าจริง)", type="secondary", key="btn_cleanup_final"):
             with st.status("กำลังตรวจสอบความสะอาด...", expanded=True) as status:
+                # รอให้แถวที่ค้างในบัฟเฟอร์ลงชีตก่อน (จะได้ตรวจตัวซ้ำครบทุกแถว)
+                memory_writer.drain(timeout=60)
                 valid_skus = df_main['รหัสสินค้า'].astype(str).str.strip().str.upper().unique()
-                df_mem['check_key'] = df_mem['SKU'].astype(str).str.strip().str.upper()
-                
-                # กรองเอาเฉพาะที่มีใน Main
-                df_mem_clean = df_mem[df_mem['check_key'].isin(valid_skus)].copy()
-                # ลบตัวซ้ำ
-                df_mem_clean = df_mem_clean.drop_duplicates(subset=['check_key'], keep='last')
-                
-                del df_mem_clean['check_key']
-                
-                deleted_count = len(df_mem) - len(df_mem_clean)
-                
+                try:
+                    sheet_id, bad_rows = plan_memory_cleanup(valid_skus)
+                except Exception as e:
+                    st.error(f"Cleanup Error: {e}")
+                    sheet_id, bad_rows = None, []
+
+                deleted_count = len(bad_rows)
+
                 if deleted_count > 0:
                     status.write(f"🗑️ พบข้อมูลขยะ/ตัวซ้ำ {deleted_count} รายการ... กำลังลบ")
-                    success = overwrite_memory_sheet(df_mem_clean)
+                    success = delete_memory_rows(sheet_id, bad_rows)
                     if success:
                         status.update(label="✅ ลบเสร็จสิ้น!", state="complete")
-                        st.cache_data.clear()
+                        mark_data_dirty(full=True)
                         time.sleep(2)
                         st.rerun()
                 else:
@@ -822,11 +950,8 @@ with tab2:
     # -------------------------------------------------------------
     
     # 1. โหลดข้อมูล (เคลียร์ Cache ถ้ารู้สึกว่าข้อมูลไม่อัปเดต)
-    df_search = merge_data(df_main, df_mem)
-    
-    # กันเหนียว: ถ้าไม่มีคอลัมน์ AI_Kind ให้สร้างไว้ (แต่ถ้า Cache ค้าง มันจะเป็นค่าว่างนะ)
-    if 'AI_Kind' not in df_search.columns:
-        df_search['AI_Kind'] = ''
+    catalogue = get_catalogue(df_main, df_mem)
+    df_search = catalogue.merged
 
     col_q1, col_q2 = st.columns([4, 1])
     query2 = col_q1.text_input("พิมพ์คำค้นหาแบบธรรมชาติ", placeholder="เช่น ตู้เย็น 2 ประตู ราคาไม่เกิน 8000", key="search_tab2")
@@ -845,99 +970,18 @@ with tab2:
                 
                 try:
                     cols_ai = ['AI_Brand', 'AI_Type', 'AI_Spec', 'AI_Tags', 'ราคาทุนต่อหน่วย', 'AI_Kind']
-                    result_json = ask_gemini_filter(query2, cols_ai, df_lookup=df_search)
+                    result_json = ask_gemini_filter(query2, cols_ai, context_str=catalogue.context)
                     
                     # ถ้าได้ JSON กลับมา ให้เริ่มการกรอง
                     if result_json and 'filters' in result_json:
-                        filters = result_json['filters']
                         sort_order = result_json.get('sort_order')
                         
-                        # กำหนดคอลัมน์ที่จะค้นหาข้อความ
-                        text_search_cols = ['AI_Type', 'AI_Kind', 'AI_Tags', 'AI_Brand', 'รายละเอียดสินค้า', 'AI_Spec']
-                        
-                        from collections import defaultdict
-                        grouped_filters = defaultdict(list)
-                        for f in filters: grouped_filters[f['column']].append(f)
-
-                        # --- ฟังก์ชันช่วย (Inner Functions) ---
-                        def extract_numbers_universal(text):
-                            try:
-                                clean_text = str(text).replace(',', '')
-                                nums = re.findall(r'(\d+\.?\d*)', clean_text)
-                                if not nums: return []
-                                return [float(n) for n in nums if n and n != '.']
-                            except: return []
-
-                        def validate_row(extracted_val, conditions):
-                            if isinstance(extracted_val, list):
-                                for num in extracted_val:
-                                    pass_all = True
-                                    for cond in conditions:
-                                        op = cond['operator']
-                                        limit = float(str(cond['value']).replace(',',''))
-                                        if op == 'gt' and not (num > limit): pass_all = False; break
-                                        if op == 'gte' and not (num >= limit): pass_all = False; break
-                                        if op == 'lt' and not (num < limit): pass_all = False; break
-                                        if op == 'lte' and not (num <= limit): pass_all = False; break
-                                    if pass_all: return True
-                                return False
-                            else:
-                                num = extracted_val
-                                for cond in conditions:
-                                    op = cond['operator']
-                                    limit = float(str(cond['value']).replace(',',''))
-                                    if op == 'gt' and not (num > limit): return False
-                                    if op == 'gte' and not (num >= limit): return False
-                                    if op == 'lt' and not (num < limit): return False
-                                    if op == 'lte' and not (num <= limit): return False
-                                return True
-
-                       # --- เริ่มวางตรงนี้ (ต่อจาก return True ของ validate_row) ---
-
-                        # --- เริ่มวนลูปกรอง (Logic ใหม่: แยก Range=AND, Text=OR) ---
-                        for col_ai_suggested, conditions in grouped_filters.items():
-                            if col_ai_suggested not in df_search.columns: continue
-
-                            # 1. แยกประเภทเงื่อนไข
-                            numeric_conds = [f for f in conditions if f['operator'] in ['gt', 'gte', 'lt', 'lte']]
-                            choice_conds = [f for f in conditions if f['operator'] not in ['gt', 'gte', 'lt', 'lte']]
-                            
-                            vals_log = [] 
-
-                            # A. กรองตัวเลขช่วง (AND)
-                            range_mask = pd.Series([True] * len(df_search))
-                            if numeric_conds:
-                                if col_ai_suggested == 'AI_Spec':
-                                     vals = df_search[col_ai_suggested].apply(extract_numbers_universal)
-                                else:
-                                     vals = df_search[col_ai_suggested].apply(lambda x: extract_numbers_universal(x))
-                                range_mask = vals.apply(lambda x: validate_row(x, numeric_conds))
-
-                            # B. กรองข้อความ/ยี่ห้อ (OR)
-                            choice_mask = pd.Series([True] * len(df_search))
-                            if choice_conds:
-                                choice_mask = pd.Series([False] * len(df_search))
-                                for f in choice_conds:
-                                    t_val = str(f['value']).lower().strip().replace(" ", "")
-                                    found_any = pd.Series([False] * len(df_search))
-                                    for sc in text_search_cols:
-                                        if sc in df_search.columns:
-                                            d_clean = df_search[sc].fillna('').astype(str).str.lower().str.replace(" ", "")
-                                            found_any |= d_clean.str.contains(t_val, na=False)
-                                    choice_mask |= found_any
-                                    vals_log.append(f"{t_val}")
-
-                            # รวมผลลัพธ์สุดท้าย
-                            final_mask &= (range_mask & choice_mask)
-                            
-                            if numeric_conds: active_conds.append(f"Range({col_ai_suggested})")
-                            if choice_conds:  active_conds.append(f"Text({','.join(vals_log)})")
-                        
-                        # --- จบการวางตรงนี้ (บรรทัดต่อไปต้องเป็น else:) ---
+                        # แปลง filters ครั้งเดียว แล้วกรองทั้งคอลัมน์ด้วย numpy/pandas (ไม่วนทีละแถว)
+                        final_mask, active_conds = catalogue.filter(result_json)
 
                     else:
                         # กรณี AI ไม่ตอบ JSON (Fallback) -> หาแบบธรรมดา
-                        final_mask = df_search.astype(str).apply(lambda x: x.str.contains(query2, case=False)).any(axis=1)
+                        final_mask = catalogue.keyword_mask(query2)
                         active_conds.append("Keyword Search (Fallback)")
 
                 except Exception as e:
@@ -964,3 +1008,150 @@ with tab2:
                         },
                         use_container_width=True, hide_index=True
                     )
+
+    # สถิติแคชคำค้น (ใช้ร่วมกันทุกคน): hit = ไม่ต้องถาม AI
+    plan_cache = get_plan_cache()
+    st.caption(f"🧠 แคชคำค้น AI: ใช้ซ้ำ {plan_cache.hits} ครั้ง | ถาม AI ใหม่ {plan_cache.misses} ครั้ง | จำไว้ {len(plan_cache)} คำค้น")
+
+# =========================================================
+# TAB 3: เช็คราคาหลายรายการ (ใบเสนอราคา)
+# =========================================================
+with tab3:
+    st.info("💡 เหมาะสำหรับ: ทำใบเสนอราคา วางรหัสสินค้าหลายตัว (บรรทัดละตัว หรือคั่นด้วย , ) หรืออัปโหลดไฟล์ CSV")
+
+    batch_text = st.text_area("วางรายการรหัสสินค้า / ชื่อรุ่น", height=180, placeholder="เช่น\nRT20\nAR13TYHYEWKNST\nparsr5lae", key="batch_text")
+    batch_file = st.file_uploader("หรืออัปโหลดไฟล์ CSV (ใช้คอลัมน์รหัสสินค้า ถ้าไม่มีใช้คอลัมน์แรก)", type=["csv"], key="batch_file")
+    c_b2, c_b3 = st.columns([4, 1])
+    batch_use_ai = c_b2.checkbox(f"ให้ AI ช่วยหาตัวที่ไม่เจอ (สูงสุด {BATCH_AI_ITEMS} รายการ)", value=True, key="batch_use_ai")
+
+    if c_b3.button("เช็คราคา", type="primary", key="batch_go"):
+        codes = parse_codes(batch_text)
+        if batch_file is not None:
+            try:
+                codes = list(dict.fromkeys(codes + codes_from_frame(pd.read_csv(batch_file, dtype=str))))
+            except Exception as e:
+                st.error(f"อ่านไฟล์ไม่ได้: {e}")
+        if len(codes) > BATCH_MAX_ITEMS:
+            st.warning(f"⚠️ รายการเยอะเกิน ใช้แค่ {BATCH_MAX_ITEMS} รายการแรก")
+            codes = codes[:BATCH_MAX_ITEMS]
+
+        if not codes:
+            st.warning("กรุณาวางรายการรหัสสินค้า หรืออัปโหลดไฟล์")
+        else:
+            # 1. หาทั้งชุดทีเดียว (รหัสตรงเป๊ะหาด้วย dict ทั้งก้อน ที่เหลือค่อยไล่ prefix/fuzzy)
+            hits = get_catalogue(df_main).lookup_many(codes)
+            positions = [h.pos for h in hits]
+            labels = {'sku': "⚡ รหัสสินค้า", 'desc': "🔎 รายละเอียด"}
+            found_by = [f"🎯 ใกล้เคียง ({h.score:.0%})" if h.kind == 'fuzzy' else labels.get(h.kind, "❌ ไม่พบ") for h in hits]
+
+            # 2. ตัวที่ยังไม่เจอ ส่ง Gemini ช่วยเลือกพร้อมกันหลายตัว (คุมอัตราด้วย Token Bucket เหมือนสอน AI)
+            leftovers = [i for i, h in enumerate(hits) if h.pos == -1]
+            if batch_use_ai and leftovers:
+                todo = leftovers[:BATCH_AI_ITEMS]
+
+                def pick_one(i):
+                    pool = df_main.iloc[hits[i].pool] if hits[i].pool else df_main.sample(min(len(df_main), 15))
+                    return ask_gemini_pick(codes[i], pool)
+
+                limiter = TokenBucket(rate=TEACH_RPM / 60, capacity=TEACH_WORKERS)
+                with st.spinner(f"🤖 AI กำลังช่วยหา {len(todo)} รายการที่ไม่เจอ..."):
+                    for i, label in run_pipeline(todo, pick_one, workers=TEACH_WORKERS, limiter=limiter):
+                        pos = df_main.index.get_indexer([label])[0] if label != -1 else -1
+                        if pos != -1:
+                            positions[i] = int(pos)
+                            found_by[i] = "🤖 AI ค้นพบ"
+
+            # 3. ตารางราคา (ดึงแถว + ราคาขายตามกฎที่คำนวณไว้แล้วทั้งร้าน)
+            # เก็บไว้ใน session (กดดาวน์โหลดแล้วหน้ารีรันตารางไม่หาย)
+            st.session_state["batch_quote"] = quote_table(df_main, codes, positions, found_by, get_price_list(df_main, df_mem))
+
+    quote = st.session_state.get("batch_quote")
+    if quote is not None:
+        found_count = int((quote['ผลค้นหา'] != "❌ ไม่พบ").sum())
+        st.success(f"✅ พบ {found_count}/{len(quote)} รายการ | รวมทุน {quote['ราคาทุนต่อหน่วย'].sum():,.0f} บ. | รวมราคาขาย {quote['ราคาขาย'].sum():,.0f} บ.")
+        st.dataframe(
+            quote,
+            column_config={
+                "ราคาทุนต่อหน่วย": st.column_config.NumberColumn("ราคาทุน", format="%.0f"),
+                "ราคาขาย": st.column_config.NumberColumn(format="%.0f"),
+                "กำไร (บาท)": st.column_config.NumberColumn(format="%.0f"),
+                "จำนวนสต้อก": st.column_config.NumberColumn("สต้อก", format="%d"),
+            },
+            use_container_width=True, hide_index=True
+        )
+        # utf-8-sig ให้ Excel เปิดภาษาไทยได้ถูก
+        st.download_button("⬇️ ดาวน์โหลดตารางราคา (CSV)", quote.to_csv(index=False).encode("utf-8-sig"),
+                           file_name=f"quote_{datetime.now():%Y%m%d_%H%M}.csv", mime="text/csv")
+
+# =========================================================
+# TAB 4: ราคาขายทั้งร้าน (กฎตั้งราคา + ส่งออก)
+# =========================================================
+with tab4:
+    rules = current_price_rules()
+
+    with st.expander("⚙️ กฎตั้งราคา (ใช้กับทุกแท็บใน session นี้)"):
+        st.caption("ลำดับการใช้กฎ: ประเภทสินค้า (AI_Type) -> ยี่ห้อ -> กำไรปกติ | ราคาขายปัดขึ้นตามช่วงราคา (ปัดทีละ 0 = ไม่ปัด)")
+        r_default = st.number_input("กำไรปกติ %", min_value=0.0, max_value=200.0, value=rules.default_margin, step=1.0, key="rule_default")
+        c_r1, c_r2, c_r3 = st.columns(3)
+        r_brand = c_r1.data_editor(
+            pd.DataFrame({"ยี่ห้อ": list(rules.brand), "กำไร %": list(rules.brand.values())}, columns=["ยี่ห้อ", "กำไร %"]),
+            num_rows="dynamic", hide_index=True, use_container_width=True, key="rule_brand"
+        )
+        r_type = c_r2.data_editor(
+            pd.DataFrame({"ประเภท": list(rules.types), "กำไร %": list(rules.types.values())}, columns=["ประเภท", "กำไร %"]),
+            num_rows="dynamic", hide_index=True, use_container_width=True, key="rule_type"
+        )
+        r_round = c_r3.data_editor(
+            pd.DataFrame({"ราคาต่ำกว่า": [lim for lim, _ in rules.rounding], "ปัดขึ้นทีละ": [step for _, step in rules.rounding]}),
+            num_rows="dynamic", hide_index=True, use_container_width=True, key="rule_round"
+        )
+        c_r4, c_r5 = st.columns(2)
+        if c_r4.button("✅ ใช้กฎนี้", type="primary"):
+            def _pairs(df, key_col):
+                df = df.dropna(subset=[key_col, "กำไร %"])
+                return dict(zip(df[key_col].astype(str), df["กำไร %"].astype(float)))
+            r_round = r_round.dropna(subset=["ปัดขึ้นทีละ"])
+            try:
+                new_rules = PriceRules(
+                    default_margin=r_default,
+                    brand=_pairs(r_brand, "ยี่ห้อ"), types=_pairs(r_type, "ประเภท"),
+                    rounding=[(None if pd.isna(lim) else lim, step) for lim, step in zip(r_round["ราคาต่ำกว่า"], r_round["ปัดขึ้นทีละ"])],
+                    margins=rules.margins,
+                )
+            except ValueError as e:
+                # เช่น "ราคาต่ำกว่า" = 0 (ช่วงไม่จำกัดให้เว้นว่างไว้)
+                st.error(f"กฎปัดราคาไม่ถูกต้อง: {e}")
+            else:
+                st.session_state["price_rules"] = new_rules
+                st.rerun()
+        if c_r5.button("↩️ คืนค่าเริ่มต้น"):
+            st.session_state.pop("price_rules", None)
+            st.rerun()
+
+    # ตารางราคาทั้งร้านคำนวณครั้งเดียวต่อกฎ 1 ชุด กรอง/ส่งออกได้ทันที
+    price_list = get_price_list(df_main, df_mem, rules)
+    table = price_list.table
+
+    c_p1, c_p2, c_p3 = st.columns([1, 1, 2])
+    low = c_p1.number_input("ราคาขายตั้งแต่", min_value=0.0, value=0.0, step=100.0, key="price_low")
+    high = c_p2.number_input("ถึง (0 = ไม่จำกัด)", min_value=0.0, value=0.0, step=100.0, key="price_high")
+    brands = sorted(table['ยี่ห้อ'].dropna().astype(str).unique()) if 'ยี่ห้อ' in table.columns else []
+    picked_brands = c_p3.multiselect("ยี่ห้อ", brands, key="price_brands")
+
+    mask = price_list.between(low or None, high or None)
+    if picked_brands: mask &= table['ยี่ห้อ'].astype(str).isin(picked_brands).to_numpy()
+    shown = table[mask]
+
+    st.caption(f"💲 {len(shown):,}/{len(table):,} รายการ | กฎรุ่น {price_list.version[:8]}")
+    st.dataframe(
+        shown,
+        column_config={
+            "ราคาทุนต่อหน่วย": st.column_config.NumberColumn("ราคาทุน", format="%.0f"),
+            "กำไร %": st.column_config.NumberColumn(format="%g"),
+            "ราคาขาย": st.column_config.NumberColumn(format="%.0f"),
+            "กำไร (บาท)": st.column_config.NumberColumn(format="%.0f"),
+        },
+        use_container_width=True, hide_index=True
+    )
+    st.download_button("⬇️ ดาวน์โหลดรายการราคา (CSV)", shown.to_csv(index=False).encode("utf-8-sig"),
+                       file_name=f"price_list_{datetime.now():%Y%m%d_%H%M}.csv", mime="text/csv")
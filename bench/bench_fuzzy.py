@@ -0,0 +1,55 @@
+# ---------------------------------------------------------
+# Benchmark: Fuzzy Match ของ Tab 1 (hit rate + latency)
+# วิธีรัน (จากโฟลเดอร์โปรเจกต์):  python -m bench.bench_fuzzy --rows 30000 --queries 500
+# ---------------------------------------------------------
+import argparse
+import random
+import statistics
+import time
+
+from bench.fixtures import make_catalogue, typo
+from search import SearchIndex
+from search.fuzzy import DEFAULT_CONFIDENCE
+
+
+def run(rows, queries, threshold, seed=0):
+    df = make_catalogue(rows, seed=seed)
+    t0 = time.perf_counter()
+    index = SearchIndex.from_frame(df)
+    build_s = time.perf_counter() - t0
+
+    rng = random.Random(seed + 1)
+    skus = df["รหัสสินค้า"].tolist()
+    latencies = []
+    top1 = confident = confident_ok = 0
+    for _ in range(queries):
+        pos = rng.randrange(len(skus))
+        q = typo(skus[pos], rng)
+        t = time.perf_counter()
+        best_pos, score = index.fuzzy.best(q)
+        latencies.append((time.perf_counter() - t) * 1000)
+        # ถือว่าถูกถ้าได้แถวที่รหัส (หลัง clean) เหมือนกับตัวที่ตั้งใจหา
+        ok = best_pos != -1 and index.sku_clean[best_pos] == index.sku_clean[pos]
+        top1 += ok
+        if score >= threshold:
+            confident += 1
+            confident_ok += ok
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"catalogue: {rows:,} rows | index build: {build_s:.2f} s")
+    print(f"queries: {queries} (typo 1 ตัวอักษร)")
+    print(f"top-1 hit rate: {top1 / queries:.1%}")
+    print(f"ตอบเองได้ (>= {threshold:.2f}): {confident / queries:.1%} | ถูกต้อง {confident_ok / max(confident, 1):.1%}")
+    print(f"ส่งต่อให้ Gemini: {(queries - confident) / queries:.1%}")
+    print(f"latency ms: p50 {statistics.median(latencies):.2f} | p95 {p95:.2f} | max {latencies[-1]:.2f}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=30000)
+    ap.add_argument("--queries", type=int, default=500)
+    ap.add_argument("--threshold", type=float, default=DEFAULT_CONFIDENCE)
+    ap.add_argument("--seed", type=int, default=0)
+    a = ap.parse_args()
+    run(a.rows, a.queries, a.threshold, a.seed)
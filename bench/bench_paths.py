@@ -0,0 +1,190 @@
+# ---------------------------------------------------------
+# Benchmark: เส้นทางหลักของแอป แบบไม่ต่อ Google/Gemini จริง (ใช้ของปลอมใน bench.fakes)
+# - load   : sync.refresh_data ตัวเดียวกับแอป (Drive metadata + batchGet A:H + AI_Memory + แปลงเป็นตาราง)
+#            โหลดเต็ม 1 รอบ แล้วดึงแค่หาง AI_Memory หลังต่อท้าย 100 แถว (แบบหลังสอน AI)
+# - merge  : MergedCatalogue สร้างใหม่ทั้งก้อน + เติมความจำ AI ที่ต่อท้าย
+# - lookup : Tab 1 (Catalogue.lookup: รหัสตรง / prefix / คีย์เวิร์ด / fuzzy -> ถาม Gemini ถ้าไม่มั่นใจ)
+# - filter : Tab 2 (Catalogue.filter กับของที่เตรียมไว้ตอน merge)
+# - pricing: ราคาขายทั้งร้านตามกฎยี่ห้อ/ประเภท (PriceList ใหม่ทุกรอบ ไม่ใช้แคช) + กรองช่วงราคาขาย
+# - teach  : สอน AI (teach_items: run_pipeline + extract_names + AdaptiveBatcher + TokenBucket + MemoryWriter)
+# วิธีรัน (จากโฟลเดอร์โปรเจกต์):
+#   python -m bench.bench_paths --sizes 1000,10000,50000,200000
+#   python -m bench.bench_paths --sizes 30000 --scenarios lookup,filter --no-memory
+# ---------------------------------------------------------
+import argparse
+import contextlib
+import io
+import random
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from bench.fakes import FakeDrive, FakeModel, FakeSheets
+from bench.fixtures import BRANDS, TYPES, make_catalogue, make_memory, sheet_values, typo
+from search import Catalogue, MergedCatalogue, PriceList, PriceRules, SearchIndex
+from search.frames import frame_main, frame_memory
+from sync import new_sync_state, refresh_data
+from teach import AdaptiveBatcher, MemoryWriter, TokenBucket, teach_items
+
+SCENARIOS = ["load", "merge", "lookup", "filter", "pricing", "teach"]
+
+# แผนค้นหาตัวอย่างของ Tab 2 (แบบที่ Gemini ตอบกลับมา)
+PLANS = [
+    [{"column": "AI_Brand", "operator": "contains", "value": "SAMSUNG"}],
+    [{"column": "AI_Type", "operator": "contains", "value": "ตู้เย็น"},
+     {"column": "ราคาทุนต่อหน่วย", "operator": "lte", "value": "15,000"}],
+    [{"column": "AI_Spec", "operator": "gte", "value": "9000"}, {"column": "AI_Spec", "operator": "lte", "value": "12000"},
+     {"column": "AI_Brand", "operator": "in", "value": ["LG", "DAIKIN"]}],
+    [{"column": "รายละเอียดสินค้า", "operator": "contains", "value": "inverter"}],
+]
+
+
+class Env:
+    # ข้อมูลจำลอง 1 ชุดต่อขนาดแคตตาล็อก (สร้างครั้งเดียว ใช้ทุกฉาก)
+    def __init__(self, rows, args):
+        self.rows = rows
+        self.args = args
+        self.df = make_catalogue(rows, seed=args.seed)
+        self.main_values = sheet_values(self.df)
+        self.memory_values = make_memory(self.df, seed=args.seed)
+        self.df_main, self.df_mem = frame_main(self.main_values), frame_memory(self.memory_values)[0]
+        self.merged, self.prebuilt = MergedCatalogue().sync(self.df_main, self.df_mem)
+        self.index = SearchIndex.from_frame(self.df_main)
+        self.catalogue = Catalogue(self.df_main, self.index, self.merged, self.prebuilt)
+
+    def sheets(self):
+        return FakeSheets(self.main_values, [list(r) for r in self.memory_values],
+                          latency=self.args.latency, fail_rate=self.args.fail_rate, seed=self.args.seed)
+
+    def model(self):
+        return FakeModel(latency=self.args.ai_latency, fail_rate=self.args.ai_fail_rate,
+                         drop_rate=self.args.ai_drop_rate, seed=self.args.seed)
+
+
+def scenario_load(env):
+    sheets, drive = env.sheets(), FakeDrive(latency=env.args.latency)
+    state = new_sync_state()
+    refresh_data(state, sheets, drive, "x")
+    # แอปต่อท้าย AI_Memory เอง (mark_data_dirty(mem_appended=True)) -> ดึงแค่แถวใหม่
+    sheets.tabs["AI_Memory"].extend([[f"NEW{i}", "NEW", "NEW", "-", "", ""] for i in range(100)])
+    state.update(force=True, mem_appended=True)
+    refresh_data(state, sheets, drive, "x")
+    assert len(state["data"][1]) == len(env.df_mem) + 100
+    return env.rows, "rows"
+
+
+def scenario_merge(env):
+    catalogue = MergedCatalogue()
+    catalogue.sync(env.df_main, env.df_mem)
+    # เติมความจำ AI 100 แถว (หลังสอน AI)
+    extra = env.df_main.iloc[:100][["รหัสสินค้า"]].rename(columns={"รหัสสินค้า": "SKU"})
+    for col in env.df_mem.columns[1:]: extra[col] = "NEW"
+    catalogue.sync(env.df_main, pd.concat([env.df_mem, extra], ignore_index=True))
+    return env.rows, "rows"
+
+
+def scenario_lookup(env):
+    # คำค้นปนกัน: รหัสตรง / พิมพ์แค่ต้นรหัส / พิมพ์ผิด / คำในรายละเอียด
+    rng = random.Random(env.args.seed + 1)
+    skus = env.df["รหัสสินค้า"].tolist()
+    model = env.model()
+    asked = 0
+    for i in range(env.args.queries):
+        sku = rng.choice(skus)
+        query = [sku, sku[:max(3, len(sku) - 2)], typo(sku, rng), rng.choice(["inverter", "oled", "ฝาหน้า"])][i % 4]
+        if env.catalogue.lookup(query).kind: continue
+        asked += 1
+        model.generate_content(f"หา index สินค้าที่ตรงกับ '{query}'")
+    env.notes.append(f"lookup ส่ง Gemini {asked}/{env.args.queries}")
+    return env.args.queries, "queries"
+
+
+def scenario_filter(env):
+    for i in range(env.args.queries):
+        env.catalogue.filter(PLANS[i % len(PLANS)])
+    return env.args.queries, "queries"
+
+
+def scenario_pricing(env):
+    rules = PriceRules(brand={en: 8 + i for i, (en, _) in enumerate(BRANDS)},
+                       types={t[0]: 15 for t in TYPES[::2]})
+    price_list = PriceList(env.merged, rules)
+    for low in range(0, 50000, 5000):
+        price_list.between(low, low + 5000)
+    return env.rows, "rows"
+
+
+def scenario_teach(env):
+    # teach_items ตัวเดียวกับปุ่มสอน AI (extract_names ลองใหม่เฉพาะตัวที่ขาด) แต่ไม่มีแคช + ไม่พักระหว่างรอบ
+    model = env.model()
+    items = env.df.iloc[:env.args.teach_items]
+    todo = [{"SKU": sku, "Name": d, "Original_Kind": k}
+            for sku, d, k in zip(items["รหัสสินค้า"], items["รายละเอียดสินค้า"], items["ชนิด"])]
+    batcher = AdaptiveBatcher(size=10, max_size=50)
+    limiter = TokenBucket(rate=env.args.rpm / 60, capacity=env.args.workers)
+
+    sheets = env.sheets()
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = MemoryWriter(lambda rows: sheets.append(spreadsheetId="x", range="AI_Memory!A:A",
+                                                         valueInputOption="USER_ENTERED", body={"values": rows}).execute(),
+                              f"{tmp}/journal.jsonl", base_delay=0.05, max_delay=0.5)
+        with contextlib.redirect_stdout(io.StringIO()):  # ไม่พิมพ์ "จำนวนไม่ครบ" ทุกก้อนทับตารางผล
+            teach_items(todo, model, writer, batcher, workers=env.args.workers, limiter=limiter, base_delay=0)
+        writer.drain(timeout=60)
+    env.notes.append(f"teach: Gemini {model.calls} ครั้ง, Sheets append {sheets.calls} ครั้ง, Batch สุดท้าย {batcher.size}")
+    return len(todo), "items"
+
+
+def measure(fn, env, memory):
+    t = time.perf_counter()
+    count, unit = fn(env)
+    seconds = time.perf_counter() - t
+    peak = None
+    if memory:
+        # รอบที่สองใต้ tracemalloc (ช้ากว่า เลยไม่เอาเวลามาปน)
+        notes = len(env.notes)
+        tracemalloc.start()
+        fn(env)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del env.notes[notes:]
+    return seconds, count, unit, peak
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="1000,10000,50000,200000")
+    ap.add_argument("--scenarios", default=",".join(SCENARIOS))
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--teach-items", type=int, default=2000)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--rpm", type=float, default=6000)
+    ap.add_argument("--latency", type=float, default=0.05, help="เวลาแฝงต่อคำขอ Google (วินาที)")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="อัตรา 429 ของ Google")
+    ap.add_argument("--ai-latency", type=float, default=0.2, help="เวลาแฝงต่อคำขอ Gemini (วินาที)")
+    ap.add_argument("--ai-fail-rate", type=float, default=0.05)
+    ap.add_argument("--ai-drop-rate", type=float, default=0.05, help="สัดส่วนรายการที่ Gemini ตอบตกหล่น")
+    ap.add_argument("--no-memory", action="store_true", help="ไม่วัดหน่วยความจำสูงสุด (เร็วกว่า)")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    print(f"{'rows':>8} {'scenario':<8} {'seconds':>9} {'throughput':>20} {'peak MB':>9}")
+    for rows in (int(x) for x in args.sizes.split(",")):
+        t = time.perf_counter()
+        env = Env(rows, args)
+        env.notes = []
+        print(f"{rows:>8,} {'setup':<8} {time.perf_counter() - t:>9.2f}"
+              f" {'':>20} {env.merged.memory_usage(deep=True).sum() / 2**20:>9.1f}  (ขนาดตารางรวม)")
+        for name in scenarios:
+            seconds, count, unit, peak = measure(globals()[f"scenario_{name}"], env, not args.no_memory)
+            rate = f"{count / max(seconds, 1e-9):,.0f} {unit}/s"
+            print(f"{rows:>8,} {name:<8} {seconds:>9.3f} {rate:>20} {'' if peak is None else f'{peak / 2**20:9.1f}'}")
+        for note in env.notes:
+            print(f"{'':>8} - {note}")
+
+
+if __name__ == "__main__":
+    main()
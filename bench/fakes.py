@@ -0,0 +1,112 @@
+# ---------------------------------------------------------
+# ของปลอมแทน sheets_svc / drive_svc / ai_model (รูปการเรียกเหมือน googleapiclient / genai)
+# ตั้งค่าเวลาแฝง (วินาที) และอัตราล้มเหลวได้ สุ่มแบบกำหนด seed
+# ---------------------------------------------------------
+import json
+import random
+import re
+import threading
+import time
+import types
+
+
+class FakeHttpError(Exception):
+    # หน้าตาเหมือน googleapiclient.errors.HttpError (มี resp.status)
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.resp = types.SimpleNamespace(status=status)
+
+
+class _Call:
+    def __init__(self, owner, fn):
+        self.owner, self.fn = owner, fn
+
+    def execute(self, num_retries=0):
+        self.owner.wait()
+        return self.fn()
+
+
+class _Service:
+    def __init__(self, latency=0.0, fail_rate=0.0, seed=0):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            self.calls += 1
+            fail = self._rng.random() < self.fail_rate
+        if self.latency: time.sleep(self.latency)
+        if fail: raise FakeHttpError(429)
+
+
+class FakeSheets(_Service):
+    # sheets_svc.spreadsheets().values().get / batchGet / append
+    def __init__(self, main_values, memory_values, **kw):
+        super().__init__(**kw)
+        self.tabs = {"main": main_values, "AI_Memory": memory_values}
+
+    def spreadsheets(self): return self
+    def values(self): return self
+
+    def _range(self, range):
+        tab, _, cells = range.partition("!") if "!" in range else ("main", "", range)
+        rows = self.tabs[tab]
+        m = re.match(r"A(\d+)", cells)
+        start = int(m.group(1)) - 1 if m else 0
+        return {"range": range, "values": rows[start:]}
+
+    def get(self, spreadsheetId, range):
+        return _Call(self, lambda: self._range(range))
+
+    def batchGet(self, spreadsheetId, ranges):
+        return _Call(self, lambda: {"valueRanges": [self._range(r) for r in ranges]})
+
+    def append(self, spreadsheetId, range, valueInputOption, body):
+        def run():
+            self.tabs["AI_Memory"].extend(body["values"])
+            return {"updates": {"updatedRows": len(body["values"])}}
+        return _Call(self, run)
+
+
+class FakeDrive(_Service):
+    # drive_svc.files().get(fileId, fields)
+    def __init__(self, modified="2026-01-01T00:00:00.000Z", **kw):
+        super().__init__(**kw)
+        self.modified = modified
+
+    def files(self): return self
+
+    def get(self, fileId, fields):
+        return _Call(self, lambda: {"name": "catalogue", "modifiedTime": self.modified})
+
+
+class FakeModel(_Service):
+    # ai_model.generate_content(prompt) -> object ที่มี .text
+    # - prompt แกะข้อมูลสินค้า : ตอบ JSON array ตาม id (ทิ้งบางรายการตาม drop_rate)
+    # - prompt ค้นหา AI        : ตอบ filter JSON ตายตัว (plan)
+    # - อื่นๆ (เลือก index)     : ตอบ "-1"
+    def __init__(self, drop_rate=0.0, plan=None, **kw):
+        super().__init__(**kw)
+        self.model_name = "fake-model"
+        self.drop_rate = drop_rate
+        self.plan = plan or {"filters": [{"column": "AI_Brand", "operator": "contains", "value": "SAMSUNG"}]}
+
+    def generate_content(self, prompt, generation_config=None):
+        self.wait()
+        if "Extract product info" in prompt:
+            items = json.loads(prompt.split("from this list:", 1)[1].split("\n", 2)[1])
+            out = []
+            for it in items:
+                if self._rng.random() < self.drop_rate: continue
+                words = it["name"].split()
+                out.append({"id": it["id"], "AI_Brand": words[1].upper() if len(words) > 1 else "",
+                            "AI_Type": words[0], "AI_Spec": " ".join(words[-4:-2]), "AI_Tags": "", "AI_Kind": ""})
+            text = json.dumps(out, ensure_ascii=False)
+        elif "JSON Filter" in prompt:
+            text = json.dumps(self.plan, ensure_ascii=False)
+        else:
+            text = "-1"
+        return types.SimpleNamespace(text=text)
@@ -0,0 +1,91 @@
+# ---------------------------------------------------------
+# แคตตาล็อกจำลองสำหรับ benchmark (สุ่มแบบกำหนด seed ได้ ผลซ้ำเดิมทุกครั้ง)
+# ---------------------------------------------------------
+import random
+
+import pandas as pd
+
+BRANDS = [
+    ("SAMSUNG", "ซัมซุง"), ("LG", "แอลจี"), ("HAIER", "ไฮเออร์"), ("MITSUBISHI", "มิตซูบิชิ"),
+    ("DAIKIN", "ไดกิ้น"), ("SHARP", "ชาร์ป"), ("TOSHIBA", "โตชิบา"), ("HITACHI", "ฮิตาชิ"),
+    ("PANASONIC", "พานาโซนิค"), ("ELECTROLUX", "อีเลคโทรลักซ์"),
+]
+TYPES = [
+    ("ตู้เย็น", ["1 ประตู", "2 ประตู", "side by side"], ["คิว"], [5.2, 6.4, 7.4, 12.5, 21.0]),
+    ("เครื่องซักผ้า", ["ฝาบน", "ฝาหน้า", "2 ถัง"], ["kg"], [7, 8, 10, 10.5, 13, 15]),
+    ("ทีวี", ["smart tv", "android tv", "oled"], ["นิ้ว"], [32, 43, 50, 55, 65, 75]),
+    ("แอร์", ["ติดผนัง", "inverter", "แขวน"], ["btu"], [9000, 12000, 18000, 24000]),
+    ("ไมโครเวฟ", ["อุ่น", "อบ"], ["ลิตร"], [20, 23, 25, 32]),
+]
+
+
+def make_sku(rng):
+    prefix = "".join(rng.choices("ABCDEFGHJKLMNPRSTUVWXYZ", k=rng.randint(2, 3)))
+    body = str(rng.randint(10, 9999))
+    tail = "".join(rng.choices("ABCDEFGHJKLMNPRSTUVWXYZ0123456789", k=rng.randint(0, 4)))
+    sep = rng.choice(["", "-", " ", "/"])
+    return f"{prefix}{sep}{body}{tail}"
+
+
+def make_catalogue(n, seed=0):
+    # คอลัมน์เดียวกับชีตจริง (A:H)
+    rng = random.Random(seed)
+    rows = []
+    seen = set()
+    while len(rows) < n:
+        sku = make_sku(rng)
+        if sku in seen: continue
+        seen.add(sku)
+        brand_en, brand_th = rng.choice(BRANDS)
+        typ, kinds, units, sizes = rng.choice(TYPES)
+        kind = rng.choice(kinds)
+        size = rng.choice(sizes)
+        brand = brand_en if rng.random() < 0.6 else brand_th
+        desc = f"{typ} {brand} {kind} {size} {units[0]} รุ่น {sku}"
+        rows.append({
+            "รหัสสินค้า": sku,
+            "รายละเอียดสินค้า": desc,
+            "ยี่ห้อ": brand_en,
+            "ชนิด": kind,
+            "หมวด": typ,
+            "หน่วย": "เครื่อง",
+            "ราคาทุนต่อหน่วย": float(rng.randint(1500, 60000)),
+            "จำนวนสต้อก": float(rng.randint(0, 40)),
+        })
+    return pd.DataFrame(rows)
+
+
+def typo(text, rng):
+    # ทำให้พิมพ์ผิด 1 จุด (ลบ/สลับ/แทนตัวอักษร) แบบที่พนักงานพิมพ์จริง
+    s = list(text)
+    if len(s) < 3: return text
+    i = rng.randrange(len(s) - 1)
+    op = rng.choice(["delete", "swap", "replace"])
+    if op == "delete": del s[i]
+    elif op == "swap": s[i], s[i + 1] = s[i + 1], s[i]
+    else: s[i] = rng.choice("abcdefghijklmnopqrstuvwxyz0123456789")
+    return "".join(s)
+
+
+def sheet_values(df):
+    # DataFrame -> ค่าแบบที่ Sheets API ส่งกลับ (หัวตาราง + แถวเป็นข้อความ ตัวเลขมีลูกน้ำ)
+    rows = [list(df.columns)]
+    for rec in df.itertuples(index=False, name=None):
+        rows.append([f"{v:,.0f}" if isinstance(v, float) else str(v) for v in rec])
+    return rows
+
+
+def make_memory(df, coverage=0.9, dup_rate=0.02, seed=0):
+    # ความจำ AI จำลอง (ค่าแบบชีต AI_Memory) ครอบคลุม coverage ของสินค้า มีแถวซ้ำ/ขยะปนนิดหน่อย
+    rng = random.Random(seed)
+    header = ["SKU", "AI_Brand", "AI_Type", "AI_Spec", "AI_Tags", "AI_Kind"]
+    rows = [header]
+    for rec in df.itertuples(index=False):
+        if rng.random() >= coverage: continue
+        sku, desc, brand, kind, typ = rec[0], rec[1], rec[2], rec[3], rec[4]
+        spec = " ".join(desc.split()[-4:-2])
+        row = [sku, brand, typ, spec, kind, kind]
+        rows.append(row)
+        if rng.random() < dup_rate: rows.append(list(row))
+        if rng.random() < dup_rate: rows.append([make_sku(rng)] + row[1:])
+    return rows
@@ -0,0 +1,54 @@
+import streamlit as st
+import pandas as pd
+from datetime import datetime
+
+from perf import TRACER
+
+st.set_page_config(page_title="Timing", page_icon="⏱", layout="wide")
+
+st.title("⏱ เวลาที่ใช้ในแต่ละขั้นตอน")
+
+# ต้องล็อกอินจากหน้าหลักก่อน (session เดียวกัน)
+if not st.session_state.get("password_correct", False):
+    st.warning("⚠️ กรุณาเข้าสู่ระบบที่หน้าหลักก่อน")
+    st.stop()
+
+records = TRACER.records()
+if not records:
+    st.info("ยังไม่มีข้อมูล: ใช้งานหน้าหลัก (ค้นหา/โหลดข้อมูล) ก่อน แล้วค่อยกลับมาหน้านี้")
+    st.stop()
+
+df = pd.DataFrame(records)
+df["เวลา"] = df["start"].map(lambda t: datetime.fromtimestamp(t).strftime("%H:%M:%S"))
+
+c1, c2 = st.columns([3, 1])
+names = sorted(df["name"].unique())
+picked = c1.multiselect("เลือกขั้นตอน", names, default=names)
+if c2.button("🗑️ ล้างข้อมูลจับเวลา"):
+    TRACER.clear()
+    st.rerun()
+df = df[df["name"].isin(picked)]
+
+# --- สรุปต่อขั้นตอน ---
+summary = df.groupby("name").agg(
+    ครั้ง=("ms", "size"),
+    p50_ms=("ms", lambda x: x.quantile(0.5)),
+    p95_ms=("ms", lambda x: x.quantile(0.95)),
+    max_ms=("ms", "max"),
+    รวม_วินาที=("ms", lambda x: x.sum() / 1000),
+    ล้มเหลว=("ok", lambda x: int((~x.astype(bool)).sum())),
+).sort_values("รวม_วินาที", ascending=False)
+if "cache" in df.columns:
+    hits = df[df["cache"].notna()].groupby("name")["cache"].apply(lambda x: f"{(x == 'hit').mean():.0%}")
+    summary["cache_hit"] = hits
+st.subheader("สรุปต่อขั้นตอน")
+st.dataframe(summary, use_container_width=True,
+             column_config={c: st.column_config.NumberColumn(format="%.1f") for c in ("p50_ms", "p95_ms", "max_ms", "รวม_วินาที")})
+st.caption(f"เก็บล่าสุด {len(records):,} รายการ (ตั้งแต่ {datetime.fromtimestamp(records[0]['start']).strftime('%d/%m/%Y %H:%M:%S')})")
+
+# --- รายการที่ช้าที่สุด ---
+st.subheader("ช้าที่สุด 20 รายการล่าสุด")
+extra = [c for c in ("rows", "items", "filters", "bytes_out", "bytes_in", "retries", "cache", "kind", "error") if c in df.columns]
+st.dataframe(df.nlargest(20, "ms")[["เวลา", "name", "ms", "thread"] + extra],
+             use_container_width=True, hide_index=True,
+             column_config={"ms": st.column_config.NumberColumn(format="%.1f")})
@@ -0,0 +1,43 @@
+import streamlit as st
+from datetime import datetime
+
+from search.compact import REPORTS
+
+st.set_page_config(page_title="Memory Report", page_icon="📊", layout="wide")
+
+st.title("📊 รายงานการใช้แรมของตาราง")
+
+# ต้องล็อกอินจากหน้าหลักก่อน (session เดียวกัน)
+if not st.session_state.get("password_correct", False):
+    st.warning("⚠️ กรุณาเข้าสู่ระบบที่หน้าหลักก่อน")
+    st.stop()
+
+if not REPORTS:
+    st.info("ยังไม่มีข้อมูล: เปิดหน้าหลักให้โหลดตารางก่อน แล้วค่อยกลับมาหน้านี้")
+    st.stop()
+
+def fmt_bytes(n):
+    for unit in ("B", "KB", "MB"):
+        if n < 1024: return f"{n:,.0f} {unit}"
+        n /= 1024
+    return f"{n:,.1f} GB"
+
+for name, entry in list(REPORTS.items()):
+    report = entry["report"]
+    before, after = int(report["bytes_before"].sum()), int(report["bytes_after"].sum())
+    st.subheader(f"{name} ({entry['rows']:,} แถว)")
+    st.caption(f"วัดเมื่อ {datetime.fromtimestamp(entry['at']).strftime('%d/%m/%Y %H:%M:%S')}")
+
+    c1, c2, c3 = st.columns(3)
+    c1.metric("ก่อนลดขนาด", fmt_bytes(before))
+    c2.metric("หลังลดขนาด", fmt_bytes(after))
+    c3.metric("ประหยัดได้", f"{100 * (1 - after / before):.0f}%" if before else "-")
+
+    st.dataframe(
+        report.rename(columns={
+            "column": "คอลัมน์", "dtype_before": "ชนิดเดิม", "dtype_after": "ชนิดใหม่",
+            "bytes_before": "ไบต์ (ก่อน)", "bytes_after": "ไบต์ (หลัง)", "saved_pct": "ประหยัด (%)",
+        }),
+        use_container_width=True, hide_index=True,
+        column_config={"ประหยัด (%)": st.column_config.NumberColumn(format="%.0f%%")},
+    )
@@ -0,0 +1,4 @@
+# ---------------------------------------------------------
+# perf: จับเวลาจุดสำคัญ (โหลดข้อมูล / ค้นหา / เรียก Google, Gemini) เก็บไว้ในหน่วยความจำ ให้หน้า Timing อ่าน
+# ---------------------------------------------------------
+from perf.tracing import TRACER, Tracer, span, traced
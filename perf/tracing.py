@@ -0,0 +1,59 @@
+import functools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class Tracer:
+    # ---------------------------------------------------------
+    # เก็บผลจับเวลาล่าสุดไม่เกิน capacity รายการ (ring buffer เก่าสุดหลุดออกเอง)
+    # แต่ละรายการเป็น dict: name, start, ms, ok, error, thread + ค่าที่ผู้เรียกเติมเอง
+    # (เช่น bytes, rows, retries, cache) -- ใช้ร่วมกันได้หลาย thread
+    # ---------------------------------------------------------
+    def __init__(self, capacity=5000):
+        self._records = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, **attrs):
+        record = {"name": name, "start": time.time(), **attrs}
+        began = time.perf_counter()
+        try:
+            yield record
+            record["ok"] = True
+        except BaseException as e:
+            record["ok"] = False
+            record["error"] = f"{type(e).__name__}: {e}"[:200]
+            raise
+        finally:
+            record["ms"] = (time.perf_counter() - began) * 1000
+            record["thread"] = threading.current_thread().name
+            with self._lock:
+                self._records.append(record)
+
+    def traced(self, name=None):
+        # decorator: จับเวลาทั้งฟังก์ชัน (ชื่อ span = name หรือชื่อฟังก์ชัน)
+        def wrap(func):
+            label = name or func.__name__
+
+            @functools.wraps(func)
+            def inner(*args, **kwargs):
+                with self.span(label):
+                    return func(*args, **kwargs)
+            return inner
+        return wrap
+
+    def records(self):
+        with self._lock:
+            return list(self._records)
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+
+# ตัวกลางของทั้ง process (หน้า Timing อ่านจากตัวนี้)
+TRACER = Tracer()
+span = TRACER.span
+traced = TRACER.traced
@@ -0,0 +1,14 @@
+# ---------------------------------------------------------
+# search: ตัวช่วยค้นหาสินค้า (แยกออกมาจาก app.py ให้ import/ทดสอบได้)
+# ---------------------------------------------------------
+from search.text import clean_text
+from search.catalogue import Catalogue, Lookup
+from search.context import build_filter_context
+from search.fuzzy import FuzzyMatcher
+from search.index import SearchIndex
+from search.merge import MergedCatalogue
+from search.ngram import NgramIndex
+from search.numeric import NumericIndex
+from search.plan_cache import PlanCache
+from search.pricing import PriceList, PriceListCache, PriceRules
+from search.text_index import TextColumnIndex
@@ -0,0 +1,59 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# ชื่อคอลัมน์ที่น่าจะเป็นรหัสสินค้าในไฟล์ CSV ของลูกค้า (ไม่เจอใช้คอลัมน์แรก)
+CODE_COLUMNS = ['รหัสสินค้า', 'รหัส', 'รุ่น', 'sku', 'code', 'model']
+
+# เลขลำดับ/หัวข้อหน้าบรรทัดที่ติดมาจากแชต LINE เช่น "1.", "2)", "-", "•"
+_BULLET = re.compile(r'^\s*(?:\d{1,3}[.)]\s+|[-*•·]\s*)')
+_SPLIT = re.compile(r'[\n\r,;\t]+')
+
+# คอลัมน์ที่ดึงจากตารางหลักมาใส่ตารางราคา
+QUOTE_COLS = ['รหัสสินค้า', 'รายละเอียดสินค้า', 'ยี่ห้อ', 'ราคาทุนต่อหน่วย', 'จำนวนสต้อก']
+
+
+def parse_codes(text):
+    # แยกข้อความที่วางมา (ทีละบรรทัด / คั่นด้วย , ; tab) เป็นรายการคำค้น ตัดตัวซ้ำ (คงลำดับเดิม)
+    codes = []
+    for part in _SPLIT.split(str(text or '')):
+        code = _BULLET.sub('', part).strip()
+        if code: codes.append(code)
+    return list(dict.fromkeys(codes))
+
+
+def codes_from_frame(df):
+    # อ่านรายการคำค้นจากไฟล์ที่อัปโหลด (คอลัมน์รหัสสินค้า ถ้าไม่มีใช้คอลัมน์แรก)
+    if df is None or df.empty: return []
+    lower = {str(c).strip().lower(): c for c in df.columns}
+    col = next((lower[c] for c in CODE_COLUMNS if c in lower), df.columns[0])
+    return parse_codes('\n'.join(df[col].dropna().astype(str)))
+
+
+def quote_table(df_main, queries, positions, found_by, price_list):
+    # ---------------------------------------------------------
+    # ตารางราคาของรายการที่ค้นหลายตัว (1 แถวต่อคำค้น เรียงตามที่วางมา)
+    # - positions  : ตำแหน่งแถวในตารางหลัก (-1 = ไม่เจอ)
+    # - price_list : search.pricing.PriceList ของตารางหลักชุดนี้ (กำไร % / ราคาขายตามกฎ)
+    # ดึงทุกแถวทีเดียวด้วย iloc (ไม่วนทีละรายการ)
+    # ---------------------------------------------------------
+    pos = np.asarray(positions, dtype=np.int64).reshape(-1)
+    found = pos >= 0
+    take = np.where(found, pos, 0)
+    out = pd.DataFrame({'คำค้น': list(queries), 'ผลค้นหา': list(found_by)})
+    picked = df_main.iloc[take] if len(df_main) else None
+    for col in QUOTE_COLS:
+        if picked is None or col not in df_main.columns:
+            out[col] = None
+            continue
+        values = picked[col].to_numpy(dtype=object)
+        out[col] = np.where(found, values, None)
+
+    out['ราคาทุนต่อหน่วย'] = pd.to_numeric(out['ราคาทุนต่อหน่วย'], errors='coerce')
+    out['จำนวนสต้อก'] = pd.to_numeric(out['จำนวนสต้อก'], errors='coerce')
+    for col in ('กำไร %', 'ราคาขาย'):
+        values = price_list.table[col].to_numpy(dtype=np.float64)[take] if len(price_list) else np.zeros(len(pos))
+        out[col] = np.where(found, values, np.nan)
+    out['กำไร (บาท)'] = out['ราคาขาย'] - out['ราคาทุนต่อหน่วย']
+    return out
@@ -0,0 +1,94 @@
+import re
+from collections import namedtuple
+
+import pandas as pd
+
+from perf import span
+from search.filters import apply_filters, compile_filters
+from search.fuzzy import DEFAULT_CONFIDENCE
+from search.text import clean_text
+
+# ผลค้นหาของ Tab 1
+# - pos   : ตำแหน่งแถวในตารางหลัก (-1 = ยังไม่เจอ)
+# - kind  : 'sku' / 'desc' / 'fuzzy' หรือ None (ต้องให้ AI ช่วยเลือกจาก pool)
+# - score : ความมั่นใจของ fuzzy (0-1) / 1.0 ถ้าเจอตรงๆ
+# - pool  : ตำแหน่งแถวตัวเลือกสำหรับส่งให้ AI (คีย์เวิร์ดก่อน ไม่มีค่อยใช้ผล fuzzy)
+Lookup = namedtuple("Lookup", "pos kind score pool")
+
+
+def query_keywords(query):
+    # แยกคำค้นเป็นคำภาษาอังกฤษ/ตัวเลข (ถ้าไม่มีเลยใช้ทั้งคำค้น)
+    return list(filter(None, re.split(r'[^a-zA-Z0-9]', query))) or [query]
+
+
+class Catalogue:
+    # ---------------------------------------------------------
+    # แคตตาล็อกพร้อมค้นหา 1 รุ่นข้อมูล (อ่านอย่างเดียว ใช้ร่วมกันทุก session)
+    # - df_main / index   : ตารางหลัก + SearchIndex ของ Tab 1
+    # - merged / prebuilt : ตารางรวมความจำ AI + ของที่เตรียมไว้ตอน merge (Tab 2)
+    # app.py สร้างจากของที่ thread เบื้องหลังเตรียมไว้แล้ว สร้างตัวนี้ไม่มีการคำนวณหนัก
+    # ---------------------------------------------------------
+    def __init__(self, df_main, index, merged=None, prebuilt=None, confidence=DEFAULT_CONFIDENCE):
+        self.df_main = df_main
+        self.index = index
+        self.merged = merged
+        self.prebuilt = prebuilt
+        self.confidence = confidence
+
+    @property
+    def context(self):
+        # [Database Context] สำหรับ prompt ค้นหา AI
+        return self.prebuilt["context"] if self.prebuilt else ""
+
+    def lookup(self, query, pool_size=30):
+        # ---------------------------------------------------------
+        # ลำดับการค้นหาของ Tab 1 (ไม่เรียก AI เอง)
+        # 1. รหัสตรง / ขึ้นต้น / มีในรหัส / มีในรายละเอียด
+        # 2. Fuzzy (พิมพ์ผิด/ตกหล่น) ถ้ามั่นใจ >= confidence ถือว่าเจอ
+        # 3. ไม่งั้นคืน pool ให้ผู้เรียกส่ง AI ช่วยเลือก
+        # ---------------------------------------------------------
+        with span("search.lookup") as sp:
+            pos, kind = self.index.lookup(query)
+            sp["kind"] = kind
+        if kind: return Lookup(pos, kind, 1.0, [])
+
+        with span("search.fuzzy"):
+            ranked = self.index.fuzzy.rank(query, limit=pool_size)
+        if ranked and ranked[0][1] >= self.confidence:
+            return Lookup(ranked[0][0], 'fuzzy', ranked[0][1], [])
+
+        # fuzzy ไม่มั่นใจค่อยหาคีย์เวิร์ดไว้เป็น pool ให้ AI (ใช้ n-gram index ไม่ join ทุกแถวใหม่)
+        with span("search.keywords"):
+            cand_pos = self.index.keywords.search(query_keywords(query), limit=pool_size)
+        return Lookup(-1, None, ranked[0][1] if ranked else 0.0, cand_pos or [p for p, _ in ranked])
+
+    def lookup_many(self, queries, pool_size=30):
+        # ---------------------------------------------------------
+        # ค้นหลายคำพร้อมกัน (ใบเสนอราคา) คืน list ของ Lookup ตามลำดับคำค้น
+        # รหัสตรงเป๊ะ (ส่วนใหญ่) หาทีเดียวทั้งชุดด้วย Series.map กับ dict รหัสของ index
+        # เฉพาะตัวที่เหลือ (พิมพ์ไม่ครบ/ผิด) ค่อยไล่ลำดับเดิมของ lookup() ทีละตัว
+        # ---------------------------------------------------------
+        queries = list(queries)
+        with span("search.lookup_many", items=len(queries)) as sp:
+            exact = pd.Series(queries, dtype=object).map(clean_text).map(self.index.sku_exact)
+            sp["exact"] = int(exact.notna().sum())
+        return [Lookup(int(pos), 'sku', 1.0, []) if pd.notna(pos) else self.lookup(query, pool_size)
+                for query, pos in zip(queries, exact.tolist())]
+
+    def filter(self, plan):
+        # ---------------------------------------------------------
+        # รันแผนค้นหาของ AI ({"filters": [...]} หรือ list ของ filter) กับตารางรวม
+        # คืน (mask เป็น numpy bool, รายการเงื่อนไขที่ใช้จริงไว้แสดงผล)
+        # AND ข้ามคอลัมน์ / ช่วงตัวเลข AND กัน / ข้อความ OR กัน
+        # ---------------------------------------------------------
+        filters = plan.get('filters', []) if isinstance(plan, dict) else plan
+        compiled = compile_filters(filters)
+        prebuilt = self.prebuilt or {"numbers": {}, "texts": {}}
+        with span("filter.apply", rows=len(self.merged), filters=len(compiled)):
+            # ส่ง dict สำเนา (ตื้น) ไป: คอลัมน์ที่ยังไม่ได้เตรียมจะถูกคำนวณใส่สำเนา ไม่แก้ของกลาง
+            return apply_filters(self.merged, compiled,
+                                 numbers=dict(prebuilt["numbers"]), texts=dict(prebuilt["texts"]))
+
+    def keyword_mask(self, query):
+        # ค้นแบบธรรมดา (ตอน AI ไม่ตอบ JSON): มีคำค้นอยู่ในคอลัมน์ใดก็ได้ (ไม่สนตัวพิมพ์เล็ก/ใหญ่)
+        return self.merged.astype(str).apply(lambda x: x.str.contains(query, case=False)).any(axis=1)
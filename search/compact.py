@@ -0,0 +1,86 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    # string แบบ Arrow ต้องมี pyarrow (มากับ streamlit อยู่แล้ว) ไม่มีก็ใช้ dtype เดิม
+    STRING_DTYPE = pd.StringDtype("pyarrow")
+except ImportError:
+    STRING_DTYPE = None
+
+# ค่าไม่ซ้ำกันไม่เกินสัดส่วนนี้ของจำนวนแถว -> เก็บเป็น category (เช่น ยี่ห้อ, AI_Type, AI_Kind)
+CATEGORY_RATIO = 0.5
+
+# รายงานล่าสุดของแต่ละตาราง (ชื่อ -> {report, rows, at}) ให้หน้า Memory Report อ่าน (อยู่ใน process เดียวกัน)
+REPORTS = {}
+_reports_lock = threading.Lock()
+
+
+def _is_text(series):
+    return series.dtype == object or pd.api.types.is_string_dtype(series.dtype)
+
+
+def compact_series(series):
+    # ---------------------------------------------------------
+    # เลือก dtype ที่กินแรมน้อยที่สุดที่ยังใช้งานแบบเดิมได้
+    # - ตัวเลข: จำนวนเต็มทั้งหมดและอยู่ในช่วง -> int32 / float32 เฉพาะเมื่อทุกค่าแปลงแล้วไม่เพี้ยน
+    #   ไม่งั้นคง float64 (ราคามีสตางค์ 12345.67 เป็น float32 ได้ 12345.669921875)
+    # - ข้อความค่าซ้ำเยอะ: category / ค่าไม่ซ้ำ: string แบบ Arrow (ช่องว่างเป็น '')
+    # ---------------------------------------------------------
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    if pd.api.types.is_float_dtype(series.dtype) or pd.api.types.is_integer_dtype(series.dtype):
+        values = series.to_numpy(dtype=float, na_value=np.nan)
+        finite = values[np.isfinite(values)]
+        if (len(finite) == len(values) and np.all(finite == np.round(finite))
+                and (len(finite) == 0 or (finite.min() >= -2**31 and finite.max() < 2**31))):
+            return series.astype(np.int32)
+        if np.array_equal(finite.astype(np.float32).astype(float), finite):
+            return series.astype(np.float32)
+        return series.astype(np.float64)
+    if _is_text(series):
+        text = series.astype(object).where(series.notna(), '').astype(str)
+        if len(text) and text.nunique() <= len(text) * CATEGORY_RATIO:
+            return text.astype('category')
+        if series.dtype == object and STRING_DTYPE is not None:
+            return text.astype(STRING_DTYPE)
+        return text.astype(series.dtype)
+    return series
+
+
+def compact_frame(df, columns=None, name=None):
+    # คืนตารางที่แปลงเป็น dtype ประหยัดแรมแล้ว (columns = เฉพาะบางคอลัมน์, ไม่ส่ง = ทุกคอลัมน์)
+    # ถ้าให้ name จะเก็บรายงานขนาดก่อน/หลังไว้ใน REPORTS[name]
+    before = df.memory_usage(deep=True, index=False) if name else None
+    out = df.copy(deep=False)
+    for col in (columns if columns is not None else df.columns):
+        if col in out.columns:
+            out[col] = compact_series(out[col])
+    if name:
+        record_report(name, df, out, before)
+    return out
+
+
+def memory_report(df_before, df_after, before=None):
+    # ขนาดต่อคอลัมน์ (ไบต์) ก่อน/หลัง
+    before = before if before is not None else df_before.memory_usage(deep=True, index=False)
+    after = df_after.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        "column": list(df_after.columns),
+        "dtype_before": [str(df_before[c].dtype) if c in df_before.columns else "-" for c in df_after.columns],
+        "dtype_after": [str(df_after[c].dtype) for c in df_after.columns],
+        "bytes_before": [int(before.get(c, 0)) for c in df_after.columns],
+        "bytes_after": [int(after[c]) for c in df_after.columns],
+    })
+    report["saved_pct"] = np.where(
+        report["bytes_before"] > 0, 100 * (1 - report["bytes_after"] / report["bytes_before"].clip(lower=1)), 0.0
+    )
+    return report
+
+
+def record_report(name, df_before, df_after, before=None):
+    report = memory_report(df_before, df_after, before)
+    with _reports_lock:
+        REPORTS[name] = {"report": report, "rows": len(df_after), "at": time.time()}
@@ -0,0 +1,61 @@
+import json
+
+# คอลัมน์ที่ใส่ใน [Database Context]
+CONTEXT_COLS = ('AI_Brand', 'AI_Type', 'AI_Kind')
+
+
+def context_counts(df):
+    # จำนวนแถวของแต่ละค่าในคอลัมน์ context (คอลัมน์ -> {ค่า: จำนวน}) คืน None ถ้าคอลัมน์ไม่ครบ
+    # คอลัมน์ category นับหมวดที่ไม่มีแถวแล้วเป็น 0 ด้วย เลยตัดทิ้ง
+    if df is None or any(c not in df.columns for c in CONTEXT_COLS):
+        return None
+    counts = {}
+    for col in CONTEXT_COLS:
+        vc = df[col].value_counts()
+        counts[col] = {k: int(v) for k, v in vc[vc > 0].items()}
+    return counts
+
+
+def update_context_counts(counts, old, new):
+    # นับใหม่เฉพาะแถวที่เปลี่ยน (old/new = ค่าเดิม/ค่าใหม่ของแถวเหล่านั้น) คืน dict ใหม่ ไม่แก้ของเดิม
+    if counts is None: return None
+    updated = {}
+    for col in CONTEXT_COLS:
+        col_counts = dict(counts[col])
+        for value in old[col].tolist():
+            col_counts[value] = col_counts.get(value, 0) - 1
+        for value in new[col].tolist():
+            col_counts[value] = col_counts.get(value, 0) + 1
+        updated[col] = {k: v for k, v in col_counts.items() if v > 0}
+    return updated
+
+
+def _popular(col_counts):
+    # เรียงตามความนิยม (Most Popular) เท่ากันเรียงตามตัวอักษร (ข้อความเหมือนเดิมไม่ว่าจะนับใหม่หรือนับเพิ่ม)
+    return [k for k, _ in sorted(col_counts.items(), key=lambda kv: (-kv[1], str(kv[0])))]
+
+
+def format_filter_context(counts):
+    if counts is None: return ""
+    brands, types, kinds = [_popular(counts[c]) for c in CONTEXT_COLS]
+
+    # Limit Token: ส่งไปแค่ตัวท็อปๆ
+    brand_list = json.dumps(brands[:60], ensure_ascii=False)
+    type_list = json.dumps(types[:40], ensure_ascii=False)
+    kind_list = json.dumps(kinds[:60], ensure_ascii=False)
+
+    return f"""
+            [Database Context - Use these exact values for mapping]
+            - Known Brands: {brand_list}
+            - Known Types: {type_list}
+            - Known Kinds: {kind_list}
+            """
+
+
+def build_filter_context(df):
+    # ---------------------------------------------------------
+    # [Database Context] ของ prompt ค้นหา AI (ยี่ห้อ/ประเภท/ชนิด เรียงตามความนิยม)
+    # คำนวณครั้งเดียวตอน merge_data แล้วใช้ซ้ำ ข้อความเหมือนเดิมทุกไบต์ตราบใดที่ข้อมูลไม่เปลี่ยน
+    # (ตอนต่อท้ายความจำ AI ใช้ update_context_counts + format_filter_context นับเพิ่มแทน)
+    # ---------------------------------------------------------
+    return format_filter_context(context_counts(df))
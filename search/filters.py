@@ -0,0 +1,105 @@
+from collections import defaultdict
+
+import numpy as np
+
+from search.numeric import NumericIndex
+from search.text_index import TextColumnIndex
+
+# ตัวดำเนินการช่วงตัวเลข (AND กันภายในคอลัมน์ ต้องผ่านทุกข้อด้วยตัวเลขตัวเดียวกัน)
+NUMERIC_OPS = {'gt': np.greater, 'gte': np.greater_equal, 'lt': np.less, 'lte': np.less_equal}
+# คอลัมน์ที่มักโดนค้นแบบช่วงตัวเลข (merge_data เตรียม NumericIndex ไว้ล่วงหน้า)
+NUMERIC_INDEX_COLS = ['AI_Spec', 'ราคาทุนต่อหน่วย']
+# คอลัมน์ที่ใช้หาข้อความ (เงื่อนไขข้อความ OR กัน และหาในทุกคอลัมน์นี้ ไม่ใช่แค่คอลัมน์ที่ AI ระบุ)
+TEXT_SEARCH_COLS = ['AI_Type', 'AI_Kind', 'AI_Tags', 'AI_Brand', 'รายละเอียดสินค้า', 'AI_Spec']
+
+
+def parse_limit(value):
+    # "15,000" -> 15000.0 (คืน None ถ้าไม่ใช่ตัวเลข)
+    try:
+        return float(str(value).replace(',', ''))
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_text_value(value):
+    # แบบเดียวกับคอลัมน์ที่ normalize แล้ว: ตัวเล็ก ไม่มีช่องว่าง
+    return str(value).lower().strip().replace(" ", "")
+
+
+def build_numeric_indexes(df, columns=NUMERIC_INDEX_COLS):
+    # เตรียม NumericIndex ของคอลัมน์ตัวเลขหลักไว้ล่วงหน้า (ใช้ตอน merge_data)
+    return {col: NumericIndex.from_series(df[col]) for col in columns if col in df.columns}
+
+
+def build_text_indexes(df, columns=TEXT_SEARCH_COLS):
+    # เตรียมคอลัมน์ข้อความที่ normalize แล้ว + inverted index ไว้ล่วงหน้า (ใช้ตอน merge_data)
+    return {col: TextColumnIndex(df[col]) for col in columns if col in df.columns}
+
+
+def compile_filters(filters):
+    # ---------------------------------------------------------
+    # แปลง filters จาก AI เป็นแผนที่พร้อมใช้ (แปลงตัวเลขครั้งเดียว ไม่ใช่ทุกแถว)
+    # คืน list ของ {"column", "numeric": [(op, limit)], "texts": [ข้อความ]} เรียงตามลำดับที่ AI ให้มา
+    # - gt/gte/lt/lte : ช่วงตัวเลข (AND)
+    # - อื่นๆ (contains/eq/in) : ข้อความ (OR) -- in ที่เป็น list จะแตกเป็นหลายข้อความ
+    # ---------------------------------------------------------
+    grouped = defaultdict(lambda: {"numeric": [], "texts": []})
+    for f in filters or []:
+        if not isinstance(f, dict) or 'column' not in f: continue
+        group = grouped[f['column']]
+        op = f.get('operator')
+        value = f.get('value')
+        if op in NUMERIC_OPS:
+            limit = parse_limit(value)
+            if limit is not None: group["numeric"].append((op, limit))
+        else:
+            values = value if isinstance(value, (list, tuple)) else [value]
+            for v in values:
+                t_val = normalize_text_value(v)
+                if t_val and t_val not in group["texts"]: group["texts"].append(t_val)
+    return [dict(column=col, **g) for col, g in grouped.items() if g["numeric"] or g["texts"]]
+
+
+def text_mask(indexes, n, texts):
+    # แถวผ่านถ้ามีข้อความใดข้อความหนึ่ง อยู่ในคอลัมน์ข้อความใดก็ได้
+    mask = np.zeros(n, dtype=bool)
+    for t_val in texts:
+        for index in indexes:
+            mask |= index.contains_mask(t_val)
+    return mask
+
+
+def apply_filters(df, compiled, text_cols=TEXT_SEARCH_COLS, numbers=None, texts=None):
+    # ---------------------------------------------------------
+    # รันแผนกับตาราง คืน (mask เป็น numpy bool, รายการเงื่อนไขที่ใช้จริงไว้แสดงผล)
+    # AND ข้ามคอลัมน์ / ภายในคอลัมน์: ช่วงตัวเลข AND กัน, ข้อความ OR กัน
+    # numbers/texts: ของที่คำนวณไว้แล้วตอน merge_data (ชื่อคอลัมน์ -> NumericIndex / TextColumnIndex)
+    #                คอลัมน์ที่ไม่มีจะคำนวณให้ตอนนี้
+    # ---------------------------------------------------------
+    n = len(df)
+    final = np.ones(n, dtype=bool)
+    active = []
+    numbers = numbers if numbers is not None else {}
+    texts = texts if texts is not None else {}
+
+    text_indexes = None
+    for group in compiled:
+        col = group["column"]
+        if col not in df.columns: continue
+
+        if group["numeric"]:
+            if col not in numbers: numbers[col] = NumericIndex.from_series(df[col])
+            final &= numbers[col].range_mask(group["numeric"])
+            active.append(f"Range({col})")
+
+        if group["texts"]:
+            if text_indexes is None:
+                text_indexes = []
+                for sc in text_cols:
+                    if sc not in df.columns: continue
+                    if sc not in texts: texts[sc] = TextColumnIndex(df[sc])
+                    text_indexes.append(texts[sc])
+            final &= text_mask(text_indexes, n, group["texts"])
+            active.append(f"Text({','.join(group['texts'])})")
+
+    return final, active
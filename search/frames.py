@@ -0,0 +1,39 @@
+import pandas as pd
+
+from search.compact import compact_frame
+
+# คอลัมน์ของแท็บ AI_Memory
+MEM_COLS = ['SKU', 'AI_Brand', 'AI_Type', 'AI_Spec', 'AI_Tags', 'AI_Kind']
+# คอลัมน์ตัวเลขของตารางหลัก (ในชีตเป็นข้อความมีลูกน้ำ เช่น "12,990")
+NUMERIC_COLS = ['ราคาทุนต่อหน่วย', 'จำนวนสต้อก']
+
+
+def pad_row(row, width):
+    # API ตัดช่องว่างท้ายแถวทิ้ง -> เติม None ให้ครบทุกคอลัมน์
+    return list(row) + [None] * (width - len(row))
+
+
+def frame_main(vals_main):
+    # ค่าจากชีตหลัก (A:H แถวแรกเป็นหัวตาราง) -> DataFrame
+    if not vals_main: return pd.DataFrame()
+    df_main = pd.DataFrame(vals_main[1:], columns=vals_main[0])
+    for col in NUMERIC_COLS:
+        if col in df_main.columns:
+            df_main[col] = pd.to_numeric(df_main[col].astype(str).str.replace(',', ''), errors='coerce').fillna(0)
+    # ลดแรม: ค่าซ้ำเยอะเป็น category, ข้อความเป็น Arrow string, ตัวเลขเป็น int32/float32 (float64 ถ้ามีเศษสตางค์) (ดูได้ที่หน้า Memory Report)
+    return compact_frame(df_main, name="ตารางหลัก")
+
+
+def frame_memory(vals_mem):
+    # คืน (df_mem, จำนวนแถวในชีตรวมหัวตาราง, แถวสุดท้าย)
+    if vals_mem and len(vals_mem) > 1:
+        headers = vals_mem[0]
+        # เติมค่าว่างให้ครบทุกคอลัมน์ถ้ามันแหว่ง
+        fixed_rows = [pad_row(r, len(headers)) for r in vals_mem[1:]]
+        df_mem = pd.DataFrame(fixed_rows, columns=headers)
+        # ถ้าโหลดมาแล้วไม่มีคอลัมน์ AI_Kind ให้เติมเข้าไป
+        if 'AI_Kind' not in df_mem.columns:
+            df_mem['AI_Kind'] = ''
+        return df_mem, len(vals_mem), fixed_rows[-1]
+    # สร้างตารางเปล่าแบบมี AI_Kind รอไว้
+    return pd.DataFrame(columns=MEM_COLS), len(vals_mem or []), None
@@ -0,0 +1,72 @@
+from search.ngram import NgramIndex
+from search.text import clean_text
+
+# ความมั่นใจขั้นต่ำที่ยอมรับผล fuzzy โดยไม่ต้องถาม Gemini (app.py อ่านค่าจริงจาก secrets)
+DEFAULT_CONFIDENCE = 0.8
+
+
+def edit_distance(a, b):
+    # Levenshtein distance แบบเก็บแค่ 2 แถว
+    if a == b: return 0
+    if len(a) < len(b): a, b = b, a
+    if not b: return len(a)
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+def similarity(query_clean, target_clean):
+    # 1.0 = เหมือนกันเป๊ะ, 0.0 = ไม่เหมือนเลย
+    # เทียบทั้งคำ และเทียบกับส่วนหัวของรหัสที่ยาวกว่า (พิมพ์แค่ต้นรุ่นแต่พิมพ์ผิด) โดยหักคะแนนนิดหน่อย
+    if not query_clean or not target_clean: return 0.0
+    full = 1 - edit_distance(query_clean, target_clean) / max(len(query_clean), len(target_clean))
+    if len(target_clean) <= len(query_clean): return full
+    head = target_clean[:len(query_clean)]
+    part = (1 - edit_distance(query_clean, head) / len(query_clean)) * 0.95
+    return max(full, part)
+
+
+def model_tokens(text):
+    # แยกคำในรายละเอียดที่น่าจะเป็นชื่อรุ่น (มีตัวอังกฤษ/ตัวเลขอย่างน้อย 2 ตัว) เช่น "RT-20" -> "rt20"
+    tokens = []
+    for t in str(text).split():
+        c = clean_text(t)
+        if len(c) >= 2: tokens.append(c)
+    return tokens
+
+
+class FuzzyMatcher:
+    # ---------------------------------------------------------
+    # จัดอันดับสินค้าที่ใกล้เคียงคำค้น (พิมพ์ผิด/ตกหล่น) โดยไม่ต้องเรียก AI
+    # 1. คัดตัวเลือกด้วย trigram ที่ตรงกันมากที่สุด (ไม่เทียบทั้งตาราง)
+    # 2. ให้คะแนนด้วย edit distance กับรหัส และชื่อรุ่นในรายละเอียด
+    # ---------------------------------------------------------
+    def __init__(self, sku_clean, descs, pool_size=50):
+        self.pool_size = pool_size
+        self.fields = []
+        for sku, desc in zip(sku_clean, descs):
+            fields = [sku] if sku else []
+            fields += [t for t in model_tokens(desc) if t != sku]
+            self.fields.append(fields)
+        self.grams = NgramIndex([' '.join(f) for f in self.fields], short=False)
+
+    def rank(self, query, limit=10):
+        # คืน list ของ (ตำแหน่งแถว, คะแนน 0-1) เรียงจากคะแนนมากไปน้อย
+        query_clean = clean_text(query)
+        if not query_clean: return []
+        pool = self.grams.overlap(query_clean, limit=self.pool_size)
+        scored = []
+        for pos in pool:
+            score = max((similarity(query_clean, f) for f in self.fields[pos]), default=0.0)
+            if score > 0: scored.append((pos, score))
+        scored.sort(key=lambda x: (-x[1], x[0]))
+        return scored[:limit]
+
+    def best(self, query):
+        # คืน (ตำแหน่งแถว, ความมั่นใจ) หรือ (-1, 0.0) ถ้าไม่มีตัวเลือกเลย
+        ranked = self.rank(query, limit=1)
+        return ranked[0] if ranked else (-1, 0.0)
@@ -0,0 +1,92 @@
+from bisect import bisect_left, bisect_right
+
+from search.fuzzy import FuzzyMatcher
+from search.ngram import NgramIndex
+from search.text import clean_text
+
+# ตัวคั่นระหว่างแถวใน blob (clean_text ไม่มีทางคืนค่า \n ออกมา เลยไม่ชนกับคำค้น)
+_SEP = "\n"
+
+
+def _build_blob(values):
+    # ต่อทุกแถวเป็นสตริงก้อนเดียว + เก็บจุดเริ่มของแต่ละแถว
+    # เวลาหา substring จะใช้ str.find (วิ่งใน C) แทนการวนทีละแถวใน Python
+    starts = []
+    pos = 0
+    for v in values:
+        starts.append(pos)
+        pos += len(v) + 1
+    return _SEP.join(values), starts
+
+
+class SearchIndex:
+    # ---------------------------------------------------------
+    # Index สำหรับช่องค้นหา Tab 1 (สร้างครั้งเดียวต่อผลลัพธ์ของ load_data_master)
+    # - sku_clean / desc_clean : รหัส/รายละเอียดที่ผ่าน clean_text แล้ว (เรียงตามแถว)
+    # - sku_exact              : dict รหัสที่ clean แล้ว -> แถวแรกที่เจอ
+    # - sku_sorted             : list (รหัส, แถว) เรียงตามตัวอักษร ใช้หา prefix ด้วย bisect
+    # - keywords               : NgramIndex ของทุกคอลัมน์ (ใช้ตอนหารหัส/รายละเอียดไม่เจอ)
+    # - fuzzy                  : FuzzyMatcher ของรหัส + ชื่อรุ่น (ใช้ก่อนจะถาม Gemini)
+    # ---------------------------------------------------------
+    def __init__(self, skus, descs, keywords=None):
+        self.sku_clean = [clean_text(s) for s in skus]
+        self.desc_clean = [clean_text(d) for d in descs]
+
+        self.sku_exact = {}
+        for pos, key in enumerate(self.sku_clean):
+            if key and key not in self.sku_exact:
+                self.sku_exact[key] = pos
+
+        self.sku_sorted = sorted((key, pos) for pos, key in enumerate(self.sku_clean) if key)
+        self._sku_keys = [k for k, _ in self.sku_sorted]
+
+        self._sku_blob, self._sku_starts = _build_blob(self.sku_clean)
+        self._desc_blob, self._desc_starts = _build_blob(self.desc_clean)
+
+        self.keywords = keywords if keywords is not None else NgramIndex([])
+        self.fuzzy = FuzzyMatcher(self.sku_clean, descs)
+
+    @classmethod
+    def from_frame(cls, df, sku_col='รหัสสินค้า', desc_col='รายละเอียดสินค้า'):
+        skus = df[sku_col].astype(str).tolist() if sku_col in df.columns else [''] * len(df)
+        descs = df[desc_col].astype(str).tolist() if desc_col in df.columns else [''] * len(df)
+        return cls(skus, descs, keywords=NgramIndex.from_frame(df))
+
+    def __len__(self):
+        return len(self.sku_clean)
+
+    def prefix(self, query_clean):
+        # คืนตำแหน่งแถวทั้งหมดที่รหัสขึ้นต้นด้วย query_clean (เรียงตามแถว)
+        if not query_clean: return []
+        lo = bisect_left(self._sku_keys, query_clean)
+        hi = bisect_right(self._sku_keys, query_clean + "\uffff", lo)
+        return sorted(pos for _, pos in self.sku_sorted[lo:hi])
+
+    def _first_contains(self, blob, starts, query_clean):
+        i = blob.find(query_clean)
+        if i == -1: return -1
+        return bisect_right(starts, i) - 1
+
+    def lookup(self, query):
+        # ลำดับการหา: รหัสตรงเป๊ะ -> รหัสขึ้นต้นด้วย -> รหัสมีคำนี้อยู่ -> รายละเอียดมีคำนี้อยู่
+        # คืนค่า (ตำแหน่งแถว, 'sku' / 'desc') หรือ (-1, None) ถ้าไม่เจอ
+        # ⚠️ ต่างจากโค้ดเดิมใน app.py (เอา "แถวแรกตามลำดับในชีตที่รหัสมีคำนี้อยู่"):
+        #   - รหัสตรงเป๊ะ/ขึ้นต้นด้วย มาก่อนแถวที่อยู่ก่อนหน้า (ค้น "rt20" ได้ RT20 ไม่ใช่ XRT20 ที่อยู่แถวบนกว่า)
+        #   - คำค้นที่ clean แล้วว่าง (ภาษาไทยล้วน) ไม่เจอ ให้ไปต่อที่ fuzzy/AI แทนการได้แถวแรกของชีต
+        #   (lookup_many ใช้ sku_exact หาทั้งชุด จึงต้องให้รหัสตรงเป๊ะชนะเหมือนกัน) ดู tests/test_index.py
+        query_clean = clean_text(query)
+        if not query_clean: return -1, None
+
+        pos = self.sku_exact.get(query_clean)
+        if pos is not None: return pos, 'sku'
+
+        hits = self.prefix(query_clean)
+        if hits: return hits[0], 'sku'
+
+        pos = self._first_contains(self._sku_blob, self._sku_starts, query_clean)
+        if pos != -1: return pos, 'sku'
+
+        pos = self._first_contains(self._desc_blob, self._desc_starts, query_clean)
+        if pos != -1: return pos, 'desc'
+
+        return -1, None
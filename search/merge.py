@@ -0,0 +1,161 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from search.compact import compact_frame
+from search.context import context_counts, format_filter_context, update_context_counts
+from search.filters import build_numeric_indexes, build_text_indexes
+
+AI_COLS = ['AI_Brand', 'AI_Type', 'AI_Spec', 'AI_Tags', 'AI_Kind']
+
+
+def join_key(series):
+    # แปลงเป็นตัวหนังสือ + ตัวพิมพ์ใหญ่ + ตัดช่องว่าง (แก้ปัญหา "sku01" ไม่เท่ากับ " SKU01 ")
+    return series.astype(str).str.strip().str.upper()
+
+
+def row_hashes(df):
+    # ลายนิ้วมือรายแถว (uint64) ของค่าทุกคอลัมน์ ไว้เช็คว่าแถวเดิมยังเหมือนเดิม (ทั้งตาราง ไม่ใช่แค่แถวท้าย)
+    return pd.util.hash_pandas_object(df.astype(str), index=False).to_numpy()
+
+
+def prebuild_search(merged):
+    # ของที่เตรียมไว้สำหรับค้นหา AI (context / ตัวเลข / ข้อความ) + จำนวนแถวของแต่ละค่าใน context ไว้นับเพิ่ม
+    counts = context_counts(merged)
+    return {
+        "context": format_filter_context(counts),
+        "counts": counts,
+        "numbers": build_numeric_indexes(merged),
+        "texts": build_text_indexes(merged),
+    }
+
+
+def update_search(prebuilt, old, merged, rows, columns):
+    # ---------------------------------------------------------
+    # prebuilt รุ่นใหม่หลังแถว rows ของคอลัมน์ columns เปลี่ยน (ตอนต่อท้ายความจำ AI)
+    # old/merged = ตารางก่อน/หลังเปลี่ยน / ดึงตัวเลข, normalize ข้อความ, นับ context ใหม่แค่แถวที่เปลี่ยน
+    # ไม่แก้ prebuilt เดิม (session อื่นอาจใช้อยู่)
+    # ---------------------------------------------------------
+    numbers = dict(prebuilt["numbers"])
+    texts = dict(prebuilt["texts"])
+    for col in columns:
+        values = merged[col].iloc[rows]
+        if col in numbers: numbers[col] = numbers[col].replace(rows, values)
+        if col in texts: texts[col] = texts[col].replace(rows, values)
+    counts = prebuilt["counts"]
+    if counts is not None and any(c in columns for c in counts):
+        counts = update_context_counts(counts, old.iloc[rows], merged.iloc[rows])
+    return {"context": format_filter_context(counts), "counts": counts, "numbers": numbers, "texts": texts}
+
+
+class MergedCatalogue:
+    # ---------------------------------------------------------
+    # ตารางหลัก + ความจำ AI ที่จับคู่ด้วยรหัสสินค้าแล้ว (1 แถวต่อ 1 สินค้าในตารางหลัก เรียงตามตารางหลัก)
+    # - main_rows : join_key -> ตำแหน่งแถวในตารางหลัก (hash index)
+    # - ความจำ AI ชุดเดิม = ตัวเดียวกัน (is) หรือค่าทุกแถวตรงกัน (row_hashes) / แก้แถวไหนก็ตาม -> merge ใหม่
+    # - ถ้าความจำ AI แค่ "ต่อท้าย" จากรอบก่อน (แถวเดิมทุกแถวตรงกัน) จะเอาเฉพาะแถวใหม่ไปเติมในตารางเดิม ไม่ merge ใหม่ทั้งก้อน
+    # - SKU ซ้ำในความจำ AI ใช้แถวล่าสุด (เหมือนตอนล้างขยะ keep='last')
+    # - ตารางที่คืนไปแล้วถือเป็นของอ่านอย่างเดียว: ทุก session อ่านตัวเดียวกันโดยไม่ copy
+    #   ตอนเติมแถวใหม่จะสร้างตารางรุ่นใหม่ (copy เฉพาะคอลัมน์ที่แก้) แล้วสลับทั้งก้อน
+    #   คนที่กำลังอ่านรุ่นเก่าอยู่จะไม่เห็นข้อมูลเปลี่ยนกลางทาง (version เพิ่มทุกครั้งที่สลับ)
+    # ---------------------------------------------------------
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.df_main = None
+        self.merged = None
+        self.prebuilt = None
+        self.version = 0
+        self.main_rows = {}
+        self.df_mem = None
+        self._mem_cols = None
+        self._mem_hashes = None
+
+    def sync(self, df_main, df_mem):
+        # คืน (ตารางรวม, prebuilt) ที่ตรงกับ df_main/df_mem ชุดนี้
+        with self._lock:
+            if self._is_same(df_main, df_mem):
+                pass
+            elif self._is_append(df_main, df_mem):
+                self._append(df_mem)
+            else:
+                self._rebuild(df_main, df_mem)
+            return self.merged, self.prebuilt
+
+    def _is_same(self, df_main, df_mem):
+        if self.merged is None or df_main is not self.df_main: return False
+        if df_mem is self.df_mem: return True
+        if list(df_mem.columns) != self._mem_cols or len(df_mem) != len(self._mem_hashes): return False
+        if np.array_equal(row_hashes(df_mem), self._mem_hashes):
+            self.df_mem = df_mem
+            return True
+        return False
+
+    def _is_append(self, df_main, df_mem):
+        if self.merged is None or df_main is not self.df_main or len(self._mem_hashes) == 0: return False
+        if 'SKU' not in df_mem.columns: return False
+        if list(df_mem.columns) != self._mem_cols or len(df_mem) <= len(self._mem_hashes): return False
+        return np.array_equal(row_hashes(df_mem.iloc[:len(self._mem_hashes)]), self._mem_hashes)
+
+    def _rebuild(self, df_main, df_mem):
+        merged = df_main.copy()
+        main_keys = join_key(merged['รหัสสินค้า']) if 'รหัสสินค้า' in merged.columns else pd.Series([''] * len(merged))
+        main_rows = {}
+        for pos, key in enumerate(main_keys.tolist()):
+            main_rows.setdefault(key, []).append(pos)
+
+        mem_cols = [c for c in df_mem.columns if c not in merged.columns or c in AI_COLS]
+        if not df_mem.empty and 'SKU' in df_mem.columns:
+            # ตำแหน่งแถวความจำ AI ของแต่ละสินค้า (-1 = AI ยังไม่รู้จัก)
+            mem_pos = pd.Series(np.arange(len(df_mem)), index=join_key(df_mem['SKU']).to_numpy())
+            mem_pos = mem_pos[~mem_pos.index.duplicated(keep='last')]
+            pos = mem_pos.reindex(main_keys.to_numpy()).fillna(-1).astype(np.int64).to_numpy()
+            found = pos >= 0
+            for col in mem_cols:
+                out = np.full(len(merged), None, dtype=object)
+                out[found] = df_mem[col].to_numpy(dtype=object)[pos[found]]
+                merged[col] = out
+
+        # ถมช่องว่าง (ถ้า AI ยังไม่รู้จัก ให้ใส่ค่าว่าง อย่าให้เป็น NaN)
+        for col in AI_COLS:
+            merged[col] = merged[col].fillna('').astype(str) if col in merged.columns else ''
+        merged = compact_frame(merged, list(dict.fromkeys(mem_cols + AI_COLS)), name="ตารางค้นหา (รวมความจำ AI)")
+
+        self.df_main = df_main
+        self.merged = merged
+        self.main_rows = main_rows
+        self.prebuilt = prebuild_search(merged)
+        self.version += 1
+        self.df_mem = df_mem
+        self._mem_cols = list(df_mem.columns)
+        self._mem_hashes = row_hashes(df_mem)
+
+    def _append(self, df_mem):
+        # เติมเฉพาะแถวความจำ AI ที่เพิ่งต่อท้าย (ไม่ merge ใหม่ทั้งตาราง ไม่แตะคอลัมน์ของตารางหลัก)
+        old_len = len(self._mem_hashes)
+        new = df_mem.iloc[old_len:]
+        cols = [c for c in self._mem_cols if c in self.merged.columns]
+        latest = {}
+        for key, values in zip(join_key(new['SKU']).tolist(), new[cols].itertuples(index=False, name=None)):
+            for pos in self.main_rows.get(key, ()):
+                latest[pos] = values
+        if latest:
+            rows = list(latest)
+            block = pd.DataFrame([latest[r] for r in rows], columns=cols)
+            for col in AI_COLS:
+                if col in block.columns: block[col] = block[col].fillna('').astype(str)
+            merged = self.merged.copy(deep=False)
+            for col in cols:
+                values = block[col].to_numpy(dtype=object)
+                column = self.merged[col].copy()
+                if isinstance(column.dtype, pd.CategoricalDtype):
+                    # ค่าใหม่ที่ยังไม่มีในหมวดต้องเพิ่มหมวดก่อน ไม่งั้น pandas ไม่ยอมให้ใส่
+                    fresh = pd.Index(values).dropna().unique().difference(column.cat.categories)
+                    if len(fresh): column = column.cat.add_categories(fresh)
+                column.iloc[rows] = values
+                merged[col] = column
+            self.prebuilt = update_search(self.prebuilt, self.merged, merged, rows, cols)
+            self.merged = merged
+            self.version += 1
+        self.df_mem = df_mem
+        self._mem_hashes = np.concatenate([self._mem_hashes, row_hashes(new)])
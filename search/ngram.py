@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+
+N = 3
+# เติมท้ายข้อความตอนสร้าง index เพื่อให้ทุกตำแหน่งมี gram ที่ขึ้นต้นตรงนั้น (คำสั้นท้ายแถวจะได้ไม่หลุด)
+_PAD = "\x00"
+_EMPTY = np.empty(0, dtype=np.int32)
+
+
+def _grams(text, n=N):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def _encode(texts, tail):
+    # ---------------------------------------------------------
+    # ต่อทุกแถว (+ _PAD tail ตัวท้ายแถว) เป็น array ของ code point เดียว เพื่อตัด gram ทั้งตารางด้วย numpy
+    # คืน (chars, row, col, lengths): ตัวอักษร / แถวของตัวอักษรนั้น / ตำแหน่งในแถว / ความยาวข้อความแต่ละแถว
+    # ---------------------------------------------------------
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    joined = ''.join(t + _PAD * tail for t in texts)
+    chars = np.frombuffer(joined.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    seg = lengths + tail
+    row = np.repeat(np.arange(len(texts), dtype=np.int64), seg)
+    col = np.arange(len(chars), dtype=np.int64) - np.repeat(np.cumsum(seg) - seg, seg)
+    return chars, row, col, lengths
+
+
+def _substring_postings(chars, row, valid, m):
+    # ---------------------------------------------------------
+    # substring ยาว m ตัวที่เริ่มตรงตำแหน่ง valid -> ตำแหน่งแถว (int32 เรียงแล้ว ไม่ซ้ำ)
+    # แทนการวน set ของ gram ทีละแถวใน Python:
+    # 1. substring -> เลขตัวเดียว (code point ละ 21 บิต m <= 3 ไม่เกิน 63 บิต)
+    # 2. factorize เป็นรหัส gram เล็กๆ แล้ว stable argsort (ตำแหน่งเรียงตามแถวอยู่แล้ว แถวในแต่ละ gram จึงเรียงด้วย)
+    #    รหัสไม่เกิน 65536 ตัวใช้ uint16 ซึ่ง numpy เรียงแบบ radix sort
+    # ---------------------------------------------------------
+    start = np.flatnonzero(valid)
+    if not len(start): return {}
+    key = np.zeros(len(start), dtype=np.uint64)
+    for j in range(m):
+        key = (key << np.uint64(21)) | chars[start + j]
+    codes, uniques = pd.factorize(key)
+    codes = codes.astype(np.uint16 if len(uniques) <= 1 << 16 else np.int64)
+    order = np.argsort(codes, kind='stable')
+    codes, pos = codes[order], row[start][order].astype(np.int32)
+    # แถวเดียวกันมี gram ซ้ำได้หลายตำแหน่ง เก็บครั้งเดียว
+    first = np.ones(len(codes), dtype=bool)
+    first[1:] = (codes[1:] != codes[:-1]) | (pos[1:] != pos[:-1])
+    codes, pos = codes[first], pos[first]
+    bounds = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    mask = (1 << 21) - 1
+    grams = [''.join(chr((k >> (21 * (m - 1 - j))) & mask) for j in range(m))
+             for k in np.asarray(uniques)[codes[bounds]].tolist()]
+    return dict(zip(grams, np.split(pos, bounds[1:])))
+
+
+def _freeze(postings, rows):
+    # ตำแหน่งแถว (เรียงแล้ว) -> numpy (กินแรมน้อยกว่า list ของ int หลายเท่า)
+    # - ทั่วไป: int32 เรียงจากน้อยไปมาก (4 ไบต์ต่อแถวที่มี)
+    # - gram ที่เจอเกิน 1/32 ของแถว (ตัวอักษรยอดฮิต): bitmap uint8 (1 บิตต่อแถวทั้งตาราง) เล็กกว่า
+    dense = rows // 32
+    frozen = {}
+    for g, plist in postings.items():
+        if len(plist) > dense:
+            bits = np.zeros(rows, dtype=bool)
+            bits[plist] = True
+            frozen[g] = np.packbits(bits)
+        else:
+            frozen[g] = np.asarray(plist, dtype=np.int32)
+    return frozen
+
+
+def _positions(entry, rows):
+    # ตำแหน่งแถว (int32 เรียงแล้ว) จาก posting ที่เก็บแบบใดแบบหนึ่งข้างบน
+    if entry.dtype == np.uint8: return np.flatnonzero(np.unpackbits(entry, count=rows)).astype(np.int32)
+    return entry
+
+
+class NgramIndex:
+    # ---------------------------------------------------------
+    # Inverted index แบบ n-gram ตัวอักษร (ค่าเริ่มต้น trigram) ของทุกคอลัมน์ในแถว
+    # - texts    : ข้อความของแต่ละแถว (ต่อทุกคอลัมน์ด้วยช่องว่าง + ตัวเล็ก) ใช้ยืนยันผลซ้ำ
+    # - postings : n-gram -> ตำแหน่งแถว (numpy int32 เรียงแล้ว หรือ bitmap ถ้าเจอเกือบทุกแถว ดู _freeze)
+    # - short    : คำสั้น 1..N-1 ตัว -> ตำแหน่งแถวที่มีคำนั้น (= ส่วนหัวของ gram ทุกตัว สร้างพร้อมกัน)
+    #              คำค้นสั้น (เช่น "x" ใน "55x") เลยเป็นแค่ dict lookup และได้ผลตรงเป๊ะ ไม่ต้องยืนยันซ้ำ
+    #              short=False (index ของ fuzzy ที่ใช้แค่ overlap) ไม่สร้างส่วนนี้
+    # ---------------------------------------------------------
+    def __init__(self, texts, n=N, short=True):
+        self.n = n
+        self.texts = [str(t).lower() for t in texts]
+        rows = len(self.texts)
+        chars, row, col, lengths = _encode(self.texts, n - 1)
+        # gram ที่เริ่มในข้อความ (ท้ายแถวเติม _PAD ไว้ gram ท้ายๆ จะยาวครบ n)
+        self.postings = _freeze(_substring_postings(chars, row, col < lengths[row], n), rows)
+        if short:
+            # ส่วนหัว 1..N-1 ตัวของทุก gram = substring สั้นทุกตัวของข้อความ (ไม่รวม _PAD)
+            prefixes = {}
+            for m in range(1, n):
+                prefixes.update(_substring_postings(chars, row, col + m <= lengths[row], m))
+            self.short = _freeze(prefixes, rows)
+        else:
+            self.short = None
+        self._short = {}
+
+    @classmethod
+    def from_frame(cls, df, columns=None, n=N):
+        # คอลัมน์ตัวเลขล้วน (ราคาทุน/สต้อก) ไม่เข้า index: ค้นคำเจอในตัวเลขไม่มีประโยชน์ แต่กินแรมเยอะ
+        cols = [c for c in (columns or df.columns)
+                if c in df.columns and not pd.api.types.is_numeric_dtype(df[c])]
+        if not cols or df.empty: return cls([], n)
+        # เหมือนเดิมกับ ' '.join(x) ของ df.astype(str) ทีละแถว แต่แปลงทีละคอลัมน์แล้ว zip
+        # (agg(axis=1) สร้าง Series ทุกแถว ช้ากว่าตัว index เองหลายเท่า)
+        columns = [df[c].astype(str).tolist() for c in cols]
+        return cls([' '.join(parts) for parts in zip(*columns)], n)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def _candidates(self, k):
+        # ตำแหน่งแถว (int32 เรียงแล้ว) ที่ "อาจจะ" มี k (คำสั้นจาก self.short = ตรงเป๊ะ)
+        if len(k) >= self.n:
+            lists = []
+            for g in _grams(k, self.n):
+                plist = self.postings.get(g)
+                if plist is None: return _EMPTY
+                lists.append(plist)
+            # เริ่มจาก posting ที่สั้นที่สุด (bitmap = gram ยอดฮิต ไว้ท้ายสุด)
+            lists.sort(key=lambda a: (a.dtype == np.uint8, len(a)))
+            result = _positions(lists[0], len(self))
+            for plist in lists[1:]:
+                result = np.intersect1d(result, _positions(plist, len(self)), assume_unique=True)
+                if not len(result): break
+            return result
+        if self.short is not None:
+            return _positions(self.short.get(k, _EMPTY), len(self))
+        # index ที่ไม่ได้สร้างคำสั้นไว้: รวมทุก gram ที่ขึ้นต้นด้วยคำนี้ (จำผลไว้ เพราะคำสั้นมักซ้ำ เช่น "tv")
+        if k not in self._short:
+            lists = [_positions(plist, len(self)) for g, plist in self.postings.items() if g.startswith(k)]
+            self._short[k] = np.unique(np.concatenate(lists)) if lists else _EMPTY
+        return self._short[k]
+
+    def candidates(self, keyword):
+        # คืน set ตำแหน่งแถวที่ "อาจจะ" มี keyword (ยังต้องยืนยันด้วย substring)
+        return set(self._candidates(keyword.lower()).tolist())
+
+    def _matches(self, k):
+        if not k: return _EMPTY
+        found = self._candidates(k)
+        # คำสั้นจาก self.short ตรงเป๊ะอยู่แล้ว
+        if len(k) < self.n and self.short is not None: return found
+        texts = self.texts
+        return np.array([pos for pos in found.tolist() if k in texts[pos]], dtype=np.int32)
+
+    def matches(self, keyword):
+        return set(self._matches(keyword.lower()).tolist())
+
+    def search(self, keywords, limit=30):
+        # แถวที่มี keyword ใดก็ได้ (OR) เรียงตามจำนวน keyword ที่เจอมากสุดก่อน แล้วตามลำดับแถว
+        lists = [self._matches(k.lower()) for k in keywords]
+        lists = [found for found in lists if len(found)]
+        if not lists: return []
+        pos, count = np.unique(np.concatenate(lists), return_counts=True)
+        ranked = pos[np.argsort(-count, kind="stable")]
+        return (ranked[:limit] if limit else ranked).tolist()
+
+    def overlap(self, text, limit=50):
+        # แถวที่มี n-gram ร่วมกับ text มากที่สุด (ใช้คัดตัวเลือกให้ fuzzy match ไม่ต้องเทียบทั้งตาราง)
+        lists = [_positions(self.postings[g], len(self)) for g in _grams(str(text).lower(), self.n) if g in self.postings]
+        if not lists: return []
+        pos, count = np.unique(np.concatenate(lists), return_counts=True)
+        # เรียงจำนวน gram ที่ตรงมากสุดก่อน เท่ากันเรียงตามลำดับแถว (stable sort บน pos ที่เรียงแล้ว)
+        ranked = pos[np.argsort(-count, kind="stable")]
+        return (ranked[:limit] if limit else ranked).tolist()
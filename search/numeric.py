@@ -0,0 +1,88 @@
+import re
+
+import numpy as np
+
+_NUMBER_RE = re.compile(r'(\d+\.?\d*)')
+
+
+def extract_numbers(series):
+    # ---------------------------------------------------------
+    # ดึงตัวเลขทุกตัวในแต่ละแถว (เช่น "9000-12000 btu" -> 9000, 12000) แบบทั้งคอลัมน์ทีเดียว
+    # คืน (values, rows): ตัวเลขทั้งหมดเรียงเป็น array เดียว + แถวที่ตัวเลขนั้นมาจาก (ตำแหน่ง 0..n-1)
+    # ---------------------------------------------------------
+    values = []
+    rows = []
+    for i, text in enumerate(series.tolist()):
+        nums = _NUMBER_RE.findall(str(text).replace(',', ''))
+        if nums:
+            values.extend(nums)
+            rows.extend([i] * len(nums))
+    return np.array(values, dtype=float), np.array(rows, dtype=np.int64)
+
+
+class NumericIndex:
+    # ---------------------------------------------------------
+    # ตัวเลขทุกตัวที่ดึงได้จากคอลัมน์หนึ่ง (เช่น AI_Spec, ราคาทุน) เก็บแบบ array แบน + offsets
+    # - values / rows  : ตัวเลขทั้งหมดเรียงตามแถว และแถวที่มันมาจาก
+    # - offsets        : ตัวเลขของแถว i อยู่ที่ values[offsets[i]:offsets[i+1]]
+    # - row_min/row_max: ค่าน้อยสุด/มากสุดของแต่ละแถว (NaN ถ้าไม่มีตัวเลข)
+    # - sorted_*       : เรียงตามค่า ใช้ binary search หาช่วง (9000-12000 btu) โดยไม่ต้องสแกน
+    # ---------------------------------------------------------
+    def __init__(self, values, rows, n):
+        self.n = n
+        self.values = np.asarray(values, dtype=float)
+        self.rows = np.asarray(rows, dtype=np.int64)
+        counts = np.bincount(self.rows, minlength=n)
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+
+        self.row_min = np.full(n, np.nan)
+        self.row_max = np.full(n, np.nan)
+        has = counts > 0
+        if has.any():
+            starts = self.offsets[:-1][has]
+            self.row_min[has] = np.minimum.reduceat(self.values, starts)
+            self.row_max[has] = np.maximum.reduceat(self.values, starts)
+
+        order = np.argsort(self.values, kind='stable')
+        self.sorted_values = self.values[order]
+        self.sorted_rows = self.rows[order]
+
+    @classmethod
+    def from_series(cls, series):
+        values, rows = extract_numbers(series)
+        return cls(values, rows, len(series))
+
+    def replace(self, positions, series):
+        # index ใหม่ที่แถว positions เปลี่ยนเป็นค่าใน series (เรียงตาม positions) แถวอื่นใช้ตัวเลขเดิม
+        # ดึงตัวเลข (regex ทีละแถว) แค่แถวที่เปลี่ยน ที่เหลือเป็นการตัด/ต่อ/เรียง array ของ numpy
+        # ไม่แก้ตัวเดิม (ตัวเดิมอาจมีคนใช้อยู่)
+        positions = np.asarray(positions, dtype=np.int64)
+        values, local = extract_numbers(series)
+        changed = np.zeros(self.n, dtype=bool)
+        changed[positions] = True
+        keep = ~changed[self.rows]
+        rows = np.concatenate([self.rows[keep], positions[local]])
+        values = np.concatenate([self.values[keep], values])
+        order = np.argsort(rows, kind='stable')
+        return NumericIndex(values[order], rows[order], self.n)
+
+    def numbers(self, i):
+        return self.values[self.offsets[i]:self.offsets[i + 1]]
+
+    def range_mask(self, conditions):
+        # แถวผ่านถ้ามี "ตัวเลขสักตัว" ที่ผ่านทุกเงื่อนไข (conditions = [(op, limit)] AND กัน)
+        # รวมเงื่อนไขเป็นช่วงเดียว [lo, hi] แล้วหาใน sorted_values ด้วย searchsorted
+        lo, lo_side = -np.inf, 'left'
+        hi, hi_side = np.inf, 'right'
+        for op, limit in conditions:
+            if op in ('gt', 'gte'):
+                side = 'right' if op == 'gt' else 'left'
+                if limit > lo or (limit == lo and side == 'right'): lo, lo_side = limit, side
+            elif op in ('lt', 'lte'):
+                side = 'left' if op == 'lt' else 'right'
+                if limit < hi or (limit == hi and side == 'left'): hi, hi_side = limit, side
+        start = np.searchsorted(self.sorted_values, lo, side=lo_side)
+        end = np.searchsorted(self.sorted_values, hi, side=hi_side)
+        mask = np.zeros(self.n, dtype=bool)
+        if start < end: mask[self.sorted_rows[start:end]] = True
+        return mask
@@ -0,0 +1,56 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_query(query):
+    # ตัวเล็ก + ยุบช่องว่าง ("แอร์  12000 BTU" กับ "แอร์ 12000 btu" ถือเป็นคำค้นเดียวกัน)
+    return " ".join(str(query).lower().split())
+
+
+def fingerprint(*parts):
+    # ลายนิ้วมือสั้นๆ ของ context (ยี่ห้อ/ประเภท/ชนิดที่รู้จัก) ถ้า context เปลี่ยน แคชเก่าจะไม่ถูกใช้
+    h = hashlib.sha1()
+    for p in parts:
+        h.update(str(p).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class PlanCache:
+    # ---------------------------------------------------------
+    # แคช LRU + TTL ของ Filter JSON ที่ ask_gemini_filter ได้จาก AI (ใช้ร่วมกันทุก session)
+    # คีย์ = (คำค้นที่ normalize แล้ว, fingerprint ของ context)
+    # ---------------------------------------------------------
+    def __init__(self, max_entries=256, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and time.time() - entry[0] > self.ttl:
+                del self._data[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (time.time(), copy.deepcopy(value))
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
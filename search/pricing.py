@@ -0,0 +1,174 @@
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from search.plan_cache import fingerprint
+
+# ตาราง Margin ของ Tab 1 (%)
+DEFAULT_MARGINS = (3, 5, 8, 10, 12, 15, 18, 25, 30)
+# ตัวอย่างกฎปัดราคาขายขึ้นตามช่วงราคา: (ราคาต่ำกว่า, ปัดขึ้นทีละ) / ช่วงสุดท้าย limit = None / step 0 = ไม่ปัด
+# ค่าเริ่มต้นไม่ปัด (ราคาเท่าเดิม) ต้องตั้ง rounding ใน secrets [pricing] เองถ้าจะใช้
+EXAMPLE_ROUNDING = ((1000, 10), (10000, 50), (None, 100))
+
+# คอลัมน์ที่ใช้จับกฎ (ใช้คอลัมน์แรกที่มีในตาราง)
+BRAND_COLS = ('ยี่ห้อ', 'AI_Brand')
+TYPE_COLS = ('AI_Type', 'ชนิด')
+# คอลัมน์ของตารางราคาทั้งร้าน
+LIST_COLS = ['รหัสสินค้า', 'รายละเอียดสินค้า', 'ยี่ห้อ', 'AI_Type', 'ราคาทุนต่อหน่วย', 'จำนวนสต้อก']
+
+
+def rule_key(value):
+    # ชื่อยี่ห้อ/ประเภทเทียบแบบตัดช่องว่าง + ตัวพิมพ์ใหญ่ ("Samsung " = "SAMSUNG")
+    return str(value).strip().upper()
+
+
+def round_prices(prices, rounding=()):
+    # ปัดราคาขึ้นทั้ง array ทีเดียว (ขนาดก้าวขึ้นกับช่วงราคาของแต่ละช่อง)
+    prices = np.asarray(prices, dtype=np.float64)
+    if not rounding: return prices
+    bands = [(lim, step) for lim, step in rounding if lim is not None]
+    last = next((step for lim, step in rounding if lim is None), 0)
+    # มีแต่ช่วงไม่จำกัด (None, step) -> ก้าวเดียวทั้งตาราง (np.select รับ list ว่างไม่ได้)
+    step = np.select([prices < lim for lim, _ in bands], [step for _, step in bands], default=last) \
+        if bands else np.full(prices.shape, float(last))
+    safe = np.where(step > 0, step, 1)
+    # ลบ epsilon กันเศษทศนิยม (1000 * 1.12 = 1120.0000000000002 ไม่ต้องปัดเป็น 1130)
+    return np.where(step > 0, np.ceil(prices / safe - 1e-9) * safe, prices) + 0.0
+
+
+def _rounding_band(limit, step):
+    # (ราคาต่ำกว่า, ปัดขึ้นทีละ) -> float / ไม่ใส่ limit (None, '') = ช่วงสุดท้ายไม่จำกัด
+    # limit 0 หรือติดลบไม่มีราคาไหนต่ำกว่า (เคยถูกตีความเป็น "ไม่จำกัด" เงียบๆ) จึงไม่รับ
+    if limit is None or (isinstance(limit, str) and not limit.strip()):
+        limit = None
+    else:
+        limit = float(limit)
+        if not limit > 0: raise ValueError(f"rounding limit must be > 0 or empty, got {limit:g}")
+    step = float(step)
+    if not step >= 0: raise ValueError(f"rounding step must be >= 0, got {step:g}")
+    return limit, step
+
+
+class PriceRules:
+    # ---------------------------------------------------------
+    # กฎตั้งราคาขาย 1 ชุด (อ่านอย่างเดียว)
+    # - default_margin : กำไร % ปกติ
+    # - brand / types  : กำไร % เฉพาะยี่ห้อ / ประเภทสินค้า (ประเภทสำคัญกว่ายี่ห้อ)
+    # - rounding       : ปัดราคาขายขึ้นตามช่วงราคา (ดู EXAMPLE_ROUNDING / ว่าง = ไม่ปัด) limit ต้อง > 0 หรือ None
+    #                    ไม่งั้น ValueError
+    # - margins        : คอลัมน์ของตาราง Margin
+    # version = ลายนิ้วมือของกฎทั้งชุด ใช้เป็นคีย์แคชตารางราคา (แก้กฎ = รุ่นใหม่)
+    # ---------------------------------------------------------
+    def __init__(self, default_margin=12, brand=None, types=None, rounding=(), margins=DEFAULT_MARGINS):
+        self.default_margin = float(default_margin)
+        self.brand = {rule_key(k): float(v) for k, v in (brand or {}).items() if rule_key(k)}
+        self.types = {rule_key(k): float(v) for k, v in (types or {}).items() if rule_key(k)}
+        bands = [_rounding_band(lim, step) for lim, step in (rounding or ())]
+        self.rounding = tuple(sorted(bands, key=lambda b: float('inf') if b[0] is None else b[0]))
+        self.margins = tuple(float(m) for m in margins)
+        self.version = fingerprint(json.dumps(
+            [self.default_margin, self.brand, self.types, self.rounding, self.margins], sort_keys=True, ensure_ascii=False))
+
+    @classmethod
+    def from_config(cls, config):
+        # อ่านจาก secrets ส่วน [pricing] (ไม่มีก็ใช้ค่าเริ่มต้น)
+        config = dict(config or {})
+        return cls(
+            default_margin=config.get("default_margin", 12),
+            brand=dict(config.get("brand", {})),
+            types=dict(config.get("type", {})),
+            rounding=[tuple(b) for b in config.get("rounding", ())],
+            margins=config.get("margins", DEFAULT_MARGINS),
+        )
+
+    def _match(self, df, columns, rules):
+        # กำไร % ตามกฎของคอลัมน์แรกที่มีในตาราง (NaN = ไม่มีกฎ)
+        col = next((c for c in columns if c in df.columns), None)
+        if col is None or not rules: return np.full(len(df), np.nan)
+        # จับกฎแค่ค่าที่ไม่ซ้ำ (categorical ใช้ categories ได้เลย) แล้วกระจายกลับทุกแถวด้วย codes
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+        else:
+            codes, uniques = pd.factorize(series)
+        values = np.array([rules.get(rule_key(u), np.nan) for u in uniques] + [np.nan], dtype=np.float64)
+        # code -1 (ค่าว่าง) ชี้ไปช่องสุดท้าย = NaN
+        return values[codes]
+
+    def margins_for(self, df):
+        # กำไร % ของทุกแถว: ประเภท -> ยี่ห้อ -> ค่าปกติ
+        brand = self._match(df, BRAND_COLS, self.brand)
+        types = self._match(df, TYPE_COLS, self.types)
+        return np.where(~np.isnan(types), types, np.where(~np.isnan(brand), brand, self.default_margin))
+
+
+class PriceList:
+    # ---------------------------------------------------------
+    # ราคาขายทั้งร้านตามกฎ 1 ชุด (คำนวณทีเดียวทั้งตาราง แถวตรงกับตารางที่ส่งเข้ามา)
+    # - table : รหัส/ชื่อ/ยี่ห้อ/ทุน/สต้อก + กำไร % ตามกฎ + ราคาขาย (ปัดแล้ว) + กำไร (บาท)
+    # - grid  : ราคาขาย (ปัดแล้ว) ของทุกแถว x rules.margins = ทุน[:, None] * (1 + margins / 100)
+    # ---------------------------------------------------------
+    def __init__(self, df, rules):
+        self.rules = rules
+        self.version = rules.version
+        cost = pd.to_numeric(df['ราคาทุนต่อหน่วย'], errors='coerce').fillna(0).to_numpy(dtype=np.float64) \
+            if 'ราคาทุนต่อหน่วย' in df.columns else np.zeros(len(df))
+        margin = rules.margins_for(df)
+        sell = round_prices(cost * (1 + margin / 100), rules.rounding)
+        margins = np.asarray(rules.margins, dtype=np.float64)
+        self.grid = round_prices(cost[:, None] * (1 + margins[None, :] / 100), rules.rounding)
+
+        table = pd.DataFrame({c: df[c].to_numpy() for c in LIST_COLS if c in df.columns})
+        table['ราคาทุนต่อหน่วย'] = cost
+        table['กำไร %'] = margin
+        table['ราคาขาย'] = sell
+        table['กำไร (บาท)'] = sell - cost
+        self.table = table
+
+    def __len__(self):
+        return len(self.table)
+
+    def margin_table(self, pos):
+        # ตาราง Margin ของสินค้า 1 แถว (แถวละ 1 ระดับกำไร)
+        cost = self.table['ราคาทุนต่อหน่วย'].iat[pos]
+        sell = self.grid[pos]
+        return pd.DataFrame({"กำไร %": self.rules.margins, "ราคาขาย": sell, "กำไร (บาท)": sell - cost})
+
+    def between(self, low=None, high=None):
+        # mask ของแถวที่ราคาขายอยู่ในช่วง (ไม่ส่ง = ไม่จำกัด)
+        sell = self.table['ราคาขาย'].to_numpy()
+        mask = np.ones(len(sell), dtype=bool)
+        if low is not None: mask &= sell >= low
+        if high is not None: mask &= sell <= high
+        return mask
+
+
+class PriceListCache:
+    # แคชตารางราคาต่อ (ตาราง, rules.version) เก็บไม่เกิน max_entries ชุดกฎ (ตารางเปลี่ยน = ล้างทั้งหมด)
+    # ใช้ร่วมกันทุก session: คำนวณใต้ lock ชุดกฎเดียวกันจะได้ไม่คำนวณซ้ำพร้อมกัน
+    def __init__(self, max_entries=8):
+        self.max_entries = max_entries
+        self._df = None
+        self._lists = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, df, rules):
+        with self._lock:
+            return self._get(df, rules)
+
+    def _get(self, df, rules):
+        if df is not self._df:
+            self._df = df
+            self._lists = OrderedDict()
+        built = self._lists.get(rules.version)
+        if built is None:
+            built = PriceList(df, rules)
+            self._lists[rules.version] = built
+            while len(self._lists) > self.max_entries:
+                self._lists.popitem(last=False)
+        else:
+            self._lists.move_to_end(rules.version)
+        return built
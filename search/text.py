@@ -0,0 +1,9 @@
+import re
+
+_NON_ALNUM = re.compile(r'[^a-zA-Z0-9]')
+
+
+def clean_text(text):
+    # ตัดทุกอย่างที่ไม่ใช่ a-z/0-9 ออก แล้วทำเป็นตัวเล็ก (เช่น "RT-20 " -> "rt20")
+    if not text: return ""
+    return _NON_ALNUM.sub('', str(text)).lower()
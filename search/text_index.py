@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+# ถ้าค่าไม่ซ้ำกันไม่เกินสัดส่วนนี้ของจำนวนแถว (เช่น ยี่ห้อ/ประเภท/ชนิด) จะทำ inverted index ตามค่า
+VOCAB_RATIO = 0.5
+
+
+def normalize_text_column(series):
+    # ตัวเล็ก + ไม่มีช่องว่าง (แบบเดียวกับค่าที่ใช้ค้น)
+    # (astype(object) ก่อน เพราะคอลัมน์ category ใส่ '' ที่ไม่อยู่ในหมวดไม่ได้)
+    return series.astype(object).fillna('').astype(str).str.lower().str.replace(" ", "", regex=False)
+
+
+class TextColumnIndex:
+    # ---------------------------------------------------------
+    # คอลัมน์ข้อความที่ normalize แล้ว (สร้างครั้งเดียวตอน merge_data) สำหรับเงื่อนไข contains
+    # - คอลัมน์ค่าซ้ำเยอะ (AI_Brand, AI_Type, ...) : ค่า -> แถว (inverted index)
+    #   ค้น "haier" = ไล่ดูแค่ค่าที่ไม่ซ้ำ (หลักสิบ-ร้อย) แล้วหยิบแถวของค่านั้น ไม่ต้องสแกนทั้งคอลัมน์
+    # - คอลัมน์ค่าไม่ซ้ำ (รายละเอียดสินค้า) : เก็บคอลัมน์ที่ normalize แล้ว ใช้ str.contains ตรงๆ
+    # ---------------------------------------------------------
+    def __init__(self, series):
+        norm = normalize_text_column(series).reset_index(drop=True)
+        codes, uniques = pd.factorize(norm)
+        vocab = [str(v) for v in uniques]
+        if len(vocab) <= max(1, len(norm) * VOCAB_RATIO):
+            self._set_vocab(vocab, codes)
+        else:
+            self._set_norm(norm)
+
+    def _set_vocab(self, vocab, codes):
+        # แถวของแต่ละค่าเรียงต่อกัน: rows[starts[c]:starts[c+1]] = แถวที่มีค่า vocab[c]
+        self.n = len(codes)
+        self.vocab = vocab
+        self.norm = None
+        self.rows = np.argsort(codes, kind='stable')
+        self.starts = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(vocab)))])
+        self._memo = {}
+
+    def _set_norm(self, norm):
+        self.n = len(norm)
+        self.vocab = None
+        self.norm = norm
+        self.rows = self.starts = None
+        self._memo = {}
+
+    def replace(self, positions, series):
+        # ---------------------------------------------------------
+        # index ใหม่ที่แถว positions เปลี่ยนเป็นค่าใน series (เรียงตาม positions) ใช้ตอนต่อท้ายความจำ AI
+        # normalize แค่แถวที่เปลี่ยน ที่เหลือเป็นงาน array ของ numpy / ไม่แก้ตัวเดิม (อาจมีคนใช้อยู่)
+        # ใช้แบบเดิมต่อ (inverted index / คอลัมน์ normalize) ไม่คิดสัดส่วนค่าไม่ซ้ำใหม่ ผลค้นเหมือนกันทั้งสองแบบ
+        # ---------------------------------------------------------
+        positions = np.asarray(positions, dtype=np.int64)
+        fresh = normalize_text_column(series).tolist()
+        out = TextColumnIndex.__new__(TextColumnIndex)
+        if self.norm is not None:
+            norm = self.norm.copy()
+            norm.iloc[positions] = fresh
+            out._set_norm(norm)
+            return out
+        codes = np.empty(self.n, dtype=np.int64)
+        codes[self.rows] = np.repeat(np.arange(len(self.vocab)), np.diff(self.starts))
+        vocab = list(self.vocab)
+        lookup = {v: c for c, v in enumerate(vocab)}
+        for pos, value in zip(positions.tolist(), fresh):
+            if value not in lookup:
+                lookup[value] = len(vocab)
+                vocab.append(value)
+            codes[pos] = lookup[value]
+        # ค่าที่ไม่เหลือแถวแล้วยังอยู่ใน vocab ได้ (แค่ไม่มีแถวให้หยิบ)
+        out._set_vocab(vocab, codes)
+        return out
+
+    def contains_mask(self, t_val):
+        # mask ของแถวที่มี t_val (normalize แล้ว) อยู่ในค่า
+        mask = np.zeros(self.n, dtype=bool)
+        if self.norm is not None:
+            mask |= self.norm.str.contains(t_val, regex=False).to_numpy(dtype=bool)
+            return mask
+        codes = self._memo.get(t_val)
+        if codes is None:
+            codes = [c for c, v in enumerate(self.vocab) if t_val in v]
+            self._memo[t_val] = codes
+        for c in codes:
+            mask[self.rows[self.starts[c]:self.starts[c + 1]]] = True
+        return mask
@@ -0,0 +1,4 @@
+# ---------------------------------------------------------
+# services: ตัวเชื่อม Google API (connection pool + discovery บนเครื่อง)
+# ---------------------------------------------------------
+from services.transport import HttpPool, build_service
@@ -0,0 +1,98 @@
+import json
+import os
+import queue
+from contextlib import contextmanager
+
+import google_auth_httplib2
+import httplib2
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.http import HttpRequest
+
+from perf import span
+
+
+class HttpPool:
+    # ---------------------------------------------------------
+    # กอง httplib2.Http ที่ยืนยันตัวตนแล้ว ใช้ซ้ำข้ามคำขอ (connection แบบ keep-alive ไม่ต้อง TLS ใหม่ทุกครั้ง)
+    # httplib2.Http ใช้พร้อมกันหลาย thread ไม่ได้ เลยให้ยืมทีละคำขอแล้วคืนเข้ากอง
+    # ---------------------------------------------------------
+    def __init__(self, credentials, size=8, timeout=60):
+        self.credentials = credentials
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+
+    def _new(self):
+        return google_auth_httplib2.AuthorizedHttp(self.credentials, http=httplib2.Http(timeout=self.timeout))
+
+    @contextmanager
+    def borrow(self):
+        try:
+            http = self._idle.get_nowait()
+        except queue.Empty:
+            http = self._new()
+        try:
+            yield http
+        finally:
+            if self._idle.qsize() < self.size: self._idle.put(http)
+
+    def request_builder(self, http, *args, **kwargs):
+        # ใช้เป็น requestBuilder ของ build(): ทุกคำขอยืม connection จากกองตอน execute
+        return PooledRequest(self, http, *args, **kwargs)
+
+
+class PooledRequest(HttpRequest):
+    def __init__(self, pool, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = pool
+
+    def execute(self, http=None, num_retries=0):
+        # ทุกคำขอ Google ถูกจับเวลาอัตโนมัติ (ชื่อ span = google.<methodId> เช่น google.sheets.spreadsheets.values.batchGet)
+        with span(f"google.{self.methodId}", bytes_out=len(self.body or "")) as sp:
+            if http is not None:
+                result = super().execute(http=http, num_retries=num_retries)
+            else:
+                with self.pool.borrow() as pooled:
+                    result = super().execute(http=pooled, num_retries=num_retries)
+            if isinstance(result, dict):
+                sp["rows"] = _count_rows(result)
+            return result
+
+
+def _count_rows(result):
+    # จำนวนแถวที่ได้กลับมา (values / batchGet) ไว้ดูขนาดข้อมูลคู่กับเวลา
+    if "values" in result: return len(result["values"])
+    if "valueRanges" in result: return sum(len(vr.get("values", [])) for vr in result["valueRanges"])
+    return None
+
+
+def build_service(name, version, pool, cache_dir):
+    # ---------------------------------------------------------
+    # สร้าง client โดยไม่ต้องโหลด discovery document จากเน็ต
+    # - google-api-python-client 2.x มีไฟล์ discovery ติดมากับ library (static_discovery)
+    # - รุ่นเก่ากว่านั้น: โหลดครั้งแรกครั้งเดียวแล้วเก็บไว้ใน cache_dir
+    # ---------------------------------------------------------
+    with pool.borrow() as http:
+        options = dict(http=http, requestBuilder=pool.request_builder)
+        try:
+            return build(name, version, cache_discovery=False, static_discovery=True, **options)
+        except TypeError:
+            pass
+
+        path = os.path.join(cache_dir, f"{name}.{version}.json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                return build_from_document(f.read(), **options)
+        except (OSError, ValueError):
+            pass
+        service = build(name, version, cache_discovery=False, **options)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(service._rootDesc, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Discovery Cache Error: {e}")
+        return service
+
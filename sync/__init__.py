@@ -0,0 +1,6 @@
+# ---------------------------------------------------------
+# sync: ดึงข้อมูลจาก Google Sheets เข้าสถานะกลาง (เช็ค Drive modifiedTime / ดึงแค่หาง AI_Memory)
+# ไม่ผูกกับ Streamlit: ส่ง sheets/drive service เข้ามาเอง (แอปใช้ของจริง bench/tests ใช้ของปลอม)
+# ---------------------------------------------------------
+from sync.sheets import (META_KEYS, SYNC_FULL_SECONDS, batch_get_values, memory_range, new_sync_state, refresh_data,
+                         sync_memory)
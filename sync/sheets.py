@@ -0,0 +1,162 @@
+import hashlib
+import json
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from perf import traced
+from search.frames import MEM_COLS, frame_main, frame_memory, pad_row
+
+# โหลดตารางหลัก (A:H) ใหม่ทั้งก้อนอย่างน้อยทุก 10 นาที (เท่ากับ ttl เดิม)
+SYNC_FULL_SECONDS = 600
+# ค่าใน state ที่บอกว่า "data" ชุดปัจจุบันมาจากชีตรุ่นไหน (เก็บคู่กับ snapshot บนดิสก์)
+# main_hash = ลายนิ้วมือของค่า A:H ชุดที่ใช้สร้าง df_main (โหลดเต็มรอบใหม่ได้ค่าเดิม -> ใช้ df_main ตัวเดิม)
+META_KEYS = ("modified", "main_at", "main_hash", "mem_rows", "mem_last", "file_name", "last_update")
+
+
+def new_sync_state():
+    # สถานะการซิงก์ที่ refresh_data อ่าน/เขียน (แอปเติมของอื่นเพิ่มเอง เช่น lock / thread / แคช)
+    # "data" = (df_main, df_mem, file_name, last_update) เปลี่ยนทั้งก้อนทีเดียว / "version" เพิ่มทุกครั้งที่เปลี่ยน
+    return {
+        "data": None, "version": 0,
+        "modified": None, "checked_at": 0.0, "main_at": 0.0, "main_hash": None,
+        "mem_rows": 0, "mem_last": None, "file_name": None, "last_update": None,
+        "force": False, "force_full": False, "mem_appended": False,
+    }
+
+
+def batch_get_values(sheets_service, spreadsheet_id, ranges):
+    # ดึงหลายช่วงในคำขอเดียว (values().batchGet) คืน list ของค่าในแต่ละช่วง เรียงตาม ranges
+    res = sheets_service.spreadsheets().values().batchGet(spreadsheetId=spreadsheet_id, ranges=list(ranges)).execute()
+    value_ranges = res.get('valueRanges', [])
+    return [vr.get('values', []) for vr in value_ranges] + [[]] * (len(ranges) - len(value_ranges))
+
+
+def _fetch_ranges(sheets_service, spreadsheet_id, ranges):
+    # ดึงทุกช่วงที่ต้องใช้ใน round trip เดียว (batchGet) คืน dict ช่วง -> ค่า
+    # ถ้า batchGet พัง (เช่น ยังไม่มีแท็บ AI_Memory) คืน {} ให้ไปดึงทีละช่วงแบบเดิม จะได้รู้ว่าช่วงไหนพัง
+    try:
+        return dict(zip(ranges, batch_get_values(sheets_service, spreadsheet_id, ranges)))
+    except Exception as e:
+        print(f"Batch Get Error: {e}")
+        return {}
+
+
+def _get_range(sheets_service, spreadsheet_id, fetched, range_name):
+    if range_name in fetched: return fetched[range_name]
+    res = sheets_service.spreadsheets().values().get(spreadsheetId=spreadsheet_id, range=range_name).execute()
+    return res.get('values', [])
+
+
+def values_hash(values):
+    # ลายนิ้วมือของค่าดิบจากชีต (list ของแถว) ไว้เช็คว่าโหลดมาใหม่แล้วได้ของเดิมหรือไม่
+    return hashlib.sha1(json.dumps(values, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _same_row(a, b):
+    # เทียบแถวจากชีต (API ตัดช่องว่างท้ายแถวทิ้ง เลยต้องถือว่า None == '')
+    return [x or '' for x in a] == [x or '' for x in b]
+
+
+def memory_range(state, df_mem, full):
+    # ช่วงที่ต้องดึงของ AI_Memory: ถ้าเคยโหลดแล้วและไม่ได้สั่งโหลดเต็ม ดึงแค่ "หาง" ที่ต่อท้ายมาใหม่
+    # (เริ่มจากแถวสุดท้ายที่รู้จัก เพื่อเช็คว่าแถวเดิมยังอยู่ที่เดิม ไม่ได้ถูกลบ/เลื่อน)
+    if not full and df_mem is not None and state["mem_last"] is not None:
+        return f"AI_Memory!A{state['mem_rows']}:F"
+    # 🔥 ดึงข้อมูลถึงคอลัมน์ F (เพื่อให้ได้ AI_Kind)
+    return "AI_Memory!A:F"
+
+
+def sync_memory(state, df_mem, full, fetch):
+    # fetch(range) -> ค่าในช่วงนั้น (อาจได้มาแล้วจาก batchGet)
+    # คืน (df_mem, จำนวนแถวในชีตรวมหัวตาราง, แถวสุดท้าย)
+    mem_rows, mem_last = state["mem_rows"], state["mem_last"]
+    mem_range = memory_range(state, df_mem, full)
+
+    if mem_range != "AI_Memory!A:F":
+        tail = fetch(mem_range)
+        width = len(df_mem.columns)
+        if tail and _same_row(pad_row(tail[0], width), mem_last):
+            new_rows = [pad_row(r, width) for r in tail[1:]]
+            if new_rows:
+                df_new = pd.DataFrame(new_rows, columns=df_mem.columns)
+                df_mem = pd.concat([df_mem, df_new], ignore_index=True)
+                mem_last = new_rows[-1]
+            return df_mem, mem_rows + len(new_rows), mem_last
+        print("Memory tail mismatch -> full reload")
+
+    return frame_memory(fetch("AI_Memory!A:F"))
+
+
+@traced("refresh_data")
+def refresh_data(state, sheets_service, drive_service, spreadsheet_id, warm=None, full_seconds=SYNC_FULL_SECONDS):
+    # ---------------------------------------------------------
+    # ดึงข้อมูลจาก Google เข้า state (ผู้เรียกต้องกัน ไม่ให้เรียกซ้อนกัน) คืนข้อมูลชุดใหม่ หรือ raise ถ้า API พัง
+    # ไฟล์ไม่เปลี่ยนและยังไม่ครบรอบโหลดเต็ม -> คืน state["data"] ตัวเดิม (ผู้เรียกเช็คด้วย is)
+    # warm(data) : เรียกก่อนสลับข้อมูลชุดใหม่เข้า state (เตรียม Index ให้พร้อมก่อนผู้ใช้เห็น)
+    # ---------------------------------------------------------
+    force, force_full, mem_appended = state["force"], state["force_full"], state["mem_appended"]
+    state["force"] = state["force_full"] = state["mem_appended"] = False
+    data = state["data"]
+    now = time.time()
+    try:
+        # Metadata (ถูกมาก ใช้ตัดสินว่าต้องโหลดอะไรบ้าง)
+        file_meta = drive_service.files().get(fileId=spreadsheet_id, fields="name, modifiedTime").execute()
+        modified = file_meta.get('modifiedTime')
+        state["checked_at"] = now
+        full = force_full or data is None
+
+        # ไฟล์ไม่เปลี่ยน -> ไม่ต้องดาวน์โหลดค่าในชีตเลย
+        # ยกเว้นมีคนสั่ง (mark_data_dirty): modifiedTime ของ Drive อัปเดตช้ากว่าที่แอปเพิ่งเขียนเองได้
+        # ถ้าเป็น mem_appended จะดึงแค่แถวท้าย AI_Memory (ไม่โหลดตารางหลัก)
+        if not full and not force and modified == state["modified"] and now - state["main_at"] < full_seconds:
+            return data
+
+        file_name = file_meta.get('name')
+        dt = datetime.strptime(modified, "%Y-%m-%dT%H:%M:%S.%fZ")
+        last_update = dt.strftime("%d/%m/%Y %H:%M น.")
+
+        # Main Data: ข้ามได้ถ้าสิ่งที่เปลี่ยนคือแถวที่แอปต่อท้าย AI_Memory เอง (และยังไม่ครบรอบโหลดเต็ม)
+        main_at, main_hash = state["main_at"], state["main_hash"]
+        need_main = full or not mem_appended or now - main_at >= full_seconds
+        old_mem = None if data is None else data[1]
+
+        # ตารางหลัก + AI_Memory มาพร้อมกันใน batchGet เดียว (ประหยัด 1 round trip)
+        ranges = (["A:H"] if need_main else []) + [memory_range(state, old_mem, full)]
+        fetched = _fetch_ranges(sheets_service, spreadsheet_id, ranges)
+        fetch = lambda range_name: _get_range(sheets_service, spreadsheet_id, fetched, range_name)
+
+        df_main = None if data is None else data[0]
+        if need_main:
+            vals_main = fetch("A:H")
+            new_hash = values_hash(vals_main)
+            # ครบรอบโหลดเต็มแต่ค่าในชีตเหมือนเดิม -> ใช้ df_main ตัวเดิม (Index / ตารางรวม / snapshot ไม่ต้องสร้างใหม่)
+            if df_main is None or new_hash != main_hash:
+                df_main = frame_main(vals_main)
+            main_at, main_hash = now, new_hash
+
+        # AI Memory Data
+        try:
+            df_mem, mem_rows, mem_last = sync_memory(state, old_mem, full, fetch)
+        except Exception as e:
+            # กรณี Error ก็สร้างตารางเปล่าที่มี AI_Kind ไว้ก่อน
+            print(f"Load Mem Error: {e}")
+            df_mem, mem_rows, mem_last = pd.DataFrame(columns=MEM_COLS), 0, None
+    except Exception:
+        # ไม่สำเร็จ: คืนธงไว้ให้รอบหน้าทำใหม่
+        state["force"] = state["force"] or force
+        state["force_full"] = state["force_full"] or force_full
+        state["mem_appended"] = state["mem_appended"] or mem_appended
+        raise
+
+    meta = {"modified": modified, "main_at": main_at, "main_hash": main_hash, "mem_rows": mem_rows,
+            "mem_last": mem_last, "file_name": file_name, "last_update": last_update}
+    if data is not None and data[0] is df_main and data[1] is df_mem and data[2:] == (file_name, last_update):
+        # ไม่มีอะไรเปลี่ยนจริง: จำแค่เวลาที่เช็ค แล้วคืนชุดเดิม
+        state.update(meta)
+        return data
+    data = (df_main, df_mem, file_name, last_update)
+    if warm is not None: warm(data)
+    state.update(meta, data=data, version=state["version"] + 1)
+    return data
@@ -0,0 +1,11 @@
+# ---------------------------------------------------------
+# teach: ตัวช่วยงาน "สอน AI" (เรียก Gemini พร้อมกันหลายงาน + คุมอัตราเรียก)
+# ---------------------------------------------------------
+from teach.batching import AdaptiveBatcher
+from teach.cache import ExtractCache, cache_key
+from teach.compaction import delete_row_requests, rows_to_delete
+from teach.extract import (PROMPT_VERSION, build_extract_prompt, default_item, extract_names,
+                           parse_extract_response)
+from teach.pipeline import memory_rows, run_pipeline, teach_items
+from teach.ratelimit import TokenBucket
+from teach.writer import MemoryWriter
@@ -0,0 +1,35 @@
+import threading
+
+
+class AdaptiveBatcher:
+    # ---------------------------------------------------------
+    # ปรับขนาด Batch ตามผลจริง (เพิ่มทีละนิด / ลดลงครึ่งหนึ่ง)
+    # - ตอบครบในรอบเดียวและเร็วกว่า target_seconds -> เพิ่มขนาด ~25%
+    # - มีตัวขาด/ต้องขอซ้ำ -> ลดขนาดลงครึ่งหนึ่ง
+    # ใช้ร่วมกันได้หลาย thread (worker แต่ละตัวเรียก record หลังได้ผล)
+    # ---------------------------------------------------------
+    def __init__(self, size=10, min_size=5, max_size=50, target_seconds=20):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_seconds = target_seconds
+        self.size = max(min_size, min(max_size, size))
+        self._lock = threading.Lock()
+
+    def record(self, n, missing, attempts, seconds, cached=0):
+        # cached = จำนวนที่ได้จากแคช (ไม่ได้ส่งให้ AI) ไม่นับเป็นผลงานของ AI
+        n -= cached
+        with self._lock:
+            if attempts == 0: return self.size
+            if missing or attempts > 1:
+                self.size = max(self.min_size, self.size // 2)
+            elif seconds <= self.target_seconds and n >= self.size:
+                self.size = min(self.max_size, self.size + max(1, self.size // 4))
+            return self.size
+
+    def chunks(self, items):
+        # ตัดแบ่งงานทีละก้อนตามขนาดล่าสุด (run_pipeline ดึงแบบ lazy ขนาดจึงเปลี่ยนระหว่างทางได้)
+        i = 0
+        while i < len(items):
+            size = self.size
+            yield items[i:i + size]
+            i += size
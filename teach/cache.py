@@ -0,0 +1,74 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def normalize_name(name):
+    # ตัวเล็ก + ยุบช่องว่าง (ไม่ตัดภาษาไทยทิ้งแบบ clean_text เพราะชื่อไทยก็เป็นข้อมูลสำคัญ)
+    return " ".join(str(name).lower().split())
+
+
+def cache_key(name, prompt_version, model_name):
+    raw = f"{prompt_version}\0{model_name}\0{normalize_name(name)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ExtractCache:
+    # ---------------------------------------------------------
+    # แคชผลแกะข้อมูลสินค้าของ Gemini บนดิสก์ (SQLite) คีย์ = hash(ชื่อ + เวอร์ชัน prompt + ชื่อโมเดล)
+    # เก็บได้ไม่เกิน max_entries รายการ เกินแล้วลบตัวที่ไม่ได้ใช้นานที่สุดออก (LRU)
+    # ใช้ร่วมกันได้หลาย thread (worker ของงานสอน AI)
+    # ---------------------------------------------------------
+    def __init__(self, path, max_entries=100000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        folder = os.path.dirname(path)
+        if folder: os.makedirs(folder, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS extract ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, used_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS extract_used_at ON extract (used_at)")
+        self._db.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM extract").fetchone()[0]
+
+    def get_many(self, keys):
+        # คืน dict key -> ข้อมูล เฉพาะตัวที่มีในแคช
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                part = keys[i:i + 500]
+                marks = ",".join("?" * len(part))
+                rows = self._db.execute(f"SELECT key, value FROM extract WHERE key IN ({marks})", part).fetchall()
+                found.update((k, json.loads(v)) for k, v in rows)
+            if found:
+                now = time.time()
+                self._db.executemany("UPDATE extract SET used_at = ? WHERE key = ?", [(now, k) for k in found])
+                self._db.commit()
+        return found
+
+    def put_many(self, items):
+        # items = dict key -> ข้อมูล (dict ที่แปลงเป็น JSON ได้)
+        if not items: return
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO extract (key, value, used_at) VALUES (?, ?, ?)",
+                [(k, json.dumps(v, ensure_ascii=False), now) for k, v in items.items()],
+            )
+            count = self._db.execute("SELECT COUNT(*) FROM extract").fetchone()[0]
+            if count > self.max_entries:
+                # ลบให้เหลือ 90% จะได้ไม่ต้องลบทุกครั้งที่เพิ่ม
+                drop = count - int(self.max_entries * 0.9)
+                self._db.execute(
+                    "DELETE FROM extract WHERE key IN (SELECT key FROM extract ORDER BY used_at LIMIT ?)", (drop,)
+                )
+            self._db.commit()
@@ -0,0 +1,35 @@
+def memory_key(sku):
+    # คีย์เทียบ SKU แบบเดียวกับตอนจับคู่ตาราง (ตัดช่องว่าง + ตัวพิมพ์ใหญ่)
+    return str(sku if sku is not None else '').strip().upper()
+
+
+def rows_to_delete(skus, valid_keys):
+    # ---------------------------------------------------------
+    # ตำแหน่งแถวข้อมูล (0 = แถวแรกใต้หัวตาราง) ที่ต้องลบออกจาก AI_Memory
+    # - ขยะ : SKU ไม่มีในตารางหลักแล้ว
+    # - ตัวซ้ำ : SKU เดียวกันหลายแถว เก็บแถวล่าสุดไว้ (keep='last')
+    # ---------------------------------------------------------
+    valid_keys = set(valid_keys)
+    last = {}
+    keys = [memory_key(s) for s in skus]
+    for pos, key in enumerate(keys):
+        last[key] = pos
+    return [pos for pos, key in enumerate(keys) if key not in valid_keys or last[key] != pos]
+
+
+def delete_row_requests(sheet_id, rows, header_rows=1):
+    # แปลงตำแหน่งแถวเป็นคำขอ deleteDimension ของ spreadsheets().batchUpdate
+    # รวมแถวที่ติดกันเป็นช่วงเดียว และเรียงจากล่างขึ้นบน (ลบแล้วแถวข้างบนไม่เลื่อน)
+    ranges = []
+    for pos in sorted(set(rows)):
+        start = pos + header_rows
+        if ranges and ranges[-1][1] == start:
+            ranges[-1][1] = start + 1
+        else:
+            ranges.append([start, start + 1])
+    return [
+        {"deleteDimension": {"range": {
+            "sheetId": sheet_id, "dimension": "ROWS", "startIndex": start, "endIndex": end,
+        }}}
+        for start, end in reversed(ranges)
+    ]
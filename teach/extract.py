@@ -0,0 +1,129 @@
+import json
+import random
+import re
+import time
+
+from perf import span
+from teach.cache import cache_key
+
+# เปลี่ยนเลขนี้ทุกครั้งที่แก้ prompt ด้านล่าง (แคชผลลัพธ์จะได้ไม่เอาคำตอบจาก prompt เก่ามาใช้)
+PROMPT_VERSION = "extract-v2"
+
+# ค่า Default กรณี AI ตอบไม่ได้จริงๆ
+DEFAULT_ITEM = {"AI_Brand": "Unknown", "AI_Type": "Other", "AI_Kind": "", "AI_Spec": "-", "AI_Tags": ""}
+
+
+def default_item():
+    return dict(DEFAULT_ITEM)
+
+
+def build_extract_prompt(batch):
+    # batch = list ของ (id, ชื่อสินค้า) -- ให้ AI ส่ง id กลับมาด้วย จะได้จับคู่ได้แม้ตอบมาไม่ครบ/สลับลำดับ
+    items = [{"id": i, "name": name} for i, name in batch]
+    return f"""
+    Extract product info from this list:
+    {json.dumps(items, ensure_ascii=False)}
+
+    Return JSON Array with one object per input item, with these keys:
+    - id (Copy the "id" of the input item exactly)
+    - AI_Brand (Use Uppercase e.g. SAMSUNG)
+    - AI_Type (Category in Thai e.g. เครื่องซักผ้า, ทีวี)
+    - AI_Kind (Sub-type in Thai e.g. ฝาบน, 2 ถัง. If unknown use "")
+    - AI_Spec (Capacity/Size e.g. 10 kg, 55 นิ้ว)
+    - AI_Tags (Features e.g. inverter, smart tv)
+
+    Response Format: JSON Array ONLY. No Markdown.
+    """
+
+
+def normalize_item(item):
+    new_item = {
+        "AI_Brand": item.get("AI_Brand") or "Unknown",
+        "AI_Type": item.get("AI_Type") or "Other",
+        "AI_Kind": item.get("AI_Kind") or "",
+        "AI_Spec": item.get("AI_Spec") or "-",
+        "AI_Tags": item.get("AI_Tags") or ""
+    }
+    if isinstance(new_item["AI_Tags"], list):
+        new_item["AI_Tags"] = ", ".join(str(t) for t in new_item["AI_Tags"])
+    return new_item
+
+
+def parse_extract_response(text, ids):
+    # คืน dict id -> ข้อมูลที่ normalize แล้ว เฉพาะตัวที่ตอบมาถูกต้อง (ตัวที่ขาด/ผิดจะไม่อยู่ใน dict)
+    # ถ้า AI ลืมใส่ id แต่ตอบมาครบจำนวนพอดี ให้จับคู่ตามลำดับแทน
+    txt_clean = re.sub(r"```json|```", "", text.strip()).strip()
+    data = json.loads(txt_clean)
+    if isinstance(data, dict): data = [data]
+    if not isinstance(data, list): raise ValueError("Response is not a JSON array")
+
+    wanted = set(ids)
+    found = {}
+    no_id = []
+    for item in data:
+        if not isinstance(item, dict): continue
+        raw_id = item.get("id")
+        try:
+            item_id = int(raw_id)
+        except (TypeError, ValueError):
+            no_id.append(item)
+            continue
+        if item_id in wanted and item_id not in found:
+            found[item_id] = normalize_item(item)
+
+    if not found and len(no_id) == len(ids):
+        found = {i: normalize_item(item) for i, item in zip(ids, no_id)}
+    return found
+
+
+def extract_names(model, names, cache=None, stats=None, generation_config=None, limiter=None,
+                  max_retries=3, base_delay=5.0, max_delay=60.0):
+    # ---------------------------------------------------------
+    # แกะข้อมูลสินค้าจากชื่อด้วย Gemini คืน list ตามลำดับ names (ตัวที่ไม่ได้จริงๆ ใช้ default_item)
+    # - model  : อะไรก็ได้ที่มี generate_content(prompt, generation_config=...) -> .text (+ model_name)
+    # - cache  : ExtractCache (ตัวที่เคยแกะแล้ว ไม่ส่งให้ AI อีก) ไม่ส่ง = ไม่ใช้แคช
+    # - stats  : dict ที่จะได้ attempts / missing / seconds / cached กลับไป ใช้ปรับขนาด Batch
+    # - limiter: TokenBucket ขอ token ก่อนเรียก AI "ทุกครั้ง" รวมรอบที่ลองใหม่หลังโดน 429 (ตัวที่ได้จากแคชไม่กิน token)
+    # ลองสูงสุด max_retries รอบ รอบถัดไปขอใหม่เฉพาะตัวที่ยังขาด ไม่ทิ้งตัวที่ได้แล้ว
+    # Error -> รอแบบ exponential backoff + jitter (base_delay, 2x, 4x ... ไม่เกิน max_delay) worker จะได้ไม่ยิงพร้อมกัน
+    # ไม่เรียก st.* (รันใน worker thread ของ run_pipeline)
+    # ---------------------------------------------------------
+    if not names: return []
+
+    model_name = getattr(model, 'model_name', '')
+    keys = [cache_key(n, PROMPT_VERSION, model_name) for n in names]
+    hits = cache.get_many(keys) if cache is not None else {}
+    results = {i: hits[k] for i, k in enumerate(keys) if k in hits}
+    cached = len(results)
+    pending = [i for i in range(len(names)) if i not in results]
+    started = time.time()
+    attempts = 0
+
+    for attempt in range(max_retries):
+        if not pending: break
+        batch = [(i, names[i]) for i in pending]
+        attempts += 1
+        if limiter is not None: limiter.acquire()
+        try:
+            prompt = build_extract_prompt(batch)
+            with span("gemini.extract", items=len(batch), bytes_out=len(prompt), retries=attempt, cache_hits=cached) as sp:
+                response = model.generate_content(prompt, generation_config=generation_config)
+                sp["bytes_in"] = len(response.text)
+            got = parse_extract_response(response.text, pending)
+            results.update(got)
+            if cache is not None: cache.put_many({keys[i]: item for i, item in got.items()})
+            pending = [i for i in pending if i not in results]
+            if not pending: break
+
+            # ได้มาไม่ครบ (เช่นส่งไป 10 กลับมา 5) เก็บตัวที่ได้ไว้ แล้วขอเฉพาะตัวที่ขาด
+            print(f"⚠️ จำนวนไม่ครบ ({len(got)}/{len(batch)}) ขอใหม่เฉพาะ {len(pending)} รายการที่ขาด...")
+
+        except Exception as e:
+            if attempt == max_retries - 1: break
+            wait_time = min(max_delay, base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+            print(f"⚠️ AI Error (รอบ {attempt+1}): {e} ... รอ {wait_time:.1f} วินาที")
+            time.sleep(wait_time)
+
+    if stats is not None:
+        stats.update(attempts=attempts, missing=len(pending), seconds=time.time() - started, cached=cached)
+    return [results[i] if i in results else default_item() for i in range(len(names))]
@@ -0,0 +1,72 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from teach.extract import extract_names
+
+# คอลัมน์ของแท็บ AI_Memory ต่อจาก SKU (ลำดับเดียวกับในชีต)
+MEMORY_FIELDS = ('AI_Brand', 'AI_Type', 'AI_Spec', 'AI_Tags', 'AI_Kind')
+MEMORY_DEFAULTS = {'AI_Brand': 'Unknown', 'AI_Type': 'Other', 'AI_Spec': '-'}
+
+
+def run_pipeline(chunks, extract, workers=4, limiter=None):
+    # ---------------------------------------------------------
+    # เรียก extract(chunk) พร้อมกันสูงสุด workers งาน (ขอ token จาก limiter ก่อนทุกครั้ง)
+    # yield (chunk, ผลลัพธ์) ตามลำดับที่เสร็จ ให้ฝั่งเรียกเอาไปบันทึก/อัปเดตหน้าจอเอง
+    # (Streamlit เขียนหน้าจอได้จาก thread หลักเท่านั้น เลยไม่บันทึกใน worker)
+    # ---------------------------------------------------------
+    def task(chunk):
+        if limiter is not None: limiter.acquire()
+        return extract(chunk)
+
+    chunks = iter(chunks)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight = {}
+
+        def fill():
+            # ส่งงานเข้าคิวไม่เกิน workers * 2 งาน (ไม่สร้าง future ทั้งหมดรวดเดียว)
+            while len(in_flight) < workers * 2:
+                chunk = next(chunks, None)
+                if chunk is None: return
+                in_flight[pool.submit(task, chunk)] = chunk
+
+        fill()
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for fut in done:
+                chunk = in_flight.pop(fut)
+                yield chunk, fut.result()
+            fill()
+
+
+def memory_rows(chunk, results):
+    # แถวที่จะต่อท้าย AI_Memory: [SKU, AI_Brand, AI_Type, AI_Spec, AI_Tags, AI_Kind] (บังคับเป็น String)
+    rows = []
+    for idx, item in enumerate(chunk):
+        ar = results[idx] if idx < len(results) else {}
+        rows.append([str(item['SKU']).strip()] + [str(ar.get(f, MEMORY_DEFAULTS.get(f, ''))) for f in MEMORY_FIELDS])
+    return rows
+
+
+def teach_items(items, model, writer, batcher, workers=4, limiter=None, cache=None, generation_config=None,
+                progress=None, **extract_options):
+    # ---------------------------------------------------------
+    # งาน "สอน AI" ทั้งชุด: แบ่ง items ตาม batcher -> extract_names พร้อมกัน workers งาน -> writer.add
+    # - items    : list ของ dict {SKU, Name, Original_Kind} (ชื่อที่ส่ง AI = "Name Original_Kind")
+    # - limiter  : TokenBucket คุมอัตราเรียก Gemini (ทุกครั้งที่เรียก รวมรอบลองใหม่)
+    # - writer   : MemoryWriter (จดลงดิสก์ก่อน แล้วรวมเป็นก้อนใหญ่ไปบันทึกลงชีตเบื้องหลัง)
+    # - progress : progress(จำนวนที่เสร็จ) เรียกใน thread ของผู้เรียกหลังแต่ละก้อน (อัปเดตหน้าจอได้)
+    # คืนจำนวนรายการที่ทำเสร็จ
+    # ---------------------------------------------------------
+    def extract_chunk(chunk):
+        stats = {}
+        res = extract_names(model, [f"{x['Name']} {x['Original_Kind']}" for x in chunk], cache=cache, stats=stats,
+                            generation_config=generation_config, limiter=limiter, **extract_options)
+        batcher.record(len(chunk), **stats)
+        return res
+
+    done = 0
+    # limiter ส่งให้ extract_names (ขอ token ทุกครั้งที่เรียก AI จริง รวมรอบลองใหม่) ไม่ใช่ run_pipeline ที่ขอแค่ครั้งแรก
+    for chunk, res in run_pipeline(batcher.chunks(items), extract_chunk, workers=workers):
+        writer.add(memory_rows(chunk, res))
+        done += len(chunk)
+        if progress is not None: progress(done)
+    return done
@@ -0,0 +1,33 @@
+import threading
+import time
+
+
+class TokenBucket:
+    # ---------------------------------------------------------
+    # Token bucket แบบ thread-safe: เติม rate token ต่อวินาที เก็บได้สูงสุด capacity
+    # acquire() จะรอจนมี token (แทน time.sleep(3) ตายตัวหลังทุก Batch)
+    # ---------------------------------------------------------
+    def __init__(self, rate, capacity=1):
+        # rate <= 0 จะรอ token ไม่มีวันได้ (และหารด้วยศูนย์) เช่น ตั้ง teach_rpm = 0 ใน secrets
+        if not float(rate) > 0: raise ValueError(f"TokenBucket rate must be > 0 (got {rate!r})")
+        if not float(capacity) > 0: raise ValueError(f"TokenBucket capacity must be > 0 (got {capacity!r})")
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def acquire(self, tokens=1):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
@@ -0,0 +1,200 @@
+import json
+import os
+import random
+import threading
+import time
+
+# 4xx ที่ลองใหม่ได้ (หมดเวลา / โดนจำกัดโควต้า) 4xx อื่นคือคำขอผิดถาวร (เช่น 400 ชีตหาย, 403 ไม่มีสิทธิ์)
+RETRY_4XX = {408, 429}
+
+
+def is_retryable(exc):
+    # ---------------------------------------------------------
+    # error ถาวร (ย้ายไป dead-letter) มีแค่ HttpError 4xx ที่ไม่ใช่ 408/429
+    # อย่างอื่นลองใหม่ทั้งหมด: 5xx และ error ทุกแบบที่ไม่ใช่ HttpError (httplib2.ServerNotFoundError /
+    # HttpLib2Error, ssl / socket) -- แถวที่สอนแล้วไม่ควรตกไป dead-letter เพราะเน็ตหลุด
+    # ---------------------------------------------------------
+    status = getattr(getattr(exc, "resp", None), "status", None)
+    try:
+        status = int(status)
+    except (TypeError, ValueError):
+        return True
+    return not (400 <= status < 500) or status in RETRY_4XX
+
+
+class MemoryWriter:
+    # ---------------------------------------------------------
+    # บัฟเฟอร์เขียนแถว AI_Memory แบบ write-behind (1 ตัวต่อ process)
+    # - add(rows) : จดลง journal บนดิสก์ก่อน แล้วค่อยเข้าคิว (แอปล่มกลางทางก็ไม่หาย เปิดใหม่เขียนต่อเอง)
+    # - thread เบื้องหลังรวมแถวที่ค้างเป็นก้อนใหญ่ (ไม่เกิน batch_rows) แล้วเรียก append(rows) ทีเดียว
+    #   ส่งเมื่อครบก้อน หรือแถวแรกรอนานเกิน linger วินาที
+    # - 408/429/5xx/เน็ตหลุด ลองใหม่แบบ exponential backoff ถ้ายังไม่ได้ก็เก็บไว้ในคิวรอรอบถัดไป (ไม่ทิ้งข้อมูล)
+    # - error ถาวร (4xx อื่น เช่น 400 ชีต AI_Memory หาย) ย้ายก้อนนั้นไป dead-letter journal (dead_path) แล้วส่งก้อนถัดไปต่อ
+    #   ไม่ให้ก้อนเดียวค้างหัวคิวขวางแถวที่สอนหลังจากนั้นทั้งหมด (ดูได้จาก dead_rows() / dead_error)
+    # - ถ้าแอปล่มหลังส่งสำเร็จแต่ก่อนลบออกจาก journal จะได้แถวซ้ำ ซึ่ง "ล้างข้อมูลขยะ" ลบให้ (keep='last')
+    # ---------------------------------------------------------
+    def __init__(self, append, journal_path, batch_rows=500, linger=2.0,
+                 max_attempts=6, base_delay=1.0, max_delay=60.0, on_flush=None, dead_path=None):
+        self.append = append
+        self.journal_path = journal_path
+        self.dead_path = dead_path or journal_path + ".dead"
+        self.batch_rows = batch_rows
+        self.linger = linger
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.on_flush = on_flush
+        self.written = 0
+        self.last_error = None
+        self.dead_error = None
+
+        self._cond = threading.Condition()
+        self._journal_lock = threading.Lock()
+        self._rows = self._load_journal()
+        self._since = time.monotonic() if self._rows else None
+        self._flush_now = bool(self._rows)
+        self._thread = threading.Thread(target=self._run, name="memory-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self):
+        # จำนวนแถวที่ยังไม่ได้ลงชีต (รวมก้อนที่กำลังส่ง)
+        with self._cond:
+            return len(self._rows)
+
+    def pending_skus(self):
+        with self._cond:
+            return [str(r[0]).strip() for r in self._rows if r]
+
+    def dead_rows(self):
+        # แถวที่ส่งไม่ได้ด้วย error ถาวร (อยู่ใน dead-letter journal รอคนแก้แล้วสั่งส่งใหม่)
+        return self._read_jsonl(self.dead_path)
+
+    def retry_dead(self):
+        # เอาแถวใน dead-letter กลับเข้าคิวปกติ (หลังแก้ต้นเหตุแล้ว) คืนจำนวนแถว
+        with self._journal_lock:
+            rows = self._read_jsonl(self.dead_path)
+            try:
+                os.remove(self.dead_path)
+            except FileNotFoundError:
+                pass
+            self.dead_error = None
+        self.add(rows)
+        return len(rows)
+
+    def add(self, rows):
+        rows = [list(r) for r in rows]
+        if not rows: return
+        with self._journal_lock:
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                for r in rows:
+                    f.write(json.dumps(r, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            with self._cond:
+                if not self._rows: self._since = time.monotonic()
+                self._rows.extend(rows)
+                self._cond.notify_all()
+
+    def drain(self, timeout=None):
+        # สั่งส่งทุกแถวที่ค้างตอนนี้ แล้วรอจนหมดคิว คืน True ถ้าหมดทันเวลา
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._flush_now = True
+            self._cond.notify_all()
+            while self._rows:
+                left = None if deadline is None else deadline - time.monotonic()
+                if left is not None and left <= 0: return False
+                self._cond.wait(left)
+            return True
+
+    def _load_journal(self):
+        folder = os.path.dirname(self.journal_path)
+        if folder: os.makedirs(folder, exist_ok=True)
+        return self._read_jsonl(self.journal_path)
+
+    def _read_jsonl(self, path):
+        rows = []
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rows.append(json.loads(line))
+                    except ValueError:
+                        # บรรทัดสุดท้ายเขียนไม่จบตอนแอปล่ม
+                        continue
+        except FileNotFoundError:
+            pass
+        return rows
+
+    def _remove_sent(self, count, dead=None):
+        # เอาแถวที่ส่งแล้วออกจากคิว + เขียน journal ใหม่เหลือแค่แถวที่ยังค้าง
+        # (ถือ journal lock ตลอด add() จะได้ไม่ต่อท้ายไฟล์ระหว่างนี้ / เขียนไฟล์ใหม่แล้วสลับ ไม่มีช่วงที่ไฟล์ว่าง)
+        # dead = แถวที่ส่งไม่ได้ถาวร จดลง dead-letter journal ก่อนเอาออกจากคิว (ไม่มีช่วงที่แถวหาย)
+        with self._journal_lock:
+            if dead:
+                with open(self.dead_path, "a", encoding="utf-8") as f:
+                    for r in dead:
+                        f.write(json.dumps(r, ensure_ascii=False) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+            with self._cond:
+                remaining = self._rows[count:]
+            tmp = self.journal_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for r in remaining:
+                    f.write(json.dumps(r, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.journal_path)
+            with self._cond:
+                del self._rows[:count]
+                self._since = time.monotonic()
+                if not dead: self.written += count
+                self._cond.notify_all()
+
+    def _next_batch(self):
+        # รอจนถึงเวลาส่ง คืนก้อนแถวที่จะส่ง (ยังไม่เอาออกจากคิว)
+        with self._cond:
+            while True:
+                if self._rows:
+                    waited = time.monotonic() - self._since
+                    if self._flush_now or len(self._rows) >= self.batch_rows or waited >= self.linger:
+                        return self._rows[:self.batch_rows]
+                    self._cond.wait(self.linger - waited)
+                else:
+                    self._flush_now = False
+                    self._cond.wait()
+
+    def _send(self, batch):
+        # คืน "ok" ถ้าส่งสำเร็จ / "retry" ถ้า error ชั่วคราวลองครบแล้วยังไม่ได้ / "dead" ถ้า error ถาวร
+        # (ลองใหม่แบบ backoff เฉพาะ error ชั่วคราว)
+        for attempt in range(self.max_attempts):
+            try:
+                self.append(batch)
+                self.last_error = None
+                return "ok"
+            except Exception as e:
+                self.last_error = e
+                print(f"Memory Write Error (attempt {attempt + 1}): {e}")
+                if not is_retryable(e): return "dead"
+                if attempt == self.max_attempts - 1: return "retry"
+                delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+                time.sleep(delay * random.uniform(0.5, 1.0))
+        return "retry"
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            result = self._send(batch)
+            if result == "retry":
+                # ยังส่งไม่ได้: เก็บไว้ในคิว/journal เหมือนเดิม พักแล้วค่อยลองใหม่
+                time.sleep(self.max_delay)
+                continue
+            if result == "dead":
+                # error ถาวร: ย้ายก้อนนี้ไป dead-letter แล้วส่งก้อนถัดไปต่อ (เก็บสาเหตุไว้ใน dead_error ให้หน้าจอ)
+                self.dead_error = self.last_error
+                self._remove_sent(len(batch), dead=batch)
+                continue
+            self._remove_sent(len(batch))
+            if self.on_flush is not None: self.on_flush(len(batch))
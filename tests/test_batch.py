@@ -0,0 +1,83 @@
+# ---------------------------------------------------------
+# search.batch: แยกรายการรหัสที่วางมา / อ่านจากไฟล์ / ตารางราคาหลายรายการ
+# ---------------------------------------------------------
+import numpy as np
+import pandas as pd
+import pytest
+
+from search.batch import codes_from_frame, parse_codes, quote_table
+from search.pricing import PriceList, PriceRules
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("RT20\nAR12", ["RT20", "AR12"]),
+    ("RT20, AR12;KX9\tZZ1", ["RT20", "AR12", "KX9", "ZZ1"]),
+    ("RT20\r\n\r\nAR12\n", ["RT20", "AR12"]),
+    ("  RT20  \n\t AR 12 ", ["RT20", "AR 12"]),
+    ("1. RT20\n2) AR12\n- KX9\n• ZZ1\n* Q1", ["RT20", "AR12", "KX9", "ZZ1", "Q1"]),
+    # เลขล้วนที่ไม่มีช่องว่างตามหลังไม่ใช่ลำดับ (เป็นรหัส)
+    ("12.5\n100", ["12.5", "100"]),
+    ("", []),
+    (None, []),
+    (" \n , ; ", []),
+])
+def test_parse_codes_separators_and_whitespace(text, expected):
+    assert parse_codes(text) == expected
+
+
+def test_parse_codes_dedupes_keeping_first_order():
+    assert parse_codes("B\nA\nB\n1. A\nC") == ["B", "A", "C"]
+    # ต่างตัวพิมพ์ถือเป็นคนละคำค้น (ค้นแล้วได้ผลเดียวกันอยู่ดี)
+    assert parse_codes("rt20\nRT20") == ["rt20", "RT20"]
+
+
+def test_codes_from_frame_picks_code_column():
+    df = pd.DataFrame({"ลำดับ": [1, 2, 3], " SKU ": ["RT20", None, "RT20"], "qty": [1, 2, 3]})
+    assert codes_from_frame(df) == ["RT20"]
+    assert codes_from_frame(pd.DataFrame({"x": ["A", "B"]})) == ["A", "B"]
+    assert codes_from_frame(pd.DataFrame()) == []
+    assert codes_from_frame(None) == []
+
+
+def make_main():
+    return pd.DataFrame({
+        "รหัสสินค้า": ["RT20", "AR12"],
+        "รายละเอียดสินค้า": ["ตู้เย็น", "แอร์"],
+        "ยี่ห้อ": ["Haier", "Samsung"],
+        "ราคาทุนต่อหน่วย": [1000.0, 20000.0],
+        "จำนวนสต้อก": [3.0, 0.0],
+    })
+
+
+def test_quote_table_found_and_not_found():
+    df = make_main()
+    price_list = PriceList(df, PriceRules(default_margin=10))
+    out = quote_table(df, ["ar12", "nope", "rt20"], [1, -1, 0], ["sku", "❌ ไม่พบ", "sku"], price_list)
+    assert out['คำค้น'].tolist() == ["ar12", "nope", "rt20"]
+    assert out['ผลค้นหา'].tolist() == ["sku", "❌ ไม่พบ", "sku"]
+    # ไม่เจอ = ค่าว่าง (None/NaN แล้วแต่ dtype ของ pandas)
+    assert out['รหัสสินค้า'].isna().tolist() == [False, True, False]
+    assert out['รหัสสินค้า'].tolist()[::2] == ["AR12", "RT20"]
+    assert out['ยี่ห้อ'].tolist()[::2] == ["Samsung", "Haier"] and pd.isna(out['ยี่ห้อ'].iat[1])
+    assert out['ราคาทุนต่อหน่วย'].tolist()[::2] == [20000.0, 1000.0]
+    assert np.isnan(out['ราคาทุนต่อหน่วย'].iat[1])
+    assert out['ราคาขาย'].to_numpy()[[0, 2]] == pytest.approx([22000.0, 1100.0])
+    assert out['กำไร (บาท)'].to_numpy()[[0, 2]] == pytest.approx([2000.0, 100.0])
+    for col in ('กำไร %', 'ราคาขาย', 'กำไร (บาท)', 'จำนวนสต้อก'):
+        assert np.isnan(out[col].iat[1])
+
+
+def test_quote_table_nothing_found_on_empty_main():
+    df = make_main().iloc[:0]
+    price_list = PriceList(df, PriceRules())
+    out = quote_table(df, ["a", "b"], [-1, -1], ["❌", "❌"], price_list)
+    assert len(out) == 2
+    assert out['รหัสสินค้า'].isna().all()
+    assert out['ราคาขาย'].isna().all()
+
+
+def test_quote_table_missing_columns():
+    df = make_main().drop(columns=['ยี่ห้อ', 'จำนวนสต้อก'])
+    out = quote_table(df, ["rt20"], [0], ["sku"], PriceList(df, PriceRules()))
+    assert out['ยี่ห้อ'].isna().all() and out['จำนวนสต้อก'].isna().all()
+    assert out['รหัสสินค้า'].tolist() == ["RT20"]
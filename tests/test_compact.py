@@ -0,0 +1,51 @@
+# ---------------------------------------------------------
+# search.compact: dtype ที่ประหยัดแรมต้องไม่ทำให้ค่าเพี้ยน (โดยเฉพาะราคาที่มีสตางค์)
+# ---------------------------------------------------------
+import numpy as np
+import pandas as pd
+import pytest
+
+from search.compact import compact_frame, compact_series
+
+
+def test_money_with_satang_keeps_float64():
+    s = compact_series(pd.Series([12345.67, 999.99, 1500.0]))
+    assert s.dtype == np.float64
+    assert s.tolist() == [12345.67, 999.99, 1500.0]
+
+
+@pytest.mark.parametrize("values", [[0.5, 1.25, np.nan], [1.0, np.nan], [2.0 ** 40, 1.5]])
+def test_lossless_floats_become_float32(values):
+    s = compact_series(pd.Series(values))
+    assert s.dtype == np.float32
+    assert np.array_equal(s.to_numpy(dtype=float), np.array(values), equal_nan=True)
+
+
+def test_integers_become_int32():
+    s = compact_series(pd.Series([1.0, 2.0, 60000.0]))
+    assert s.dtype == np.int32
+    assert s.tolist() == [1, 2, 60000]
+
+
+def test_large_integers_stay_exact():
+    # เกินช่วง int32 และ float32 เก็บตรงไม่ได้ -> float64
+    s = compact_series(pd.Series([2.0 ** 31 + 1, 1.0]))
+    assert s.dtype == np.float64
+    assert s.iat[0] == 2.0 ** 31 + 1
+
+
+def test_text_columns():
+    repeated = compact_series(pd.Series(["LG", "LG", None, "LG"], dtype=object))
+    assert isinstance(repeated.dtype, pd.CategoricalDtype)
+    assert repeated.tolist() == ["LG", "LG", "", "LG"]
+    unique = compact_series(pd.Series(["a", "b", "c"], dtype=object))
+    assert pd.api.types.is_string_dtype(unique.dtype)
+    assert unique.tolist() == ["a", "b", "c"]
+
+
+def test_compact_frame_leaves_original_untouched():
+    df = pd.DataFrame({"ราคาทุนต่อหน่วย": [12345.67, 100.0], "จำนวนสต้อก": [1.0, 2.0]})
+    out = compact_frame(df)
+    assert out["ราคาทุนต่อหน่วย"].dtype == np.float64
+    assert out["จำนวนสต้อก"].dtype == np.int32
+    assert df["จำนวนสต้อก"].dtype == np.float64
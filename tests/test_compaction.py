@@ -0,0 +1,69 @@
+# ---------------------------------------------------------
+# teach.compaction: เลือกแถวขยะ/ตัวซ้ำ + แปลงเป็นคำขอลบแถวของ batchUpdate
+# ---------------------------------------------------------
+import random
+
+from teach import delete_row_requests, rows_to_delete
+from teach.compaction import memory_key
+
+
+def apply_requests(sheet, requests):
+    # ลบแถวตามคำขอ "ตามลำดับ" แบบเดียวกับ batchUpdate (ตำแหน่งนับจาก 0 รวมหัวตาราง ไม่รวม endIndex)
+    sheet = list(sheet)
+    for req in requests:
+        rng = req["deleteDimension"]["range"]
+        assert rng["dimension"] == "ROWS"
+        del sheet[rng["startIndex"]:rng["endIndex"]]
+    return sheet
+
+
+def spans(requests):
+    return [(r["deleteDimension"]["range"]["startIndex"], r["deleteDimension"]["range"]["endIndex"])
+            for r in requests]
+
+
+def test_memory_key():
+    assert memory_key(" ab-1 ") == "AB-1"
+    assert memory_key(None) == ""
+    assert memory_key(123) == "123"
+
+
+def test_rows_to_delete_junk_and_duplicates():
+    skus = ["A1", "GONE", " a1", "B2", "b2 ", "C3", None]
+    # A1: แถว 0 ซ้ำกับแถว 2 (เก็บแถวล่าสุด) / GONE, None ไม่มีในตารางหลัก / B2 ซ้ำ
+    assert rows_to_delete(skus, {"A1", "B2", "C3"}) == [0, 1, 3, 6]
+    assert rows_to_delete([], {"A1"}) == []
+    assert rows_to_delete(["A1", "B2"], {"A1", "B2"}) == []
+
+
+def test_header_row_offset():
+    # แถวข้อมูลแรก (0) อยู่ใต้หัวตาราง = ตำแหน่ง 1 ในชีต
+    assert spans(delete_row_requests(7, [0])) == [(1, 2)]
+    assert spans(delete_row_requests(7, [0], header_rows=0)) == [(0, 1)]
+    assert spans(delete_row_requests(7, [4], header_rows=2)) == [(6, 7)]
+    assert delete_row_requests(7, [0])[0]["deleteDimension"]["range"]["sheetId"] == 7
+
+
+def test_contiguous_rows_merge_and_apply_bottom_up():
+    # 2,3,4 ติดกัน -> ช่วงเดียว / ซ้ำหรือไม่เรียงก็ได้ / เรียงจากล่างขึ้นบน
+    requests = delete_row_requests(0, [9, 3, 2, 4, 0, 3, 7])
+    assert spans(requests) == [(10, 11), (8, 9), (3, 6), (1, 2)]
+    assert delete_row_requests(0, []) == []
+
+
+def test_applying_requests_removes_exactly_those_rows():
+    rng = random.Random(0)
+    header = ["SKU", "AI_Brand"]
+    for _ in range(50):
+        data = [[f"S{i}", "x"] for i in range(rng.randint(0, 40))]
+        rows = rng.sample(range(len(data)), rng.randint(0, len(data)))
+        kept = apply_requests([header] + data, delete_row_requests(0, rows))
+        assert kept == [header] + [r for i, r in enumerate(data) if i not in set(rows)]
+
+
+def test_compaction_end_to_end():
+    skus = ["A1", "GONE", "A1", "B2", "B2", "C3"]
+    sheet = [["SKU"]] + [[s] for s in skus]
+    rows = rows_to_delete(skus, {"A1", "B2", "C3"})
+    kept = apply_requests(sheet, delete_row_requests(0, rows))
+    assert kept == [["SKU"], ["A1"], ["B2"], ["C3"]]
@@ -0,0 +1,209 @@
+# ---------------------------------------------------------
+# teach.extract_names / teach.teach_items กับโมเดลปลอม (ไม่ต่อ Gemini จริง)
+# ---------------------------------------------------------
+import json
+import threading
+import types
+
+import pytest
+
+from teach import (AdaptiveBatcher, ExtractCache, default_item, extract_names, parse_extract_response,
+                   teach_items)
+
+
+class ScriptedModel:
+    # ตอบตามลำดับใน replies: "all" = ตอบครบทุก id / set ของ id = ตอบแค่ตัวนั้น / Exception = โยน
+    def __init__(self, replies, model_name="fake-model"):
+        self.replies = list(replies)
+        self.model_name = model_name
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, generation_config=None):
+        with self._lock:
+            self.prompts.append(prompt)
+            reply = self.replies.pop(0) if self.replies else "all"
+        if isinstance(reply, Exception): raise reply
+        items = json.loads(prompt.split("from this list:", 1)[1].split("\n", 2)[1])
+        out = [{"id": it["id"], "AI_Brand": it["name"].upper(), "AI_Type": "T", "AI_Spec": "S",
+                "AI_Tags": ["a", "b"], "AI_Kind": "K"}
+               for it in items if reply == "all" or it["id"] in reply]
+        return types.SimpleNamespace(text=json.dumps(out))
+
+    def asked_ids(self, call):
+        items = json.loads(self.prompts[call].split("from this list:", 1)[1].split("\n", 2)[1])
+        return [it["id"] for it in items]
+
+
+def test_all_answered_in_one_call():
+    model = ScriptedModel(["all"])
+    stats = {}
+    out = extract_names(model, ["a", "b", "c"], stats=stats)
+    assert [o["AI_Brand"] for o in out] == ["A", "B", "C"]
+    assert out[0]["AI_Tags"] == "a, b"
+    assert stats["attempts"] == 1 and stats["missing"] == 0 and stats["cached"] == 0
+
+
+def test_partial_answer_retries_only_missing():
+    model = ScriptedModel([{0, 2}, "all"])
+    stats = {}
+    out = extract_names(model, ["a", "b", "c"], stats=stats, base_delay=0)
+    assert [o["AI_Brand"] for o in out] == ["A", "B", "C"]
+    assert model.asked_ids(1) == [1]
+    assert stats["attempts"] == 2 and stats["missing"] == 0
+
+
+def test_error_then_success():
+    model = ScriptedModel([RuntimeError("429"), "all"])
+    out = extract_names(model, ["a", "b"], base_delay=0)
+    assert [o["AI_Brand"] for o in out] == ["A", "B"]
+    assert len(model.prompts) == 2
+
+
+def test_gives_up_with_defaults_after_max_retries():
+    model = ScriptedModel([{0}, set(), set(), "all"])
+    stats = {}
+    out = extract_names(model, ["a", "b"], stats=stats, base_delay=0)
+    assert out[0]["AI_Brand"] == "A"
+    assert out[1] == default_item()
+    assert len(model.prompts) == 3
+    assert stats["attempts"] == 3 and stats["missing"] == 1
+
+
+def test_cache_hits_skip_the_model(tmp_path):
+    cache = ExtractCache(str(tmp_path / "cache.sqlite3"))
+    extract_names(ScriptedModel(["all"]), ["a", "b"], cache=cache)
+    model = ScriptedModel(["all"])
+    stats = {}
+    out = extract_names(model, ["a", "b", "c"], cache=cache, stats=stats)
+    assert [o["AI_Brand"] for o in out] == ["A", "B", "C"]
+    assert model.asked_ids(0) == [2]
+    assert stats["cached"] == 2
+    # โมเดลคนละตัว = คนละคีย์แคช
+    other = ScriptedModel(["all"], model_name="other")
+    extract_names(other, ["a"], cache=cache)
+    assert len(other.prompts) == 1
+
+
+def test_empty_names():
+    model = ScriptedModel([])
+    assert extract_names(model, []) == []
+    assert model.prompts == []
+
+
+class ListWriter:
+    def __init__(self):
+        self.rows = []
+
+    def add(self, rows):
+        self.rows.extend(rows)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_teach_items_writes_one_row_per_item(workers):
+    items = [{"SKU": f" SKU{i} ", "Name": f"n{i}", "Original_Kind": "k"} for i in range(23)]
+    model = ScriptedModel([{0}] + ["all"] * 50)
+    writer = ListWriter()
+    seen = []
+    done = teach_items(items, model, writer, AdaptiveBatcher(size=5, min_size=1), workers=workers,
+                       progress=seen.append, base_delay=0)
+    assert done == 23 and seen[-1] == 23
+    by_sku = {r[0]: r for r in writer.rows}
+    assert sorted(by_sku) == sorted(f"SKU{i}" for i in range(23))
+    assert by_sku["SKU7"] == ["SKU7", "N7 K", "T", "S", "a, b", "K"]
+
+
+class CountingLimiter:
+    def __init__(self):
+        self.acquired = 0
+
+    def acquire(self, tokens=1):
+        self.acquired += tokens
+
+
+def test_limiter_acquired_before_every_attempt():
+    # รอบลองใหม่หลังโดน 429 ต้องขอ token ด้วย ไม่งั้นจะยิงทะลุโควต้าตอนที่โควต้าหมดพอดี
+    model = ScriptedModel([RuntimeError("429"), {0}, "all"])
+    limiter = CountingLimiter()
+    extract_names(model, ["a", "b"], limiter=limiter, base_delay=0)
+    assert limiter.acquired == len(model.prompts) == 3
+
+
+def test_cache_hits_take_no_token(tmp_path):
+    cache = ExtractCache(str(tmp_path / "cache.sqlite3"))
+    extract_names(ScriptedModel(["all"]), ["a"], cache=cache)
+    limiter = CountingLimiter()
+    extract_names(ScriptedModel(["all"]), ["a"], cache=cache, limiter=limiter)
+    assert limiter.acquired == 0
+
+
+def test_backoff_is_exponential_with_jitter(monkeypatch):
+    import teach.extract as extract
+    waits = []
+    monkeypatch.setattr(extract.time, "sleep", waits.append)
+    model = ScriptedModel([RuntimeError("429")] * 4)
+    extract_names(model, ["a"], max_retries=4, base_delay=2, max_delay=5)
+    # ไม่พักหลังรอบสุดท้าย / รอบที่ n รอ [0.5, 1] x min(max_delay, base_delay * 2**n)
+    assert len(waits) == 3
+    for n, w in enumerate(waits):
+        cap = min(5, 2 * 2 ** n)
+        assert cap * 0.5 <= w <= cap
+
+
+def test_teach_items_uses_limiter_per_call():
+    items = [{"SKU": i, "Name": f"n{i}", "Original_Kind": ""} for i in range(10)]
+    model = ScriptedModel([RuntimeError("429")] + ["all"] * 10)
+    limiter = CountingLimiter()
+    teach_items(items, model, ListWriter(), AdaptiveBatcher(size=5, min_size=1), workers=2, limiter=limiter,
+                base_delay=0)
+    assert limiter.acquired == len(model.prompts)
+
+
+# ---------------------------------------------------------
+# parse_extract_response: คำตอบไม่ครบ / สลับลำดับ / เกิน / JSON พัง
+# ---------------------------------------------------------
+def item(i, brand="LG", **kw):
+    return dict({"id": i, "AI_Brand": brand, "AI_Type": "แอร์", "AI_Kind": "ติดผนัง",
+                 "AI_Spec": "9000 btu", "AI_Tags": ["inverter", "wifi"]}, **kw)
+
+
+def test_parse_full_response_normalizes_items():
+    out = parse_extract_response(json.dumps([item(0), item(1, brand="")]), [0, 1])
+    assert out[0] == {"AI_Brand": "LG", "AI_Type": "แอร์", "AI_Kind": "ติดผนัง",
+                      "AI_Spec": "9000 btu", "AI_Tags": "inverter, wifi"}
+    assert out[1]["AI_Brand"] == "Unknown"
+
+
+def test_parse_missing_ids():
+    out = parse_extract_response(json.dumps([item(2)]), [0, 1, 2])
+    assert set(out) == {2}
+
+
+def test_parse_reordered_and_string_ids():
+    text = json.dumps([item("2", brand="C"), item(0, brand="A"), item(1, brand="B")])
+    out = parse_extract_response(text, [0, 1, 2])
+    assert {i: v["AI_Brand"] for i, v in out.items()} == {0: "A", 1: "B", 2: "C"}
+
+
+def test_parse_extra_and_duplicate_items_ignored():
+    text = json.dumps([item(0, brand="A"), item(0, brand="DUP"), item(9), "junk", item(1, brand="B")])
+    out = parse_extract_response(text, [0, 1])
+    assert {i: v["AI_Brand"] for i, v in out.items()} == {0: "A", 1: "B"}
+
+
+def test_parse_without_ids_matches_by_order_only_when_count_fits():
+    items = [{k: v for k, v in item(0, brand=b).items() if k != "id"} for b in ("A", "B")]
+    out = parse_extract_response(json.dumps(items), [5, 7])
+    assert {i: v["AI_Brand"] for i, v in out.items()} == {5: "A", 7: "B"}
+    assert parse_extract_response(json.dumps(items), [5, 7, 9]) == {}
+
+
+def test_parse_markdown_fence_and_single_object():
+    assert set(parse_extract_response("```json\n" + json.dumps([item(3)]) + "\n```", [3])) == {3}
+    assert set(parse_extract_response(json.dumps(item(3)), [3])) == {3}
+
+
+@pytest.mark.parametrize("text", ["", "not json", "[{\"id\": 0,", "42", "\"text\""])
+def test_parse_malformed_raises(text):
+    with pytest.raises(ValueError):
+        parse_extract_response(text, [0])
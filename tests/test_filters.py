@@ -0,0 +1,146 @@
+# ---------------------------------------------------------
+# เทียบ mask ของ compile_filters + apply_filters กับโค้ดกรองเดิมใน app.py (วนทีละแถว)
+# วิธีรัน (จากโฟลเดอร์โปรเจกต์):  python -m pytest -q
+# ---------------------------------------------------------
+import re
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from search.filters import (NUMERIC_OPS, TEXT_SEARCH_COLS, apply_filters, build_numeric_indexes,
+                            build_text_indexes, compile_filters)
+
+
+# ---------------------------------------------------------
+# โค้ดเดิม (ก่อนแยกเป็น search/filters.py) ย้ายมาแทบไม่แก้ ใช้เป็นคำตอบที่ถูก
+# regex=True = แบบเดิมเป๊ะ (str.contains แบบ regex) / ของใหม่เทียบข้อความตรงตัว
+# ---------------------------------------------------------
+def extract_numbers_universal(text):
+    try:
+        clean_text = str(text).replace(',', '')
+        nums = re.findall(r'(\d+\.?\d*)', clean_text)
+        if not nums: return []
+        return [float(n) for n in nums if n and n != '.']
+    except: return []
+
+
+def validate_row(extracted_val, conditions):
+    for num in extracted_val:
+        pass_all = True
+        for cond in conditions:
+            op = cond['operator']
+            limit = float(str(cond['value']).replace(',', ''))
+            if op == 'gt' and not (num > limit): pass_all = False; break
+            if op == 'gte' and not (num >= limit): pass_all = False; break
+            if op == 'lt' and not (num < limit): pass_all = False; break
+            if op == 'lte' and not (num <= limit): pass_all = False; break
+        if pass_all: return True
+    return False
+
+
+def reference_mask(df_search, filters, regex=False):
+    final_mask = pd.Series([True] * len(df_search))
+    grouped_filters = defaultdict(list)
+    for f in filters: grouped_filters[f['column']].append(f)
+
+    for col, conditions in grouped_filters.items():
+        if col not in df_search.columns: continue
+        numeric_conds = [f for f in conditions if f['operator'] in NUMERIC_OPS]
+        choice_conds = [f for f in conditions if f['operator'] not in NUMERIC_OPS]
+
+        range_mask = pd.Series([True] * len(df_search))
+        if numeric_conds:
+            vals = df_search[col].apply(extract_numbers_universal)
+            range_mask = vals.apply(lambda x: validate_row(x, numeric_conds))
+
+        choice_mask = pd.Series([True] * len(df_search))
+        if choice_conds:
+            choice_mask = pd.Series([False] * len(df_search))
+            for f in choice_conds:
+                t_val = str(f['value']).lower().strip().replace(" ", "")
+                found_any = pd.Series([False] * len(df_search))
+                for sc in TEXT_SEARCH_COLS:
+                    if sc in df_search.columns:
+                        d_clean = df_search[sc].fillna('').astype(str).str.lower().str.replace(" ", "")
+                        found_any |= d_clean.str.contains(t_val, na=False, regex=regex)
+                choice_mask |= found_any
+
+        final_mask &= (range_mask & choice_mask)
+    return final_mask.to_numpy(dtype=bool)
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({
+        'รหัสสินค้า': ['AC-1', 'AC-2', 'AC-3', 'TV-1', 'TV-2', 'FAN-1', 'X-1', 'X-2'],
+        'รายละเอียดสินค้า': ['แอร์ Haier 9000 BTU', 'แอร์ Daikin 12,000 BTU', 'แอร์ Haier 18000 BTU',
+                             'ทีวี Samsung 55 นิ้ว', 'ทีวี LG 43 นิ้ว', 'พัดลม Hatari 16 นิ้ว',
+                             'สาย 10.5 ม.', 'สาย 1005 / 10x5'],
+        'AI_Brand': ['Haier', 'Daikin', 'Haier', 'Samsung', 'LG', 'Hatari', None, None],
+        'AI_Type': ['Air Conditioner', 'Air Conditioner', 'Air Conditioner', 'TV', 'TV', 'Fan', 'Cable', 'Cable'],
+        'AI_Spec': ['9000 BTU', '12,000 BTU', '18000 BTU', '55 inch', '43 inch', '16 inch', '10.5 m', None],
+        'AI_Tags': ['inverter', 'inverter, eco', None, 'smart tv', '', 'remote', '', ''],
+        'AI_Kind': ['wall', 'wall', 'wall', 'led', 'oled', 'stand', '', ''],
+        'ราคาทุนต่อหน่วย': ['12,500', '15,000', '21000', '18,900', '9,990', '1,290', '35', 'n/a'],
+    })
+
+
+CASES = {
+    "gt": [{"column": "AI_Spec", "operator": "gt", "value": "12000"}],
+    "lt": [{"column": "ราคาทุนต่อหน่วย", "operator": "lt", "value": "15,000"}],
+    "between": [{"column": "AI_Spec", "operator": "gte", "value": "9000"},
+                {"column": "AI_Spec", "operator": "lte", "value": "12,000"}],
+    "gte_equal_edge": [{"column": "ราคาทุนต่อหน่วย", "operator": "gte", "value": 15000},
+                       {"column": "ราคาทุนต่อหน่วย", "operator": "lte", "value": 15000}],
+    "eq": [{"column": "AI_Brand", "operator": "eq", "value": "haier"}],
+    "text_or": [{"column": "AI_Brand", "operator": "eq", "value": "Haier"},
+                {"column": "AI_Brand", "operator": "contains", "value": "Samsung"}],
+    "text_spaces": [{"column": "AI_Type", "operator": "contains", "value": "air conditioner"}],
+    "range_and_text": [{"column": "AI_Type", "operator": "eq", "value": "tv"},
+                       {"column": "ราคาทุนต่อหน่วย", "operator": "lt", "value": "10000"}],
+    "no_match": [{"column": "AI_Brand", "operator": "eq", "value": "toshiba"}],
+    "unknown_column": [{"column": "ไม่มีคอลัมน์นี้", "operator": "gt", "value": 1}],
+    "empty": [],
+}
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_matches_reference(df, name):
+    filters = CASES[name]
+    mask, _ = apply_filters(df, compile_filters(filters))
+    assert mask.tolist() == reference_mask(df, filters).tolist()
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_prebuilt_indexes_match_reference(df, name):
+    # ของที่เตรียมไว้ตอน merge_data (NumericIndex / TextColumnIndex) ต้องได้ผลเดียวกับคำนวณสด
+    filters = CASES[name]
+    mask, _ = apply_filters(df, compile_filters(filters),
+                            numbers=build_numeric_indexes(df), texts=build_text_indexes(df))
+    assert mask.tolist() == reference_mask(df, filters).tolist()
+
+
+def test_empty_plan_passes_everything(df):
+    mask, active = apply_filters(df, compile_filters([]))
+    assert mask.dtype == np.bool_ and mask.all() and len(mask) == len(df)
+    assert active == []
+
+
+def test_text_is_literal_not_regex(df):
+    # เดิม str.contains เป็น regex: "10.5" เจอ "1005" / "10x5" ด้วย (จุด = ตัวอะไรก็ได้)
+    # ตอนนี้เทียบข้อความตรงตัว เจอแค่แถวที่มี "10.5" จริงๆ
+    filters = [{"column": "AI_Spec", "operator": "eq", "value": "10.5"}]
+    mask, _ = apply_filters(df, compile_filters(filters))
+    old = reference_mask(df, filters, regex=True)
+    codes = df['รหัสสินค้า']
+    assert codes[mask].tolist() == ['X-1']
+    assert codes[old].tolist() == ['X-1', 'X-2']
+
+
+def test_in_list_is_or_of_values(df):
+    filters = [{"column": "AI_Brand", "operator": "in", "value": ["haier", "lg"]}]
+    split = [{"column": "AI_Brand", "operator": "eq", "value": v} for v in ("haier", "lg")]
+    mask, _ = apply_filters(df, compile_filters(filters))
+    assert mask.tolist() == reference_mask(df, split).tolist()
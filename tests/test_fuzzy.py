@@ -0,0 +1,77 @@
+# ---------------------------------------------------------
+# search.fuzzy (edit distance / FuzzyMatcher) + เกณฑ์ความมั่นใจของ Catalogue.lookup
+# ---------------------------------------------------------
+import pandas as pd
+import pytest
+
+from search import Catalogue, SearchIndex
+from search.fuzzy import DEFAULT_CONFIDENCE, FuzzyMatcher, edit_distance, model_tokens, similarity
+
+
+@pytest.mark.parametrize("a, b, expected", [
+    ("", "", 0),
+    ("abc", "", 3),
+    ("", "abc", 3),
+    ("abc", "abc", 0),
+    ("kitten", "sitting", 3),
+    ("rt20", "rt02", 2),
+    ("rt20", "r20", 1),
+    ("ar12", "ar123", 1),
+    ("flaw", "lawn", 2),
+])
+def test_edit_distance(a, b, expected):
+    assert edit_distance(a, b) == expected
+    assert edit_distance(b, a) == expected
+
+
+def test_similarity():
+    assert similarity("rt20", "rt20") == 1.0
+    assert similarity("", "rt20") == 0.0
+    assert similarity("rt21", "rt20") == 0.75
+    # พิมพ์แค่ต้นรุ่น: เทียบกับส่วนหัวของรหัส หักคะแนน 5%
+    assert similarity("ar12", "ar12vb") == pytest.approx(0.95)
+
+
+def test_model_tokens():
+    assert model_tokens("แอร์ LG RT-20 9000 btu") == ["lg", "rt20", "9000", "btu"]
+    assert model_tokens("ตู้เย็น A") == []
+
+
+def test_rank_orders_by_score_then_row():
+    matcher = FuzzyMatcher(["rt20", "rt21", "ab99", "rt20"], ["", "", "แอร์ RT20X", ""])
+    # ชื่อรุ่นในรายละเอียดก็นับ (rt20x ได้คะแนนจากส่วนหัว) / คะแนนเท่ากันเรียงตามแถว
+    assert matcher.rank("rt20") == [(0, 1.0), (3, 1.0), (2, pytest.approx(0.95)), (1, 0.75)]
+    assert matcher.rank("rt20", limit=2) == [(0, 1.0), (3, 1.0)]
+    assert matcher.best("rt2o")[0] in (0, 1, 3)
+    assert matcher.best("") == (-1, 0.0)
+    assert matcher.best("qqqq") == (-1, 0.0)
+
+
+def make_catalogue(confidence=DEFAULT_CONFIDENCE):
+    df = pd.DataFrame({
+        "รหัสสินค้า": ["AR12VB", "RT20", "KX-900"],
+        "รายละเอียดสินค้า": ["แอร์ Samsung", "ตู้เย็น Haier", "ทีวี Sony"],
+    })
+    return Catalogue(df, SearchIndex.from_frame(df), confidence=confidence)
+
+
+def test_fuzzy_hit_at_or_above_confidence():
+    cat = make_catalogue()
+    hit = cat.lookup("KX-9O0")  # O แทน 0: 1 ใน 5 ตัว = 0.8
+    assert hit.kind == 'fuzzy'
+    assert hit.pos == 2
+    assert hit.score == pytest.approx(0.8)
+    assert hit.score >= DEFAULT_CONFIDENCE
+
+
+def test_below_confidence_returns_pool():
+    cat = make_catalogue()
+    hit = cat.lookup("KX-9Q9")  # ผิด 2 ใน 5 ตัว = 0.6
+    assert hit.pos == -1 and hit.kind is None
+    assert hit.score == pytest.approx(0.6)
+    assert 2 in hit.pool
+
+
+def test_confidence_is_configurable():
+    assert make_catalogue(confidence=0.5).lookup("KX-9Q9").kind == 'fuzzy'
+    assert make_catalogue(confidence=0.9).lookup("KX-9O0").kind is None
@@ -0,0 +1,56 @@
+# ---------------------------------------------------------
+# ลำดับการหาของ SearchIndex.lookup (Tab 1) และ Catalogue.lookup_many ที่ต้องได้ผลเดียวกัน
+# ---------------------------------------------------------
+import pandas as pd
+import pytest
+
+from search import Catalogue, SearchIndex
+
+SKUS = ["XRT20", "RT20-B", "RT20", "AB-100", "ZZ9"]
+DESCS = ["ตู้เย็น xrt20", "ตู้เย็น rt20 สีดำ", "ตู้เย็น rt20", "แอร์ Samsung AR100", "ทีวี Sony KDL55"]
+
+
+def make_index():
+    return SearchIndex(SKUS, DESCS)
+
+
+@pytest.mark.parametrize("query, expected", [
+    # รหัสตรงเป๊ะชนะแถวบนกว่าที่แค่มีคำนี้อยู่ (โค้ดเดิมได้ XRT20 แถว 0)
+    ("rt20", (2, 'sku')),
+    ("RT-20", (2, 'sku')),
+    # ขึ้นต้นด้วย: แถวแรกตามลำดับในชีต
+    ("rt2", (1, 'sku')),
+    ("rt20b", (1, 'sku')),
+    # มีในรหัส (ไม่ใช่ส่วนหัว): แถวแรกตามลำดับในชีต
+    ("t20", (0, 'sku')),
+    ("b100", (3, 'sku')),
+    # ไม่มีในรหัส: หาในรายละเอียด
+    ("ar100", (3, 'desc')),
+    ("kdl", (4, 'desc')),
+    # ไม่เจอ / clean แล้วว่าง (ภาษาไทยล้วน) ไม่ได้แถวแรกของชีต
+    ("qq99", (-1, None)),
+    ("ตู้เย็น", (-1, None)),
+    ("", (-1, None)),
+])
+def test_lookup_order(query, expected):
+    assert make_index().lookup(query) == expected
+
+
+def test_prefix_returns_rows_in_sheet_order():
+    index = make_index()
+    assert index.prefix("rt20") == [1, 2]
+    assert index.prefix("xx") == []
+    assert index.prefix("") == []
+
+
+def test_duplicate_sku_exact_takes_first_row():
+    index = SearchIndex(["AB1", "ab-1", "AB12"], ["", "", ""])
+    assert index.lookup("ab1") == (0, 'sku')
+
+
+def test_lookup_many_agrees_with_lookup():
+    df = pd.DataFrame({"รหัสสินค้า": SKUS, "รายละเอียดสินค้า": DESCS})
+    cat = Catalogue(df, SearchIndex.from_frame(df))
+    queries = ["rt20", "RT-20", "rt2", "t20", "ar100", "xrt20"]
+    assert [(h.pos, h.kind) for h in cat.lookup_many(queries)] == \
+        [(h.pos, h.kind) for h in (cat.lookup(q) for q in queries)]
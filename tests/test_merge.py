@@ -0,0 +1,97 @@
+# ---------------------------------------------------------
+# MergedCatalogue: ต่อท้ายความจำ AI (_append) ต้องได้ผลเหมือน merge ใหม่ทั้งก้อน (_rebuild)
+# และแก้แถวไหนของความจำ AI ก็ตาม ตารางรวมต้องไม่ค้างของเก่า
+# ---------------------------------------------------------
+import numpy as np
+import pandas as pd
+
+from bench.fixtures import make_catalogue, make_memory
+from search.filters import NUMERIC_INDEX_COLS, TEXT_SEARCH_COLS
+from search.frames import frame_memory
+from search.merge import AI_COLS, MergedCatalogue
+
+
+def make_frames(n=200):
+    df_main = make_catalogue(n)
+    df_mem = frame_memory(make_memory(df_main))[0]
+    return df_main, df_mem
+
+
+def ai_values(merged):
+    return merged[AI_COLS].astype(str).to_numpy()
+
+
+def assert_same_search(a, b):
+    # ตารางรวม + context + mask ของตัวเลข/ข้อความ ต้องเหมือนกัน
+    merged_a, pre_a = a
+    merged_b, pre_b = b
+    assert (ai_values(merged_a) == ai_values(merged_b)).all()
+    assert pre_a["context"] == pre_b["context"]
+    assert pre_a["counts"] == pre_b["counts"]
+    for col in NUMERIC_INDEX_COLS:
+        for conds in ([('gte', 9000)], [('gt', 12000), ('lte', 30000)], [('lt', 5000)]):
+            assert (pre_a["numbers"][col].range_mask(conds) == pre_b["numbers"][col].range_mask(conds)).all()
+    texts = {v.lower() for v in merged_b['AI_Brand'].astype(str).unique()[:5]}
+    texts |= {"แอร์", "inverter", "lg", "ตู้เย็น", "zzz"}
+    for col in TEXT_SEARCH_COLS:
+        for t in texts:
+            assert (pre_a["texts"][col].contains_mask(t) == pre_b["texts"][col].contains_mask(t)).all()
+
+
+def test_append_matches_rebuild():
+    df_main, df_mem = make_frames()
+    head = df_mem.iloc[:120].reset_index(drop=True)
+    cat = MergedCatalogue()
+    cat.sync(df_main, head)
+    version = cat.version
+
+    # แถวใหม่: สินค้าที่มีอยู่แล้ว (SKU ซ้ำ ใช้แถวล่าสุด), SKU ตัวเล็กมีช่องว่าง, ยี่ห้อใหม่ที่ยังไม่มีในหมวด
+    sku = df_mem['SKU'].iloc[3]
+    extra = pd.DataFrame([
+        [sku, "BRANDNEW", "แอร์", "18000 btu", "x", "ติดผนัง"],
+        [f"  {sku.lower()} ", "NEWER", "แอร์", "24000 btu", "y", "ติดผนัง"],
+    ], columns=df_mem.columns)
+    full = pd.concat([df_mem, extra], ignore_index=True)
+
+    appended = cat.sync(df_main, full)
+    assert cat.version == version + 1
+    rebuilt = MergedCatalogue().sync(df_main, full)
+    assert_same_search(appended, rebuilt)
+
+    row = np.flatnonzero(df_main['รหัสสินค้า'].to_numpy() == sku)[0]
+    assert appended[0]['AI_Brand'].iloc[row] == "NEWER"
+    assert appended[0]['AI_Spec'].iloc[row] == "24000 btu"
+
+
+def test_edit_earlier_row_rebuilds():
+    df_main, df_mem = make_frames()
+    cat = MergedCatalogue()
+    merged, _ = cat.sync(df_main, df_mem)
+
+    edited = df_mem.copy()
+    edited.loc[0, 'AI_Brand'] = "EDITED"
+    merged2, pre2 = cat.sync(df_main, edited)
+    assert merged2 is not merged
+    assert "EDITED" in set(merged2['AI_Brand'].astype(str))
+    assert "EDITED" in pre2["context"]
+    assert_same_search((merged2, pre2), MergedCatalogue().sync(df_main, edited))
+
+
+def test_edit_earlier_row_with_appended_rows_rebuilds():
+    df_main, df_mem = make_frames()
+    cat = MergedCatalogue()
+    cat.sync(df_main, df_mem.iloc[:100].reset_index(drop=True))
+
+    edited = df_mem.copy()
+    edited.loc[0, 'AI_Brand'] = "EDITED"
+    out = cat.sync(df_main, edited)
+    assert_same_search(out, MergedCatalogue().sync(df_main, edited))
+
+
+def test_same_values_new_frame_keeps_merged():
+    df_main, df_mem = make_frames()
+    cat = MergedCatalogue()
+    merged, pre = cat.sync(df_main, df_mem)
+    again = cat.sync(df_main, df_mem.copy())
+    assert again[0] is merged and again[1] is pre
+    assert cat.version == 1
@@ -0,0 +1,126 @@
+# ---------------------------------------------------------
+# search.NgramIndex เทียบกับการหา substring ตรงๆ ทีละแถว (คำตอบที่ถูก)
+# ---------------------------------------------------------
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from search.ngram import NgramIndex, _positions
+
+TEXTS = [
+    "Air LG Inverter 9000 btu รุ่น LG-9",
+    "ตู้เย็น Haier 2 ประตู",
+    "x",
+    "",
+    "55x tv samsung",
+    "RT20 AB",
+    "xrt20 aa",
+    "aaaa",
+]
+
+
+def brute(texts, keyword):
+    k = keyword.lower()
+    return {i for i, t in enumerate(texts) if k in t.lower()}
+
+
+def random_texts(n, seed=0):
+    rng = random.Random(seed)
+    alphabet = "abcxyz019 -กขค"
+    return ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12))) for _ in range(n)]
+
+
+@pytest.mark.parametrize("keyword", [
+    "x", "a", "aa", "aaa", "aaaa", "aaaaa", "lg", "l", "9", "rt", "rt20", "t20",
+    "ตู้", "ต", "ฮ", "55x", "x t", "btu", "zz", "q", "4", " ",
+])
+def test_matches_equal_substring_scan(keyword):
+    index = NgramIndex(TEXTS)
+    assert index.matches(keyword) == brute(TEXTS, keyword)
+
+
+def test_short_keywords_come_from_short_map():
+    # 1-2 ตัวอักษร: ตอบจาก short ตรงเป๊ะ (รวมตัวท้ายแถว) ไม่ต้องยืนยันซ้ำ
+    index = NgramIndex(TEXTS)
+    assert "x" in index.short and "5x" in index.short
+    assert set(_positions(index.short["x"], len(index)).tolist()) == brute(TEXTS, "x")
+    assert set(index.candidates("x")) == brute(TEXTS, "x")
+    assert index.candidates("qq") == set()
+    # ไม่มี gram ที่มีตัวเติมท้ายแถวหลุดเข้า short
+    assert not any("\x00" in k for k in index.short)
+
+
+def test_without_short_map_gives_same_matches():
+    texts = random_texts(300)
+    full = NgramIndex(texts)
+    lean = NgramIndex(texts, short=False)
+    assert lean.short is None
+    for k in ["a", "b", "x", "ก", "ab", "z9", "9 ", "-ข", "qq"]:
+        assert lean.matches(k) == full.matches(k) == brute(texts, k)
+
+
+def test_random_texts_match_brute_force():
+    texts = random_texts(500, seed=1)
+    index = NgramIndex(texts)
+    rng = random.Random(2)
+    for _ in range(200):
+        t = rng.choice(texts)
+        if not t: continue
+        i = rng.randrange(len(t))
+        k = t[i:i + rng.randint(1, 5)]
+        assert index.matches(k) == brute(texts, k), k
+
+
+def test_bitmap_and_int32_postings_agree():
+    # gram ที่เจอเกิน 1/32 ของแถวเก็บเป็น bitmap / gram หายากเก็บเป็น int32
+    texts = [f"common row{i:03d}" for i in range(200)] + ["rare only here"]
+    index = NgramIndex(texts)
+    assert index.postings["com"].dtype == np.uint8
+    assert index.postings["rar"].dtype == np.int32
+    assert index.short["c"].dtype == np.uint8
+    assert _positions(index.postings["com"], len(index)).tolist() == list(range(200))
+    assert _positions(index.postings["rar"], len(index)).tolist() == [200]
+    # คำค้นที่ต้อง intersect ทั้งสองแบบ
+    assert index.matches("common row007") == {7}
+    assert index.matches("mon") == set(range(200))
+    assert index.matches("rare") == {200}
+
+
+def test_postings_are_sorted_unique_int32():
+    # gram ซ้ำหลายตำแหน่งในแถวเดียวเก็บครั้งเดียว (แถวอื่นเป็นตัวเติมให้ posting ไม่ถึงเกณฑ์ bitmap)
+    index = NgramIndex(["aaaa aaa", "baaa", "aaa"] + ["zzz"] * 200)
+    plist = index.postings["aaa"]
+    assert plist.dtype == np.int32
+    assert plist.tolist() == [0, 1, 2]
+    assert index.short["a"].tolist() == [0, 1, 2]
+
+
+def test_search_ranks_by_keyword_count_then_row():
+    index = NgramIndex(TEXTS)
+    assert index.search(["rt20", "aa"]) == [6, 5, 7]
+    assert index.search(["nothing"]) == []
+    assert index.search(["x"], limit=2) == [2, 4]
+
+
+def test_overlap_prefers_more_shared_grams():
+    index = NgramIndex(["abcdef", "abcxyz", "zzzzzz"], short=False)
+    assert index.overlap("abcdex") == [0, 1]
+    assert index.overlap("qqq") == []
+
+
+def test_from_frame_skips_numeric_columns():
+    df = pd.DataFrame({"sku": ["RT20", "AB1"], "desc": ["แอร์ LG", "TV"], "price": [9000.0, 123.0]})
+    index = NgramIndex.from_frame(df)
+    assert index.texts == ["rt20 แอร์ lg", "ab1 tv"]
+    assert index.matches("900") == set()
+    assert len(NgramIndex.from_frame(df.iloc[:0])) == 0
+
+
+def test_empty_index():
+    index = NgramIndex([])
+    assert len(index) == 0
+    assert index.matches("abc") == set()
+    assert index.matches("a") == set()
+    assert index.search(["abc"]) == []
@@ -0,0 +1,97 @@
+# ---------------------------------------------------------
+# search.NumericIndex: range_mask เทียบกับการไล่ตัวเลขทีละแถว / replace() ต้องเท่ากับสร้างใหม่
+# ---------------------------------------------------------
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from search.numeric import NumericIndex, extract_numbers
+
+OPS = {'gt': np.greater, 'gte': np.greater_equal, 'lt': np.less, 'lte': np.less_equal}
+
+VALUES = ["9000 btu", "9000-12000 btu", "12,000 btu", "ไม่มีตัวเลข", "", None,
+          "5.5 คิว", "18000", "24000 btu 2 ตัว", "10.5 kg"]
+
+# ขอบช่วงพอดีค่าในตาราง (gt/gte, lt/lte ต่างกันตรงนี้)
+CONDITIONS = [
+    [('gte', 9000)], [('gt', 9000)], [('lte', 12000)], [('lt', 12000)],
+    [('gte', 9000), ('lte', 12000)], [('gt', 9000), ('lt', 12000)],
+    [('gte', 12000), ('lte', 9000)], [('gt', 5.5)], [('gte', 5.5), ('lt', 10.5)],
+    [('gte', 0)], [('lt', 0)], [('gt', 1e9)],
+]
+
+
+def reference_mask(series, conditions):
+    # แถวผ่านถ้ามีตัวเลขสักตัวที่ผ่านทุกเงื่อนไข
+    values, rows = extract_numbers(series)
+    ok = np.ones(len(values), dtype=bool)
+    for op, limit in conditions:
+        ok &= OPS[op](values, limit)
+    mask = np.zeros(len(series), dtype=bool)
+    mask[rows[ok]] = True
+    return mask
+
+
+def random_values(n, seed):
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        out.append(rng.choice(["", "ไม่มี", f"{rng.choice([5.5, 9000, 12000, 18000])} btu",
+                               f"{rng.randint(1, 30)}-{rng.randint(31, 60)} kg", f"{rng.randint(0, 99999):,}"]))
+    return out
+
+
+def test_extract_numbers():
+    values, rows = extract_numbers(pd.Series(["9,000-12,000 btu", "", "a1b2.5"]))
+    assert values.tolist() == [9000.0, 12000.0, 1.0, 2.5]
+    assert rows.tolist() == [0, 0, 2, 2]
+
+
+@pytest.mark.parametrize("conditions", CONDITIONS)
+def test_range_mask_matches_reference(conditions):
+    series = pd.Series(VALUES)
+    index = NumericIndex.from_series(series)
+    assert (index.range_mask(conditions) == reference_mask(series, conditions)).all()
+
+
+def test_row_min_max():
+    index = NumericIndex.from_series(pd.Series(["9000-12000", "", "7"]))
+    assert index.row_min[0] == 9000 and index.row_max[0] == 12000
+    assert np.isnan(index.row_min[1])
+    assert index.numbers(2).tolist() == [7.0]
+
+
+@pytest.mark.parametrize("positions", [[0], [3, 4], [9, 0, 5], [1, 2, 6, 7, 8]])
+def test_replace_equals_fresh_build(positions):
+    series = pd.Series(VALUES)
+    index = NumericIndex.from_series(series)
+    fresh_values = ["30000 btu", "", "ไม่มี", "9000", "1-2-3"][:len(positions)]
+    fresh_values += ["5.5"] * (len(positions) - len(fresh_values))
+    updated = series.copy()
+    updated.iloc[positions] = fresh_values
+
+    replaced = index.replace(positions, pd.Series(fresh_values))
+    rebuilt = NumericIndex.from_series(updated)
+    assert replaced.values.tolist() == rebuilt.values.tolist()
+    assert replaced.rows.tolist() == rebuilt.rows.tolist()
+    assert replaced.offsets.tolist() == rebuilt.offsets.tolist()
+    for conditions in CONDITIONS:
+        assert (replaced.range_mask(conditions) == rebuilt.range_mask(conditions)).all()
+    # ตัวเดิมไม่เปลี่ยน (session อื่นอาจใช้อยู่)
+    assert (index.range_mask([('gte', 0)]) == reference_mask(series, [('gte', 0)])).all()
+
+
+def test_replace_random_rows_equals_fresh_build():
+    rng = random.Random(3)
+    values = random_values(300, seed=1)
+    index = NumericIndex.from_series(pd.Series(values))
+    for _ in range(5):
+        positions = rng.sample(range(len(values)), 20)
+        fresh = random_values(20, seed=rng.random())
+        index = index.replace(positions, pd.Series(fresh))
+        for pos, v in zip(positions, fresh): values[pos] = v
+        rebuilt = NumericIndex.from_series(pd.Series(values))
+        for conditions in CONDITIONS:
+            assert (index.range_mask(conditions) == rebuilt.range_mask(conditions)).all()
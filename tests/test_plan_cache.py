@@ -0,0 +1,86 @@
+# ---------------------------------------------------------
+# search.plan_cache: TTL / LRU / สำเนาที่แยกจากของในแคช / คีย์ที่คงที่
+# ---------------------------------------------------------
+import pytest
+
+from search import plan_cache
+from search.plan_cache import PlanCache, fingerprint, normalize_query
+
+PLAN = {"filters": [{"column": "AI_Brand", "operator": "contains", "value": "LG"}]}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # เวลาปลอมที่เลื่อนเองได้ (ไม่ต้องรอจริง)
+    now = [1000.0]
+    monkeypatch.setattr(plan_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_ttl_expiry(clock):
+    cache = PlanCache(ttl=60)
+    cache.put("k", PLAN)
+    clock[0] += 60
+    assert cache.get("k") == PLAN
+    clock[0] += 1
+    assert cache.get("k") is None
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_put_refreshes_ttl(clock):
+    cache = PlanCache(ttl=60)
+    cache.put("k", PLAN)
+    clock[0] += 50
+    cache.put("k", {"filters": []})
+    clock[0] += 50
+    assert cache.get("k") == {"filters": []}
+
+
+def test_lru_eviction():
+    cache = PlanCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # a ใช้ล่าสุด -> b เก่าสุด
+    cache.put("c", 3)
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_get_and_put_are_deep_copies():
+    cache = PlanCache()
+    plan = {"filters": [{"column": "AI_Brand", "value": "LG"}]}
+    cache.put("k", plan)
+    plan["filters"][0]["value"] = "changed after put"
+    got = cache.get("k")
+    assert got["filters"][0]["value"] == "LG"
+    got["filters"].append({"column": "x"})
+    assert cache.get("k") == {"filters": [{"column": "AI_Brand", "value": "LG"}]}
+
+
+def test_miss_on_unknown_key():
+    cache = PlanCache()
+    assert cache.get(("q", "ctx")) is None
+    assert cache.misses == 1
+
+
+@pytest.mark.parametrize("a, b", [
+    ("แอร์  12000 BTU", "แอร์ 12000 btu"),
+    ("  LG\tinverter\n", "lg inverter"),
+    ("ABC", "abc"),
+])
+def test_normalize_query_equivalent(a, b):
+    assert normalize_query(a) == normalize_query(b) == b
+
+
+def test_normalize_query_keeps_words_apart():
+    assert normalize_query("lg inverter") != normalize_query("lginverter")
+
+
+def test_fingerprint_is_stable():
+    # ค่าคงที่ข้ามรอบการรัน (ไม่ใช้ hash() ของ Python ที่สุ่มใหม่ทุก process)
+    assert fingerprint("ctx", 1) == fingerprint("ctx", 1)
+    assert fingerprint("ctx") == "f6606585fb051e0f990784a2cd9b066dc5483735"
+    assert fingerprint("ab", "c") != fingerprint("a", "bc")
+    assert fingerprint("ctx", 1) != fingerprint("ctx", 2)
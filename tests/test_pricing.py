@@ -0,0 +1,119 @@
+# ---------------------------------------------------------
+# search.pricing: กฎปัดราคา / PriceList (ราคาขาย, grid, margin_table, between) / PriceListCache
+# ---------------------------------------------------------
+import numpy as np
+import pandas as pd
+import pytest
+
+from search.pricing import PriceList, PriceListCache, PriceRules, round_prices
+
+ROUNDING = ((1000, 10), (10000, 50), (None, 100))
+
+
+def make_df():
+    return pd.DataFrame({
+        "รหัสสินค้า": ["A", "B", "C", "D"],
+        "รายละเอียดสินค้า": ["แอร์", "ทีวี", "พัดลม", "ตู้เย็น"],
+        "ยี่ห้อ": ["LG", "Samsung ", "Hatari", "LG"],
+        "AI_Type": ["แอร์", "ทีวี", "พัดลม", ""],
+        "ราคาทุนต่อหน่วย": [10000.0, 500.0, 899.0, 25000.0],
+        "จำนวนสต้อก": [1, 2, 3, 4],
+    })
+
+
+def test_round_prices_by_band():
+    # "ราคาต่ำกว่า" limit ใช้ก้าวของช่วงนั้น / ถึง limit แล้วใช้ช่วงถัดไป / เศษทศนิยมไม่ทำให้ปัดเกิน
+    prices = [999.0, 1000.0, 1001.0, 9999.0, 10000.0, 10001.0, 1050.0000000000002]
+    assert round_prices(prices, ROUNDING).tolist() == [1000, 1000, 1050, 10000, 10000, 10100, 1050]
+    assert round_prices([123.4]).tolist() == [123.4]
+    assert round_prices([123.4], ((None, 0),)).tolist() == [123.4]
+    assert round_prices([123.4, 1001.0], ((None, 100),)).tolist() == [200.0, 1100.0]
+
+
+@pytest.mark.parametrize("limit", [None, ""])
+def test_empty_limit_is_catch_all(limit):
+    rules = PriceRules(rounding=[(1000, 10), (limit, 100)])
+    assert rules.rounding == ((1000.0, 10.0), (None, 100.0))
+
+
+@pytest.mark.parametrize("limit", [0, 0.0, "0", -5])
+def test_zero_or_negative_limit_rejected(limit):
+    with pytest.raises(ValueError):
+        PriceRules(rounding=[(limit, 100)])
+
+
+def test_negative_step_rejected():
+    with pytest.raises(ValueError):
+        PriceRules(rounding=[(1000, -10)])
+
+
+def test_rounding_sorted_and_from_config():
+    rules = PriceRules.from_config({"rounding": [["", 100], [10000, 50], [1000, 10]],
+                                    "brand": {"lg": 20}, "type": {"ทีวี": 5}})
+    assert rules.rounding == ((1000.0, 10.0), (10000.0, 50.0), (None, 100.0))
+    assert rules.brand == {"LG": 20.0} and rules.types == {"ทีวี": 5.0}
+
+
+def test_price_list_margins_and_sell():
+    rules = PriceRules(default_margin=10, brand={"lg": 20, "samsung": 15}, types={"ทีวี": 5})
+    pl = PriceList(make_df(), rules)
+    # ประเภทสำคัญกว่ายี่ห้อ / ยี่ห้อเทียบแบบตัดช่องว่าง ไม่สนตัวพิมพ์ / ไม่มีกฎใช้ค่าปกติ
+    assert pl.table['กำไร %'].tolist() == [20.0, 5.0, 10.0, 20.0]
+    assert pl.table['ราคาขาย'].to_numpy() == pytest.approx([12000.0, 525.0, 988.9, 30000.0])
+    assert pl.table['กำไร (บาท)'].to_numpy() == pytest.approx([2000.0, 25.0, 89.9, 5000.0])
+
+
+def test_grid_and_margin_table():
+    rules = PriceRules(rounding=ROUNDING, margins=(0, 10, 12))
+    pl = PriceList(make_df(), rules)
+    assert pl.grid.shape == (4, 3)
+    cost = make_df()['ราคาทุนต่อหน่วย'].to_numpy()
+    expected = round_prices(cost[:, None] * np.array([1.0, 1.1, 1.12])[None, :], ROUNDING)
+    assert (pl.grid == expected).all()
+    assert pl.grid[0].tolist() == [10000.0, 11000.0, 11200.0]
+    table = pl.margin_table(2)
+    assert table["กำไร %"].tolist() == [0.0, 10.0, 12.0]
+    assert table["ราคาขาย"].tolist() == [900.0, 990.0, 1050.0]
+    assert table["กำไร (บาท)"].to_numpy() == pytest.approx([1.0, 91.0, 151.0])
+
+
+def test_between():
+    pl = PriceList(make_df(), PriceRules(default_margin=0))
+    assert pl.between().tolist() == [True] * 4
+    assert pl.between(899.0, 10000.0).tolist() == [True, False, True, False]
+    assert pl.between(low=10001).tolist() == [False, False, False, True]
+    assert pl.between(high=500).tolist() == [False, True, False, False]
+
+
+def test_missing_cost_column_is_zero():
+    pl = PriceList(make_df().drop(columns=['ราคาทุนต่อหน่วย']), PriceRules())
+    assert pl.table['ราคาขาย'].tolist() == [0.0] * 4
+
+
+def test_cache_reuses_and_invalidates_on_rules_version():
+    df = make_df()
+    cache = PriceListCache(max_entries=2)
+    a = PriceRules(default_margin=10)
+    first = cache.get(df, a)
+    # กฎเหมือนกันทุกอย่าง (ตัวใหม่) = version เดิม ใช้ตารางเดิม
+    assert PriceRules(default_margin=10).version == a.version
+    assert cache.get(df, PriceRules(default_margin=10)) is first
+    # แก้กฎ = version ใหม่ คำนวณใหม่
+    b = PriceRules(default_margin=10, rounding=ROUNDING)
+    assert b.version != a.version
+    second = cache.get(df, b)
+    assert second is not first and second.version == b.version
+    assert cache.get(df, a) is first
+
+
+def test_cache_lru_and_table_change():
+    df = make_df()
+    cache = PriceListCache(max_entries=2)
+    rules = [PriceRules(default_margin=m) for m in (1, 2, 3)]
+    first = cache.get(df, rules[0])
+    cache.get(df, rules[1])
+    cache.get(df, rules[2])  # ดัน rules[0] ออก
+    assert cache.get(df, rules[0]) is not first
+    # ตารางใหม่ (คนละตัว) ล้างทั้งหมด
+    again = cache.get(df.copy(), rules[0])
+    assert cache.get(df.copy(), rules[0]) is not again
@@ -0,0 +1,26 @@
+import time
+
+import pytest
+
+from teach import TokenBucket
+
+
+@pytest.mark.parametrize("rate", [0, -1, 0.0])
+def test_rejects_non_positive_rate(rate):
+    with pytest.raises(ValueError):
+        TokenBucket(rate=rate)
+
+
+def test_rejects_non_positive_capacity():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=1, capacity=0)
+
+
+def test_burst_then_waits_for_refill():
+    bucket = TokenBucket(rate=50, capacity=2)
+    t = time.monotonic()
+    bucket.acquire()
+    bucket.acquire()
+    assert time.monotonic() - t < 0.01
+    bucket.acquire()
+    assert time.monotonic() - t >= 0.015
@@ -0,0 +1,58 @@
+# ---------------------------------------------------------
+# sync.refresh_data กับ Sheets / Drive ปลอม (bench.fakes)
+# ---------------------------------------------------------
+from bench.fakes import FakeDrive, FakeSheets
+from bench.fixtures import make_catalogue, make_memory, sheet_values
+from sync import new_sync_state, refresh_data
+
+
+def make_env(n=50):
+    df = make_catalogue(n)
+    sheets = FakeSheets(sheet_values(df), make_memory(df))
+    return sheets, FakeDrive()
+
+
+def test_unchanged_file_returns_same_data():
+    sheets, drive = make_env()
+    state = new_sync_state()
+    data = refresh_data(state, sheets, drive, "x")
+    assert refresh_data(state, sheets, drive, "x") is data
+    assert state["version"] == 1
+
+
+def test_full_reload_with_same_values_keeps_df_main():
+    sheets, drive = make_env()
+    state = new_sync_state()
+    data = refresh_data(state, sheets, drive, "x")
+    calls = sheets.calls
+    # ครบรอบโหลดเต็ม (full_seconds=0) แต่ค่าในชีตเหมือนเดิม
+    again = refresh_data(state, sheets, drive, "x", full_seconds=0)
+    assert sheets.calls > calls
+    assert again is data
+    assert state["version"] == 1
+
+
+def test_full_reload_with_new_values_rebuilds_df_main():
+    sheets, drive = make_env()
+    state = new_sync_state()
+    data = refresh_data(state, sheets, drive, "x")
+    sheets.tabs["main"][1] = list(sheets.tabs["main"][1])
+    sheets.tabs["main"][1][1] = "แก้ชื่อสินค้า"
+    again = refresh_data(state, sheets, drive, "x", full_seconds=0)
+    assert again is not data
+    assert again[0] is not data[0]
+    assert again[1] is data[1]
+    assert "แก้ชื่อสินค้า" in set(again[0].iloc[:, 1].astype(str))
+    assert state["version"] == 2
+
+
+def test_memory_append_keeps_df_main():
+    sheets, drive = make_env()
+    state = new_sync_state()
+    data = refresh_data(state, sheets, drive, "x")
+    sheets.tabs["AI_Memory"].append(["NEW-1", "LG", "แอร์", "9000", "a,b", "K"])
+    state.update(force=True, mem_appended=True)
+    again = refresh_data(state, sheets, drive, "x")
+    assert again[0] is data[0]
+    assert len(again[1]) == len(data[1]) + 1
+    assert again[1].iloc[-1]["SKU"] == "NEW-1"
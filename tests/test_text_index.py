@@ -0,0 +1,85 @@
+# ---------------------------------------------------------
+# search.TextColumnIndex: contains_mask เทียบกับ str.contains ตรงๆ / replace() ต้องเท่ากับสร้างใหม่
+# ทั้งแบบ inverted index (vocab: ค่าซ้ำเยอะ) และแบบคอลัมน์ normalize (norm: ค่าไม่ซ้ำ)
+# ---------------------------------------------------------
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from search.text_index import TextColumnIndex, normalize_text_column
+
+BRANDS = ["LG", "Samsung", "SAMSUNG", "Haier", "แอร์ LG", None, ""]
+QUERIES = ["lg", "samsung", "sam", "haier", "แอร์", "แอร์lg", "x", "", "new"]
+
+
+def reference_mask(series, t_val):
+    norm = normalize_text_column(series)
+    return norm.str.contains(t_val, regex=False).to_numpy(dtype=bool)
+
+
+def vocab_series(n=200, seed=0):
+    rng = random.Random(seed)
+    return pd.Series([rng.choice(BRANDS) for _ in range(n)])
+
+
+def norm_series(n=200, seed=0):
+    rng = random.Random(seed)
+    return pd.Series([f"{rng.choice(BRANDS)} รุ่น {i}" for i in range(n)])
+
+
+def test_mode_follows_cardinality():
+    assert TextColumnIndex(vocab_series()).vocab is not None
+    assert TextColumnIndex(norm_series()).norm is not None
+
+
+def test_category_column():
+    series = vocab_series().astype("category")
+    index = TextColumnIndex(series)
+    for q in QUERIES:
+        assert (index.contains_mask(q) == reference_mask(series, q)).all()
+
+
+@pytest.mark.parametrize("make", [vocab_series, norm_series])
+@pytest.mark.parametrize("query", QUERIES)
+def test_contains_mask_matches_reference(make, query):
+    series = make()
+    assert (TextColumnIndex(series).contains_mask(query) == reference_mask(series, query)).all()
+
+
+@pytest.mark.parametrize("make", [vocab_series, norm_series])
+def test_replace_equals_fresh_build(make):
+    series = make()
+    original = index = TextColumnIndex(series)
+    before = {q: original.contains_mask(q) for q in QUERIES}
+    rng = random.Random(1)
+    for _ in range(5):
+        positions = rng.sample(range(len(series)), 15)
+        # มีทั้งค่าใหม่ที่ยังไม่อยู่ใน vocab และค่าเดิม
+        fresh = [rng.choice(["NEW brand", "LG", "", None, "Haier"]) for _ in positions]
+        index = index.replace(positions, pd.Series(fresh))
+        series = series.copy()
+        series.iloc[positions] = fresh
+        rebuilt = TextColumnIndex(series)
+        for q in QUERIES:
+            assert (index.contains_mask(q) == rebuilt.contains_mask(q)).all(), q
+            assert (index.contains_mask(q) == reference_mask(series, q)).all(), q
+    # ตัวเดิมไม่เปลี่ยน (session อื่นอาจใช้อยู่)
+    for q in QUERIES:
+        assert (original.contains_mask(q) == before[q]).all()
+
+
+def test_replace_keeps_mode():
+    vocab = TextColumnIndex(vocab_series())
+    assert vocab.replace([0], pd.Series(["new"])).vocab is not None
+    norm = TextColumnIndex(norm_series())
+    assert norm.replace(np.array([0]), pd.Series(["new"])).norm is not None
+
+
+def test_replace_drops_memo():
+    # ผลที่จำไว้ของ vocab เดิมต้องไม่ติดไปตัวใหม่ (ค่าใหม่อาจมีคำค้นนั้น)
+    index = TextColumnIndex(vocab_series())
+    assert not index.contains_mask("new").any()
+    replaced = index.replace([3], pd.Series(["NEW"]))
+    assert np.flatnonzero(replaced.contains_mask("new")).tolist() == [3]
@@ -0,0 +1,145 @@
+# ---------------------------------------------------------
+# teach.MemoryWriter / is_retryable กับ append ปลอม (ไม่ต่อ Sheets จริง)
+# ---------------------------------------------------------
+import json
+import ssl
+import threading
+
+import pytest
+
+from bench.fakes import FakeHttpError
+from teach import MemoryWriter
+from teach.writer import is_retryable
+
+
+class ScriptedAppend:
+    # append(rows) ปลอม: โยน error ตามลำดับใน errors ก่อน แล้วค่อยสำเร็จ (จดทุกก้อนที่ส่งสำเร็จ)
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.batches = []
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, rows):
+        with self._lock:
+            self.calls += 1
+            if self.errors:
+                error = self.errors.pop(0)
+                if error is not None: raise error
+            self.batches.append([list(r) for r in rows])
+
+    @property
+    def rows(self):
+        return [r for b in self.batches for r in b]
+
+
+class HttpLib2Error(Exception):
+    # หน้าตาเหมือน httplib2.HttpLib2Error (ไม่ได้สืบทอด OSError / ไม่มี resp)
+    pass
+
+
+def make_writer(tmp_path, append, **kw):
+    kw = dict(dict(linger=60.0, base_delay=0.0, max_delay=0.01), **kw)
+    return MemoryWriter(append, str(tmp_path / "journal.jsonl"), **kw)
+
+
+def read_journal(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+    except FileNotFoundError:
+        return []
+
+
+@pytest.mark.parametrize("exc, expected", [
+    (FakeHttpError(400), False),
+    (FakeHttpError(403), False),
+    (FakeHttpError(404), False),
+    (FakeHttpError(408), True),
+    (FakeHttpError(429), True),
+    (FakeHttpError(500), True),
+    (FakeHttpError(503), True),
+    (HttpLib2Error("Unable to find the server"), True),
+    (ssl.SSLError("EOF occurred in violation of protocol"), True),
+    (ConnectionResetError(), True),
+    (TimeoutError(), True),
+    (RuntimeError("boom"), True),
+])
+def test_is_retryable(exc, expected):
+    assert is_retryable(exc) is expected
+
+
+def test_transient_failure_then_success(tmp_path):
+    append = ScriptedAppend([FakeHttpError(503), HttpLib2Error("dns"), None])
+    writer = make_writer(tmp_path, append)
+    writer.add([["A1", "LG"], ["A2", "LG"]])
+    assert writer.drain(timeout=5)
+    assert append.calls == 3
+    assert append.rows == [["A1", "LG"], ["A2", "LG"]]
+    assert writer.written == 2
+    assert writer.dead_rows() == []
+    assert read_journal(writer.journal_path) == []
+
+
+def test_permanent_error_goes_to_dead_letter(tmp_path):
+    append = ScriptedAppend([FakeHttpError(400)])
+    writer = make_writer(tmp_path, append)
+    writer.add([["BAD", "x"]])
+    assert writer.drain(timeout=5)
+    assert append.calls == 1
+    assert writer.dead_rows() == [["BAD", "x"]]
+    assert writer.dead_error is not None
+    assert read_journal(writer.journal_path) == []
+
+    # ก้อนถัดไปไม่ติด และส่ง dead-letter ใหม่ได้หลังแก้ต้นเหตุ
+    writer.add([["OK", "y"]])
+    assert writer.drain(timeout=5)
+    assert writer.retry_dead() == 1
+    assert writer.drain(timeout=5)
+    assert append.rows == [["OK", "y"], ["BAD", "x"]]
+    assert writer.dead_rows() == []
+
+
+def test_replay_journal_after_crash(tmp_path):
+    # writer ตัวแรกส่งไม่ได้ (เน็ตหลุดตลอด) แล้วแอปล่ม: แถวยังอยู่ใน journal
+    down = ScriptedAppend([ConnectionResetError()] * 1000)
+    first = make_writer(tmp_path, down, max_attempts=1, max_delay=60.0)
+    first.add([["S1", "a"], ["S2", "b"]])
+    assert not first.drain(timeout=0.2)
+    assert read_journal(first.journal_path) == [["S1", "a"], ["S2", "b"]]
+
+    # เปิดใหม่ด้วย journal เดิม: ส่งต่อเองโดยไม่ต้อง add ซ้ำ
+    append = ScriptedAppend()
+    second = make_writer(tmp_path, append)
+    assert second.pending == 2
+    assert second.drain(timeout=5)
+    assert append.rows == [["S1", "a"], ["S2", "b"]]
+    assert read_journal(second.journal_path) == []
+
+
+def test_journal_skips_torn_last_line(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    path.write_text('["S1", "a"]\n["S2", "b', encoding="utf-8")
+    append = ScriptedAppend()
+    writer = make_writer(tmp_path, append)
+    assert writer.drain(timeout=5)
+    assert append.rows == [["S1", "a"]]
+
+
+def test_queued_rows_coalesce_into_one_append(tmp_path):
+    append = ScriptedAppend()
+    writer = make_writer(tmp_path, append, batch_rows=500)
+    for i in range(5):
+        writer.add([[f"S{i}", "x"], [f"T{i}", "y"]])
+    assert writer.drain(timeout=5)
+    assert len(append.batches) == 1
+    assert len(append.batches[0]) == 10
+
+
+def test_batches_split_at_batch_rows(tmp_path):
+    append = ScriptedAppend()
+    writer = make_writer(tmp_path, append, batch_rows=4)
+    writer.add([[f"S{i}"] for i in range(10)])
+    assert writer.drain(timeout=5)
+    assert [len(b) for b in append.batches] == [4, 4, 2]
+    assert append.rows == [[f"S{i}"] for i in range(10)]